@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+#
+# Benchmark suite, run on a synthetic corpus (see corpus.py):
+#  - parse: loading the documents, per JSON parser backend
+#  - schema: schema validation of the documents, per schema engine
+#  - license: checking the license expressions of the packages, with
+#    an empty parse cache
+#  - checksum: checksums of the documents, computed and cached
+#  - recursive: recursive validation from the top document
+#  - packages_deps: the packages and their transitive dependencies
+#  - format: formatting the packages, per output format
+#
+# The results (best and mean time of a number of rounds) are written as
+# JSON, together with the corpus parameters and the commit, so that two
+# commits can be compared:
+#
+#   python3 -m benchmarks --scale medium --output before.json
+#   (change, commit)
+#   python3 -m benchmarks --scale medium --output after.json
+#   python3 -m benchmarks compare before.json after.json
+#
+# Run from the top directory.
+#
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import corpus as corpus_generator
+from spdx_validator.checksum import ChecksumCache
+from spdx_validator.checksum import hash_from_file
+from spdx_validator.config import spdx_validator_version
+from spdx_validator.format.format_flict import FlictFormatter
+from spdx_validator.format.format_json import JsonFormatter
+from spdx_validator.format.format_yaml import YamlFormatter
+from spdx_validator.license_expression import parse as parse_license_expression
+from spdx_validator.parser import available_json_backends
+from spdx_validator.parser import ManifestParser
+from spdx_validator.schema import SCHEMA_ENGINES
+from spdx_validator.schema import validate_instance
+from spdx_validator.validator import SPDXValidator
+
+RESULTS_FORMAT = 1
+DEFAULT_ROUNDS = 5
+DEFAULT_SCALE = 'small'
+# compare: changes smaller than this are reported as noise
+DEFAULT_THRESHOLD = 0.1
+
+FORMATTERS = [ ('json', JsonFormatter), ('yaml', YamlFormatter), ('flict', FlictFormatter) ]
+
+
+def _git_commit():
+    try:
+        result = subprocess.run([ "git", "rev-parse", "HEAD" ], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.realpath(__file__)))
+    except OSError:
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip()
+
+
+def _time_rounds(fun, rounds, setup = None):
+    times = []
+    for i in range(rounds):
+        if setup != None:
+            setup()
+        start = time.perf_counter()
+        fun()
+        times.append(time.perf_counter() - start)
+    return {
+        'best': min(times),
+        'mean': sum(times) / len(times),
+        'rounds': rounds,
+    }
+
+
+def benchmarks(corpus):
+    """Return a list of (name, fun, setup) benchmarks on corpus. setup,
+    if not None, is called (untimed) before every round of fun"""
+    parser = ManifestParser()
+    docs = [ parser.load(spdx_file) for spdx_file in corpus.files ]
+    spdx_dirs = [ corpus.directory ]
+    result = []
+
+    for backend in available_json_backends():
+        backend_parser = ManifestParser(json_backend = backend)
+        result.append(("parse." + backend, lambda p=backend_parser: [ p.load(f) for f in corpus.files ], None))
+
+    for engine in SCHEMA_ENGINES:
+        validator = SPDXValidator(schema_engine = engine)
+        schema_validator = validator.schema_validator
+        result.append(("schema." + engine, lambda v=schema_validator: [ validate_instance(v, doc) for doc in docs ], None))
+
+    license_validator = SPDXValidator()
+    result.append(("license", lambda: [ license_validator.validate_packages(doc) for doc in docs ],
+                   parse_license_expression.cache_clear))
+
+    result.append(("checksum.compute", lambda: [ hash_from_file(f, "SHA1") for f in corpus.files ], None))
+    checksum_cache = ChecksumCache()
+    for spdx_file in corpus.files:
+        checksum_cache.hash_from_file(spdx_file, "SHA1")
+    result.append(("checksum.cached", lambda: [ checksum_cache.hash_from_file(f, "SHA1") for f in corpus.files ], None))
+
+    def recursive():
+        SPDXValidator("2.2", None, spdx_dirs).validate_file(corpus.top_file, True)
+    result.append(("recursive", recursive, None))
+
+    validator = SPDXValidator("2.2", None, spdx_dirs)
+    data = validator.validate_file(corpus.top_file, True)
+    result.append(("packages_deps", validator.packages_deps, None))
+
+    packages = validator.packages_deps()
+    for name, formatter_class in FORMATTERS:
+        formatter = formatter_class()
+        result.append(("format." + name, lambda f=formatter: f.format_packages(data, packages, None), None))
+
+    return result
+
+
+def run_benchmarks(corpus, rounds = DEFAULT_ROUNDS, only = None):
+    """Run the benchmarks, those with a name starting with any of the
+    prefixes in only if given, on corpus and return the results as a
+    dict"""
+    results = {}
+    for name, fun, setup in benchmarks(corpus):
+        if only and not any([ name == prefix or name.startswith(prefix + ".") for prefix in only ]):
+            continue
+        results[name] = _time_rounds(fun, rounds, setup)
+    corpus_info = corpus.spec.to_dict()
+    corpus_info['files'] = len(corpus.files)
+    corpus_info['bytes'] = sum([ os.path.getsize(f) for f in corpus.files ])
+    return {
+        'format': RESULTS_FORMAT,
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'version': spdx_validator_version,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'corpus': corpus_info,
+        'results': results,
+    }
+
+
+def compare(old, new, threshold = DEFAULT_THRESHOLD):
+    """Compare two results (as returned by run_benchmarks), return a list
+    of (name, old best, new best, ratio, verdict) for the benchmarks in
+    both"""
+    rows = []
+    for name in sorted(new['results']):
+        if name not in old['results']:
+            continue
+        old_best = old['results'][name]['best']
+        new_best = new['results'][name]['best']
+        ratio = new_best / old_best if old_best > 0 else float('inf')
+        verdict = ""
+        if ratio > 1 + threshold:
+            verdict = "slower"
+        elif ratio < 1 - threshold:
+            verdict = "faster"
+        rows.append((name, old_best, new_best, ratio, verdict))
+    return rows
+
+
+def print_results(results):
+    info = results['corpus']
+    print("corpus: " + ", ".join([ key + "=" + str(info[key]) for key in sorted(info) ]))
+    for name, result in results['results'].items():
+        print("%-20s best %9.2f ms  mean %9.2f ms" % (name, result['best'] * 1e3, result['mean'] * 1e3))
+
+
+def _run(argv):
+    parser = argparse.ArgumentParser(prog = "python3 -m benchmarks",
+                                     description = "Run the benchmarks on a synthetic corpus (\"python3 -m benchmarks compare OLD NEW\" compares two results)")
+    parser.add_argument('--scale', help='corpus scale, the defaults of the parameters below: ' + ", ".join(corpus_generator.SCALES),
+                        choices=list(corpus_generator.SCALES), default=DEFAULT_SCALE)
+    parser.add_argument('--packages', help='packages per document', type=int, default=None)
+    parser.add_argument('--documents', help='documents, the top document included', type=int, default=None)
+    parser.add_argument('--depth', help='levels of external documents', type=int, default=None)
+    parser.add_argument('--density', help='links per package to packages on the next level', type=float, default=None)
+    parser.add_argument('--license-mix', help='license expressions of the packages', choices=corpus_generator.LICENSE_MIXES, default=None)
+    parser.add_argument('--seed', help='random seed of the corpus', type=int, default=0)
+    parser.add_argument('--rounds', help='rounds per benchmark (default: ' + str(DEFAULT_ROUNDS) + ')', type=int, default=DEFAULT_ROUNDS)
+    parser.add_argument('--only', help='run only these benchmarks (e.g. "parse,schema.codegen")', type=str, default=None)
+    parser.add_argument('--corpus-dir', help='write (and keep) the corpus in this directory', type=str, default=None)
+    parser.add_argument('--output', '-o', help='write the results, as JSON, to this file', type=str, default=None)
+    args = parser.parse_args(argv)
+
+    params = dict(corpus_generator.SCALES[args.scale])
+    for key in params:
+        if getattr(args, key) != None:
+            params[key] = getattr(args, key)
+    spec = corpus_generator.CorpusSpec(seed = args.seed, **params)
+    only = None
+    if args.only:
+        only = args.only.split(",")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        corpus = corpus_generator.generate(args.corpus_dir or tmp_dir, spec)
+        results = run_benchmarks(corpus, args.rounds, only)
+
+    print_results(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+def _compare(argv):
+    parser = argparse.ArgumentParser(prog = "python3 -m benchmarks compare",
+                                     description = "Compare two benchmark results")
+    parser.add_argument('old', help='results of the old commit')
+    parser.add_argument('new', help='results of the new commit')
+    parser.add_argument('--threshold', help='relative change reported as faster/slower (default: ' + str(DEFAULT_THRESHOLD) + ')',
+                        type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('--fail-slower', help='exit with 1 if any benchmark is slower', action='store_true', default=False)
+    args = parser.parse_args(argv)
+
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    if old['corpus'] != new['corpus']:
+        print("Warning: the results are of different corpora", file=sys.stderr)
+    print("old: " + str(old.get('commit')) + "  new: " + str(new.get('commit')))
+    rows = compare(old, new, args.threshold)
+    for name, old_best, new_best, ratio, verdict in rows:
+        print("%-20s %9.2f ms -> %9.2f ms  %5.2fx  %s" % (name, old_best * 1e3, new_best * 1e3, ratio, verdict))
+    if args.fail_slower and any([ row[4] == "slower" for row in rows ]):
+        return 1
+    return 0
+
+
+def main(argv = None):
+    if argv == None:
+        argv = sys.argv[1:]
+    if argv[:1] == [ "compare" ]:
+        return _compare(argv[1:])
+    return _run(argv)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+#
+# Memory kept by a validator after a recursive run on a synthetic
+# corpus (see corpus.py), measured with tracemalloc:
+#  - dict: the state the validator kept before the compact package
+#    model: every visited document (all_manifests), the package dict of
+#    every checked package (checked_packages) and the dependencies as
+#    lists of "<document name>:<SPDXID>" strings
+#  - compact: the state kept now, see spdx_validator/package_graph.py,
+#    with all full documents in the document cache (the default)
+#  - bounded: as compact, but no full documents kept (--max-documents 0),
+#    only their summaries, see spdx_validator/documents.py
+#
+# All include the top document, kept as validator.data(). The
+# schema and the license expression cache are warmed up first, they
+# are the same in both.
+#
+# Run from the top directory:
+#   python3 -m benchmarks.bench_memory [small|medium|large]
+#
+
+import gc
+import sys
+import tempfile
+import tracemalloc
+
+from benchmarks import corpus as corpus_generator
+from spdx_validator.parser import ManifestParser
+from spdx_validator.validator import SPDXValidator
+
+DEFAULT_SCALE = 'small'
+
+
+def traced(fun):
+    """Return the memory allocated, and still in use, by fun() and its
+    result"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = fun()
+        gc.collect()
+        return tracemalloc.get_traced_memory()[0] - before, result
+    finally:
+        tracemalloc.stop()
+
+
+def dict_state(corpus, validator):
+    """The dict based state of a validator that validated the corpus
+    (as validator did)"""
+    parser = ManifestParser()
+    all_manifests = {}
+    packages = {}
+    for spdx_file in corpus.files:
+        data = parser.load(spdx_file)
+        all_manifests[data['documentNamespace']] = data
+        for package in data['packages']:
+            packages[data['name'] + ":" + package['SPDXID']] = package
+    checked_packages = { key: packages[key] for key in validator.packages.keys if validator.packages.is_checked(key) }
+    # new strings for every relationship, as split from the relationships
+    dependencies = { spdx_id: [ (key + " ")[:-1] for key in keys ] for spdx_id, keys in validator.dependencies.items() }
+    return all_manifests, checked_packages, dependencies
+
+
+def compact_state(corpus, max_documents = None):
+    validator = SPDXValidator("2.2", None, [ corpus.directory ], max_documents = max_documents)
+    validator.validate_file(corpus.top_file, True)
+    return validator.data(), validator.all_manifests, validator.packages, validator.documents
+
+
+def measure(corpus):
+    """Return a dict with the bytes kept, per state, and the number of
+    packages checked"""
+    # warm up (compile the schema, fill the license cache)
+    validator = SPDXValidator("2.2", None, [ corpus.directory ])
+    validator.validate_file(corpus.top_file, True)
+
+    dict_bytes, state = traced(lambda: dict_state(corpus, validator))
+    del state
+    compact_bytes, state = traced(lambda: compact_state(corpus))
+    del state
+    bounded_bytes, state = traced(lambda: compact_state(corpus, 0))
+    return {
+        'packages': len(validator.packages.checked),
+        'dict': dict_bytes,
+        'compact': compact_bytes,
+        'bounded': bounded_bytes,
+    }
+
+
+def main():
+    scale = DEFAULT_SCALE
+    if len(sys.argv) > 1:
+        scale = sys.argv[1]
+    spec = corpus_generator.CorpusSpec(**corpus_generator.SCALES[scale])
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        corpus = corpus_generator.generate(tmp_dir, spec)
+        result = measure(corpus)
+    print("corpus: " + scale + ", " + str(len(corpus.files)) + " documents, " + str(result['packages']) + " packages checked")
+    for name in [ 'dict', 'compact', 'bounded' ]:
+        print("%-10s %10.2f MB  %6.2fx" % (name, result[name] / 1e6, result['dict'] / result[name]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+#
+# Compare the parser backends on a large synthetic document, written
+# as JSON and YAML to a temporary directory:
+#  - JSON: json (text handle, the old behaviour), json (bytes),
+#    orjson (bytes), orjson (memory mapped), where installed
+#  - YAML: yaml.safe_load (the old behaviour), python and libyaml
+#    backends, where available
+#
+# Run from the top directory:
+#   python3 -m benchmarks.bench_parsers [packages]
+#
+
+import json
+import os
+import sys
+import tempfile
+import time
+import yaml
+
+from spdx_validator.parser import available_json_backends
+from spdx_validator.parser import available_yaml_backends
+from spdx_validator.parser import ManifestParser
+
+DEFAULT_PACKAGES = 5000
+ROUNDS = 3
+
+
+def document(packages):
+    doc = {
+        'spdxVersion': "SPDX-2.2",
+        'dataLicense': "CC0-1.0",
+        'SPDXID': "SPDXRef-DOCUMENT",
+        'name': "bench",
+        'documentNamespace': "http://spdx.org/spdxdocs/bench",
+        'creationInfo': { 'created': "2021-01-01T00:00:00Z", 'creators': [ "Tool: bench" ] },
+        'packages': [],
+        'relationships': [],
+    }
+    for i in range(packages):
+        spdx_id = "SPDXRef-Package-" + str(i)
+        doc['packages'].append({
+            'SPDXID': spdx_id,
+            'name': "package-" + str(i),
+            'versionInfo': "1.0." + str(i),
+            'downloadLocation': "https://example.com/package-" + str(i) + ".tar.gz",
+            'licenseConcluded': "MIT OR Apache-2.0",
+            'licenseDeclared': "MIT",
+            'copyrightText': "Copyright (c) " + str(i),
+            'checksums': [ { 'algorithm': "SHA256", 'checksumValue': "%064x" % i } ],
+        })
+        if i > 0:
+            doc['relationships'].append({
+                'spdxElementId': "SPDXRef-Package-" + str(i - 1),
+                'relationshipType': "DYNAMIC_LINK",
+                'relatedSpdxElement': spdx_id,
+            })
+    return doc
+
+
+def best_of(fun):
+    best = None
+    for i in range(ROUNDS):
+        start = time.perf_counter()
+        fun()
+        elapsed = time.perf_counter() - start
+        if best == None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def report(label, elapsed, size):
+    print("%-26s %.3f s  (%.1f MB/s)" % (label, elapsed, size / elapsed / 1e6))
+
+
+def main():
+    packages = DEFAULT_PACKAGES
+    if len(sys.argv) > 1:
+        packages = int(sys.argv[1])
+
+    doc = document(packages)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        json_file = os.path.join(tmp_dir, "bench.spdx.json")
+        yaml_file = os.path.join(tmp_dir, "bench.spdx.yaml")
+        with open(json_file, "w") as f:
+            json.dump(doc, f)
+        with open(yaml_file, "w") as f:
+            yaml.safe_dump(doc, f)
+        json_size = os.path.getsize(json_file)
+        yaml_size = os.path.getsize(yaml_file)
+        print("packages: " + str(packages) + ", JSON: " + str(json_size) + " bytes, YAML: " + str(yaml_size) + " bytes")
+
+        def json_text():
+            with open(json_file) as f:
+                json.load(f)
+        report("json.load (text)", best_of(json_text), json_size)
+        for backend in available_json_backends():
+            parser = ManifestParser(json_backend = backend)
+            report(backend + " (bytes)", best_of(lambda: parser.load(json_file)), json_size)
+            if backend == "orjson":
+                parser = ManifestParser(json_backend = backend, use_mmap = True)
+                report(backend + " (mmap)", best_of(lambda: parser.load(json_file)), json_size)
+
+        def yaml_safe_load():
+            with open(yaml_file) as f:
+                yaml.safe_load(f)
+        report("yaml.safe_load", best_of(yaml_safe_load), yaml_size)
+        for backend in available_yaml_backends():
+            parser = ManifestParser(yaml_backend = backend)
+            report(backend, best_of(lambda: parser.load(yaml_file)), yaml_size)
+
+
+if __name__ == '__main__':
+    main()
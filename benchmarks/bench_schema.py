@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+#
+# Compare per document schema validation cost:
+#  - jsonschema.validate(), checking the schema and building a new
+#    validator for every document (the old behaviour)
+#  - a compiled validator from the SchemaRegistry, reused
+#
+# Run from the top directory:
+#   python3 -m benchmarks.bench_schema [count]
+#
+
+import copy
+import json
+import jsonschema
+import os
+import sys
+import time
+
+from spdx_validator.schema import SchemaRegistry
+from spdx_validator.schema import validate_instance
+from spdx_validator.validator import SCRIPT_DIR
+
+DEFAULT_COUNT = 1000
+EXAMPLE_FILES = [ "freetype-2.9.spdx.json", "libpng-1.6.35.spdx.json", "zlib-1.2.11.spdx.json" ]
+
+
+def corpus(count):
+    docs = []
+    examples = []
+    for name in EXAMPLE_FILES:
+        with open(os.path.join("example-data", name)) as f:
+            examples.append(json.load(f))
+    for i in range(count):
+        doc = copy.deepcopy(examples[i % len(examples)])
+        doc['documentNamespace'] = doc['documentNamespace'] + "-" + str(i)
+        docs.append(doc)
+    return docs
+
+
+def bench_uncompiled(schema, docs):
+    start = time.perf_counter()
+    for doc in docs:
+        jsonschema.validate(instance=doc, schema=schema)
+    return time.perf_counter() - start
+
+
+def bench_registry(schema_file, docs):
+    SchemaRegistry.clear()
+    start = time.perf_counter()
+    for doc in docs:
+        validator = SchemaRegistry.validator("2.2", schema_file)
+        validate_instance(validator, doc)
+    return time.perf_counter() - start
+
+
+def main():
+    count = DEFAULT_COUNT
+    if len(sys.argv) > 1:
+        count = int(sys.argv[1])
+
+    schema_file = os.path.join(SCRIPT_DIR, "var/spdx-schema-2.2.json")
+    with open(schema_file) as f:
+        schema = json.load(f)
+    docs = corpus(count)
+
+    uncompiled = bench_uncompiled(schema, docs)
+    registry = bench_registry(schema_file, docs)
+
+    print("documents:          " + str(count))
+    print("jsonschema.validate " + "%.3f s  (%.1f us/doc)" % (uncompiled, uncompiled * 1e6 / count))
+    print("SchemaRegistry      " + "%.3f s  (%.1f us/doc)" % (registry, registry * 1e6 / count))
+    print("saving per document " + "%.1f us" % ((uncompiled - registry) * 1e6 / count))
+
+
+if __name__ == '__main__':
+    main()
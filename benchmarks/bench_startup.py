@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+#
+# Cold start cost of the command line tool:
+#  - cumulative import time of spdx_validator.__main__, as reported by
+#    python -X importtime
+#  - wall time of a few short invocations, compared to starting an
+#    empty interpreter
+#  - heavy modules that must not be imported at start up
+#
+# Target: importing spdx_validator.__main__ (cumulative, best of
+# ROUNDS) takes at most IMPORT_TARGET_RATIO times the import of the
+# standard library modules it needs (STDLIB_MODULES), and imports none
+# of LAZY_MODULES. The target is relative, since absolute import times
+# vary a lot between machines. Before the lazy imports the ratio was
+# about 6, jsonschema alone took longer than the standard library
+# modules.
+#
+# Run from the top directory:
+#   python3 -m benchmarks.bench_startup [rounds]
+#
+
+import subprocess
+import sys
+import time
+
+IMPORT_TARGET_RATIO = 2.5
+ROUNDS = 10
+
+STDLIB_MODULES = [ "argparse", "logging", "json", "hashlib" ]
+
+LAZY_MODULES = [ "jsonschema", "yaml", "spdx_license_list", "orjson", "concurrent.futures", "tempfile" ]
+
+COMMANDS = [
+    ("python -c pass", [ "-c", "pass" ]),
+    ("--list-licenses", [ "-m", "spdx_validator", "--list-licenses" ]),
+    ("validate (JSON)", [ "-m", "spdx_validator", "example-data/zlib-1.2.11.spdx.json" ]),
+    ("validate (YAML)", [ "-m", "spdx_validator", "example-data/freetype.spdx.yml" ]),
+]
+
+
+def import_time_ms(modules):
+    """Cumulative import time of the modules, in ms"""
+    result = subprocess.run([ sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules) ],
+                            capture_output=True, text=True, check=True)
+    total = 0
+    for line in result.stderr.splitlines():
+        fields = line.split("|")
+        # only the modules themselves, not (indented) modules they import
+        if len(fields) == 3 and fields[2].strip() in modules and fields[2] == " " + fields[2].strip():
+            total += int(fields[1])
+    return total / 1000
+
+
+def wall_time_ms(args):
+    start = time.perf_counter()
+    subprocess.run([ sys.executable ] + args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return (time.perf_counter() - start) * 1000
+
+
+def imported_lazy_modules():
+    code = "import sys, spdx_validator.__main__; print(' '.join([ m for m in " + repr(LAZY_MODULES) + " if m in sys.modules ]))"
+    result = subprocess.run([ sys.executable, "-c", code ], capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+
+def main():
+    rounds = ROUNDS
+    if len(sys.argv) > 1:
+        rounds = int(sys.argv[1])
+
+    stdlib_ms = min([ import_time_ms(STDLIB_MODULES) for i in range(rounds) ])
+    import_ms = min([ import_time_ms([ "spdx_validator.__main__" ]) for i in range(rounds) ])
+    ratio = import_ms / stdlib_ms
+    print("%-31s %7.1f ms" % ("import " + ", ".join(STDLIB_MODULES), stdlib_ms))
+    print("%-31s %7.1f ms  (%.1f times, target %.1f)" % ("import spdx_validator.__main__", import_ms, ratio, IMPORT_TARGET_RATIO))
+    for label, args in COMMANDS:
+        elapsed = min([ wall_time_ms(args) for i in range(rounds) ])
+        print("%-31s %7.1f ms" % (label, elapsed))
+
+    lazy = imported_lazy_modules()
+    print("heavy modules imported at start: " + (", ".join(lazy) or "none"))
+
+    if ratio > IMPORT_TARGET_RATIO or lazy != []:
+        print("FAILED")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+#
+# Generator of synthetic SPDX 2.2 corpora: a top document and external
+# documents it (transitively) links to.
+#
+# The documents are arranged in levels, the top document alone on level
+# 0 and the external documents spread over levels 1 to depth. Packages
+# on one level link ("DYNAMIC_LINK", through "externalDocumentRefs",
+# with the SHA1 checksum of the linked document) to packages on the
+# next level, on average density links per package. The license
+# expressions of the packages are drawn from a license mix.
+#
+# The same parameters (and seed) give the same corpus.
+#
+# Write a corpus from the command line:
+#   python3 -m benchmarks.corpus <directory> [packages [documents [depth [density [license mix]]]]]
+#
+
+import hashlib
+import json
+import os
+import random
+import sys
+
+LICENSE_MIX_SIMPLE = "simple"
+LICENSE_MIX_MIXED = "mixed"
+LICENSE_MIX_COMPLEX = "complex"
+LICENSE_MIXES = [ LICENSE_MIX_SIMPLE, LICENSE_MIX_MIXED, LICENSE_MIX_COMPLEX ]
+
+LICENSES = [ "MIT", "Apache-2.0", "BSD-3-Clause", "BSD-2-Clause", "GPL-2.0-only", "GPL-2.0-or-later",
+             "GPL-3.0-only", "GPL-3.0-or-later", "LGPL-2.1-only", "LGPL-2.1-or-later", "MPL-2.0",
+             "ISC", "Zlib", "Libpng", "FTL", "EPL-2.0", "CDDL-1.0", "Unlicense", "X11", "curl" ]
+EXCEPTIONS = [ "Classpath-exception-2.0", "GCC-exception-3.1", "LLVM-exception", "Autoconf-exception-3.0" ]
+LICENSE_REFS = [ "LicenseRef-Vendor-1", "LicenseRef-Vendor-2", "LicenseRef-Proprietary" ]
+
+# (simple, OR/AND, WITH, LicenseRef, nested) weights
+LICENSE_MIX_WEIGHTS = {
+    LICENSE_MIX_SIMPLE: [ 1, 0, 0, 0, 0 ],
+    LICENSE_MIX_MIXED: [ 50, 30, 10, 10, 0 ],
+    LICENSE_MIX_COMPLEX: [ 10, 30, 15, 15, 30 ],
+}
+
+SCALES = {
+    'small': { 'packages': 20, 'documents': 10, 'depth': 3, 'density': 1.0, 'license_mix': LICENSE_MIX_MIXED },
+    'medium': { 'packages': 100, 'documents': 50, 'depth': 5, 'density': 1.5, 'license_mix': LICENSE_MIX_MIXED },
+    'large': { 'packages': 500, 'documents': 200, 'depth': 8, 'density': 2.0, 'license_mix': LICENSE_MIX_COMPLEX },
+}
+
+
+class CorpusSpec:
+    """Parameters of a corpus:
+
+      packages     packages per document
+      documents    documents, the top document included
+      depth        levels of external documents below the top document
+      density      average number of links from a package to packages
+                   on the next level
+      license_mix  one of LICENSE_MIXES
+      seed         random seed"""
+
+    def __init__(self, packages = 20, documents = 10, depth = 3, density = 1.0, license_mix = LICENSE_MIX_MIXED, seed = 0):
+        if license_mix not in LICENSE_MIXES:
+            raise ValueError("Unsupported license mix: " + str(license_mix))
+        if documents < 1 or depth < 0 or packages < 1 or density < 0:
+            raise ValueError("Invalid corpus parameters")
+        self.packages = packages
+        self.documents = documents
+        self.depth = min(depth, documents - 1)
+        self.density = density
+        self.license_mix = license_mix
+        self.seed = seed
+
+    def to_dict(self):
+        return {
+            'packages': self.packages,
+            'documents': self.documents,
+            'depth': self.depth,
+            'density': self.density,
+            'license_mix': self.license_mix,
+            'seed': self.seed,
+        }
+
+
+class Corpus:
+    """A written corpus: the top file and all files, top file first"""
+
+    def __init__(self, directory, top_file, files, spec):
+        self.directory = directory
+        self.top_file = top_file
+        self.files = files
+        self.spec = spec
+
+
+def _license_expression(rnd, mix):
+    kind = rnd.choices(range(5), LICENSE_MIX_WEIGHTS[mix])[0]
+    if kind == 0:
+        return rnd.choice(LICENSES)
+    if kind == 1:
+        operator = rnd.choice([ " OR ", " AND " ])
+        return operator.join(rnd.sample(LICENSES, rnd.randint(2, 3)))
+    if kind == 2:
+        return rnd.choice(LICENSES) + " WITH " + rnd.choice(EXCEPTIONS)
+    if kind == 3:
+        return rnd.choice(LICENSE_REFS) + " OR " + rnd.choice(LICENSES)
+    return "(" + " OR ".join(rnd.sample(LICENSES, 2)) + ") AND (" + \
+        rnd.choice(LICENSES) + " WITH " + rnd.choice(EXCEPTIONS) + " OR " + rnd.choice(LICENSE_REFS) + ")"
+
+
+def _levels(spec):
+    """Document indexes per level, the top document (0) on level 0"""
+    levels = [ [ 0 ] ]
+    externals = list(range(1, spec.documents))
+    if spec.depth == 0:
+        return levels
+    per_level = len(externals) / spec.depth
+    for level in range(spec.depth):
+        start = int(round(level * per_level))
+        end = int(round((level + 1) * per_level))
+        levels.append(externals[start:end])
+    return [ level for level in levels if level != [] ]
+
+
+def _doc_name(index):
+    if index == 0:
+        return "top-1.0"
+    return "component-" + str(index) + "-1.0"
+
+
+def _package_id(doc_index, pkg_index):
+    return "SPDXRef-Package-" + str(doc_index) + "-" + str(pkg_index)
+
+
+def _document(rnd, spec, doc_index, links):
+    """The document, links maps package indexes to the (document index,
+    package index) they link to"""
+    name = _doc_name(doc_index)
+    doc = {
+        'SPDXID': "SPDXRef-DOCUMENT",
+        'spdxVersion': "SPDX-2.2",
+        'creationInfo': { 'created': "2021-09-18T15:38:51Z", 'creators': [ "Tool: spdx-validator-benchmarks" ] },
+        'name': name,
+        'dataLicense': "CC0-1.0",
+        'documentNamespace': "https://example.com/spdx/" + name + "-" + str(spec.seed),
+        'documentDescribes': [ _package_id(doc_index, 0) ],
+        'packages': [],
+        'relationships': [],
+    }
+    uses_refs = False
+    for pkg_index in range(spec.packages):
+        license_concluded = _license_expression(rnd, spec.license_mix)
+        uses_refs = uses_refs or "LicenseRef-" in license_concluded
+        doc['packages'].append({
+            'SPDXID': _package_id(doc_index, pkg_index),
+            'name': "package-" + str(doc_index) + "-" + str(pkg_index),
+            'versionInfo': str(rnd.randint(0, 9)) + "." + str(rnd.randint(0, 20)) + "." + str(rnd.randint(0, 99)),
+            'downloadLocation': "https://example.com/downloads/package-" + str(doc_index) + "-" + str(pkg_index) + ".tar.gz",
+            'copyrightText': "Copyright " + str(rnd.randint(1990, 2021)) + " Example Authors",
+            'filesAnalyzed': False,
+            'licenseConcluded': license_concluded,
+            'licenseDeclared': license_concluded,
+            'checksums': [ { 'algorithm': "SHA1", 'checksumValue': hashlib.sha1(str((doc_index, pkg_index)).encode()).hexdigest() } ],
+        })
+        doc['relationships'].append({
+            'spdxElementId': "SPDXRef-DOCUMENT",
+            'relatedSpdxElement': _package_id(doc_index, pkg_index),
+            'relationshipType': "DESCRIBES" if pkg_index == 0 else "CONTAINS",
+        })
+    if uses_refs:
+        doc['hasExtractedLicensingInfos'] = [ { 'licenseId': ref, 'extractedText': "Text of " + ref } for ref in LICENSE_REFS ]
+
+    linked_docs = sorted(set([ target[0] for targets in links.values() for target in targets ]))
+    if linked_docs != []:
+        doc['externalDocumentRefs'] = []
+        for linked in linked_docs:
+            doc['externalDocumentRefs'].append({
+                'externalDocumentId': "DocumentRef-" + _doc_name(linked),
+                # filled in once the linked document is written
+                'checksum': { 'algorithm': "SHA1", 'checksumValue': "" },
+                'spdxDocument': _doc_name(linked) + ".spdx.json",
+            })
+    for pkg_index in sorted(links):
+        for linked_doc, linked_pkg in links[pkg_index]:
+            doc['relationships'].append({
+                'spdxElementId': "DocumentRef-" + _doc_name(linked_doc) + ":" + _package_id(linked_doc, linked_pkg),
+                'relatedSpdxElement': _package_id(doc_index, pkg_index),
+                'relationshipType': "DYNAMIC_LINK",
+            })
+    return doc
+
+
+def generate(directory, spec = None):
+    """Write the corpus described by spec (a CorpusSpec) to directory,
+    return a Corpus"""
+    if spec == None:
+        spec = CorpusSpec()
+    rnd = random.Random(spec.seed)
+    levels = _levels(spec)
+
+    links = {}
+    for level, doc_indexes in enumerate(levels[:-1]):
+        next_level = levels[level + 1]
+        for doc_index in doc_indexes:
+            links[doc_index] = {}
+            for pkg_index in range(spec.packages):
+                count = int(spec.density)
+                if rnd.random() < spec.density - count:
+                    count += 1
+                targets = set()
+                for i in range(count):
+                    targets.add((rnd.choice(next_level), rnd.randrange(spec.packages)))
+                if targets:
+                    links[doc_index][pkg_index] = sorted(targets)
+        # every document on the next level is linked to, at least once
+        for linked_doc in next_level:
+            if not any([ linked_doc == target[0] for doc_links in links.values() for targets in doc_links.values() for target in targets ]):
+                doc_index = rnd.choice(doc_indexes)
+                links[doc_index].setdefault(0, []).append((linked_doc, 0))
+
+    docs = {}
+    for doc_indexes in levels:
+        for doc_index in doc_indexes:
+            docs[doc_index] = _document(rnd, spec, doc_index, links.get(doc_index, {}))
+
+    os.makedirs(directory, exist_ok=True)
+    checksums = {}
+    files = {}
+    # linked documents first, their checksums are in the linking documents
+    for doc_indexes in reversed(levels):
+        for doc_index in doc_indexes:
+            doc = docs[doc_index]
+            for doc_ref in doc.get('externalDocumentRefs', []):
+                doc_ref['checksum']['checksumValue'] = checksums[doc_ref['spdxDocument']]
+            file_name = _doc_name(doc_index) + ".spdx.json"
+            content = json.dumps(doc, indent=2).encode()
+            path = os.path.join(directory, file_name)
+            with open(path, "wb") as f:
+                f.write(content)
+            checksums[file_name] = hashlib.sha1(content).hexdigest()
+            files[doc_index] = path
+
+    ordered = [ files[doc_index] for doc_indexes in levels for doc_index in doc_indexes ]
+    return Corpus(directory, files[0], ordered, spec)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python3 -m benchmarks.corpus <directory> [packages [documents [depth [density [license mix]]]]]", file=sys.stderr)
+        sys.exit(1)
+    args = sys.argv[2:]
+    types = [ int, int, int, float, str ]
+    spec = CorpusSpec(*[ types[i](arg) for i, arg in enumerate(args) ])
+    corpus = generate(sys.argv[1], spec)
+    print(str(len(corpus.files)) + " documents, top document: " + corpus.top_file)
+
+
+if __name__ == '__main__':
+    main()
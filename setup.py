@@ -30,6 +30,7 @@ setuptools.setup(
     entry_points = {
         "console_scripts": [
             "spdx-validator = spdx_validator.__main__:main",
+            "spdx-validator-client = spdx_validator.client:main",
         ],
     },
     package_data = {
@@ -38,6 +39,7 @@ setuptools.setup(
     install_requires = requirements,
     extras_require = {
         'dev': requirements_dev,
+        'fast': [ 'orjson' ],
     },
     classifiers = [
         "Development Status :: 4 - Beta",
@@ -7,14 +7,35 @@
 
 from argparse import RawTextHelpFormatter
 import argparse
+import json
 import sys
 
 from spdx_validator.format.factory import FormatFactory
 from spdx_validator.format.factory import supported_formats
 
+from spdx_validator.batch import BatchValidator
+from spdx_validator.batch import expand_paths
+from spdx_validator.batch import is_batch
+from spdx_validator.cache import DiskCache
+from spdx_validator.cache import default_cache_dir
+from spdx_validator.checksum import ChecksumCache
+from spdx_validator.errors import ERROR_DOCUMENT
+from spdx_validator.errors import REPORT_FORMAT
+from spdx_validator.exception import SPDXValidationException
+from spdx_validator.licenses import SPDX_LICENSES
+from spdx_validator.result_cache import DEFAULT_RESULT_CACHE_SIZE
+from spdx_validator.result_cache import RESULT_CACHE_SUB_DIR
+from spdx_validator.result_cache import ResultCache
 from spdx_validator.validator import SPDXValidator
 from spdx_validator.validator import SPDX_VERSION_2_2
 from spdx_validator.validator import SPDX_VERSIONS
+from spdx_validator.parser import BACKEND_AUTO
+from spdx_validator.parser import JSON_BACKENDS
+from spdx_validator.parser import YAML_BACKENDS
+from spdx_validator.schema import SCHEMA_ENGINES
+from spdx_validator.schema import SCHEMA_ENGINE_JSONSCHEMA
+from spdx_validator.stats import STATS_FORMAT_TEXT
+from spdx_validator.stats import STATS_FORMATS
 
 
 PROGRAM_NAME = "spdx-validator"
@@ -30,7 +51,7 @@ PROGRAM_ATTRIBUTION += "    https://github.com/spdx/spdx-spec/blob/development/v
 
 PROGRAM_SEE_ALSO = ""
 
-def parse():
+def parse(argv = None):
 
     description = "NAME\n  " + PROGRAM_NAME + "\n\n"
     description = description + "DESCRIPTION\n  " + PROGRAM_DESCRIPTION + "\n\n"
@@ -45,6 +66,7 @@ def parse():
     epilog = epilog + "SEE ALSO\n  " + PROGRAM_SEE_ALSO + "\n\n"
 
     parser = argparse.ArgumentParser(
+        prog=PROGRAM_NAME,
         description=description,
         epilog=epilog,
         formatter_class=RawTextHelpFormatter,
@@ -61,10 +83,40 @@ def parse():
                         help="Do not control checksum of spdx documents.",
                         default=False)
 
-    parser.add_argument('file',
-                        help='file to validate',
-                        nargs='?',
+    parser.add_argument('--checksum-cache', '-cc',
+                        action='store_true',
+                        dest='checksum_cache',
+                        help="Store checksums of spdx documents on disk and reuse them in later runs.",
+                        default=False)
+
+    parser.add_argument('--checksum-cache-dir',
+                        dest='checksum_cache_dir',
+                        help="Directory for the checksum cache. Default: " + default_cache_dir("checksums"),
+                        type=str,
+                        default=None)
+
+    parser.add_argument('--no-cache',
+                        action='store_true',
+                        dest='no_cache',
+                        help="Do not use, or store, validation results of unchanged documents.",
+                        default=False)
+
+    parser.add_argument('--cache-dir',
+                        dest='cache_dir',
+                        help="Directory for the validation result cache. Default: " + default_cache_dir(RESULT_CACHE_SUB_DIR),
+                        type=str,
                         default=None)
+
+    parser.add_argument('--cache-size',
+                        dest='cache_size',
+                        help="Maximum size, in MB, of the validation result cache. Default: " + str(DEFAULT_RESULT_CACHE_SIZE // (1024 * 1024)),
+                        type=int,
+                        default=DEFAULT_RESULT_CACHE_SIZE // (1024 * 1024))
+
+    parser.add_argument('file',
+                        help='file(s) to validate. Directories (searched recursively) and glob patterns validate all SPDX files in them',
+                        nargs='*',
+                        default=[])
     
     parser.add_argument('--spdx-version',
                         help='SPDX version to validate against. Supported versions: ' + str(SPDX_VERSIONS),
@@ -86,6 +138,74 @@ def parse():
                         type=str,
                         default=None)
     
+    parser.add_argument('--schema-engine',
+                        help='Schema validation engine. Supported engines: ' + str(SCHEMA_ENGINES),
+                        type=str,
+                        choices=SCHEMA_ENGINES,
+                        default=SCHEMA_ENGINE_JSONSCHEMA)
+    
+    parser.add_argument('--json-backend',
+                        help='JSON parser backend, "auto" picks the fastest installed. Supported backends: ' + str(JSON_BACKENDS),
+                        type=str,
+                        choices=JSON_BACKENDS,
+                        default=BACKEND_AUTO)
+    
+    parser.add_argument('--yaml-backend',
+                        help='YAML parser backend, "auto" picks libyaml if available. Supported backends: ' + str(YAML_BACKENDS),
+                        type=str,
+                        choices=YAML_BACKENDS,
+                        default=BACKEND_AUTO)
+    
+    parser.add_argument('--mmap',
+                        dest='use_mmap',
+                        help='Parse JSON files from a memory mapped buffer (orjson backend only)',
+                        action='store_true',
+                        default=False)
+    
+    parser.add_argument('--stream',
+                        dest='streaming',
+                        help='Validate JSON files without loading them, item by item, keeping only a summary of each package',
+                        action='store_true',
+                        default=False)
+    
+    parser.add_argument('--all-errors', '-ae',
+                        dest='collect_errors',
+                        help='Report all errors (schema, license, relationship, checksum), not only the first',
+                        action='store_true',
+                        default=False)
+    
+    parser.add_argument('--max-errors',
+                        dest='max_errors',
+                        help='With --all-errors, stop after this many errors (per file)',
+                        type=int,
+                        default=None)
+    
+    parser.add_argument('--error-report',
+                        dest='error_report',
+                        help='Write the errors, with JSON pointers to where they are, as JSON to this file ("-" for stdout). Implies --all-errors',
+                        type=str,
+                        default=None)
+    
+    parser.add_argument('--max-documents',
+                        dest='max_documents',
+                        help='Keep at most this many full documents in memory when checking recursively, the others only as a summary (default: all)',
+                        type=int,
+                        default=None)
+    
+    parser.add_argument('--stats',
+                        help='Print, to stderr, time spent per phase (parse, schema, license, checksum, resolve) and counters. Formats: ' + ", ".join(STATS_FORMATS) + ' (default: ' + STATS_FORMAT_TEXT + ')',
+                        type=str,
+                        nargs='?',
+                        const=STATS_FORMAT_TEXT,
+                        choices=STATS_FORMATS,
+                        default=None)
+    
+    parser.add_argument('--trace',
+                        dest='trace_file',
+                        help='Write spans (document, parse, schema, license, checksum, ...) and events, as JSON lines, to this file',
+                        type=str,
+                        default=None)
+    
     parser.add_argument('--package-name', '-pn',
                         help='Only manage the named package in the SBoM',
                         type=str,
@@ -96,6 +216,16 @@ def parse():
                         action='store_true',
                         default=False)
     
+    parser.add_argument('--jobs', '-j',
+                        help='Number of processes validating files in parallel (linked documents, when checking recursively, or files in batch mode)',
+                        type=int,
+                        default=1)
+    
+    parser.add_argument('--concurrency',
+                        help='Read (and hash) linked documents, when checking recursively, concurrently with asyncio, at most this many at a time. Useful on network file systems',
+                        type=int,
+                        default=None)
+    
     parser.add_argument('--spdx-dir', '-sd',
                         dest='spdx_dirs',
                         help='Directories where to look for spdx files.',
@@ -108,6 +238,21 @@ def parse():
                         action='store_true',
                         default=False)
         
+    parser.add_argument('--stream-packages',
+                        help='With --print-packages, print the packages one at a time, as their dependencies are found: a line per package (NDJSON) in the JSON and flict formats, a document per package in the YAML format.',
+                        action='store_true',
+                        default=False)
+
+    parser.add_argument('--dag',
+                        help='With --print-packages, print every package once, with an id, and the dependencies as edges between the ids, instead of all the dependencies of each package. With --package-name the (transitive) dependencies of that package are added.',
+                        action='store_true',
+                        default=False)
+
+    parser.add_argument('--output', '-o',
+                        help='File to print the packages to, instead of stdout.',
+                        type=str,
+                        default=None)
+
     parser.add_argument('--allowed-license', '-al',
                         dest='allowed_licenses',
                         type=str,
@@ -120,27 +265,172 @@ def parse():
                         help="list licenses",
                         default=False)
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    if args.error_report != None:
+        args.collect_errors = True
+    if args.dag and args.stream_packages:
+        parser.error("--dag can not be used with --stream-packages")
 
     return args
 
-def main():
+def validate_batch(validator, formatter, args, out):
+    files = expand_paths(args.file)
+    if files == []:
+        # most likely a mistyped path or pattern, do not pass
+        print("No SPDX files found in: " + " ".join(args.file), file=sys.stderr)
+        return 1
+    summary_file = sys.stdout
+    if args.print_packages:
+        summary_file = sys.stderr
 
-    args = parse()    
-    file_name = args.file
+    batch = BatchValidator(validator,
+                           recursive = args.recursive,
+                           discard_checksum = args.discard_checksum,
+                           jobs = args.jobs,
+                           print_packages = args.print_packages,
+                           dag = args.dag,
+                           package_name = args.package_name)
+    failed = 0
+    errors = []
+    for result in batch.validate(files):
+        if result.ok():
+            print("OK      " + result.file_name, file=summary_file)
+            if args.print_packages:
+                if args.dag:
+                    print(formatter.format_dag(result.dag), file=out)
+                else:
+                    print_packages(formatter, result.data, result.packages, args, out)
+        else:
+            failed += 1
+            print("FAILED  " + result.file_name + ": " + result.error, file=summary_file)
+            if result.errors != None:
+                errors += result.errors
+            elif args.collect_errors:
+                errors.append({ 'file': result.file_name, 'type': ERROR_DOCUMENT, 'pointer': "", 'message': result.error })
+
+    print(str(len(files)) + " files validated, " + str(failed) + " failed", file=summary_file)
+    if args.error_report != None:
+        write_error_report(args.error_report, { 'format': REPORT_FORMAT, 'valid': errors == [], 'error_count': len(errors),
+                                                'truncated': False, 'errors': errors })
+    if failed > 0:
+        return 1
+    return 0
+
+# the options used when creating the validator, validators created
+# with the same values are interchangeable
+VALIDATOR_OPTIONS = [ 'spdx_version', 'schema_file', 'spdx_dirs', 'allowed_licenses', 'verbose',
+                      'schema_engine', 'checksum_cache', 'checksum_cache_dir', 'jobs',
+                      'json_backend', 'yaml_backend', 'use_mmap', 'streaming',
+                      'no_cache', 'cache_dir', 'cache_size', 'collect_errors', 'max_errors', 'max_documents' ]
+
+def create_validator(args):
+    checksum_cache = None
+    if args.checksum_cache:
+        cache_dir = args.checksum_cache_dir
+        if cache_dir == None:
+            cache_dir = default_cache_dir("checksums")
+        checksum_cache = ChecksumCache(DiskCache(cache_dir))
+
+    result_cache = None
+    if not args.no_cache:
+        cache_dir = args.cache_dir
+        if cache_dir == None:
+            cache_dir = default_cache_dir(RESULT_CACHE_SUB_DIR)
+        result_cache = ResultCache(DiskCache(cache_dir, args.cache_size * 1024 * 1024))
 
     #
     # Create validator object
     # 
-    validator = SPDXValidator(spdx_version = args.spdx_version,
-                              schema_file = args.schema_file,
-                              spdx_dirs = args.spdx_dirs,
-                              allowed_licenses = args.allowed_licenses,
-                              debug = args.verbose)
+    return SPDXValidator(spdx_version = args.spdx_version,
+                         schema_file = args.schema_file,
+                         spdx_dirs = args.spdx_dirs,
+                         allowed_licenses = args.allowed_licenses,
+                         debug = args.verbose,
+                         schema_engine = args.schema_engine,
+                         checksum_cache = checksum_cache,
+                         jobs = args.jobs,
+                         json_backend = args.json_backend,
+                         yaml_backend = args.yaml_backend,
+                         use_mmap = args.use_mmap,
+                         streaming = args.streaming,
+                         result_cache = result_cache,
+                         collect_errors = args.collect_errors,
+                         max_errors = args.max_errors,
+                         max_documents = args.max_documents)
+
+class OutputFile:
+    """The file (--output) packages are printed to, opened (and
+    truncated) when first written to, so that nothing is written by
+    runs with nothing to print, e.g. failed ones"""
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.f = None
+
+    def write(self, text):
+        if self.f == None:
+            try:
+                self.f = open(self.file_name, "w")
+            except OSError as e:
+                raise SPDXValidationException("Could not open output file: " + str(self.file_name) + ": " + str(e.strerror))
+        self.f.write(text)
+
+    def flush(self):
+        if self.f != None:
+            self.f.flush()
+
+    def close(self):
+        if self.f != None:
+            self.f.close()
+            self.f = None
+
+def print_packages(formatter, data, packages, args, out):
+    """Print packages (as in packages_deps()) to out, streamed if asked
+    for"""
+    if args.stream_packages:
+        formatter.write_packages(packages, out, args.package_name)
+    else:
+        print(formatter.format_packages(data, packages, args.package_name), file=out)
+
+def write_error_report(file_name, report):
+    if file_name == "-":
+        print(json.dumps(report, indent=2))
+        return
+    with open(file_name, "w") as f:
+        json.dump(report, f, indent=2)
+
+def list_licenses():
+    for lic in SPDX_LICENSES:
+        print(lic)
+
+def run(args, validator):
+    """Validate as asked for in args, exits with the exit code"""
+    exporter = None
+    if args.trace_file != None:
+        from spdx_validator.tracing import FileExporter
+        exporter = FileExporter(args.trace_file)
+        validator.tracer.add_subscriber(exporter)
+    out = sys.stdout
+    if args.output != None:
+        out = OutputFile(args.output)
+    try:
+        _run(args, validator, out)
+    finally:
+        if out != sys.stdout:
+            out.close()
+        if exporter != None:
+            validator.tracer.remove_subscriber(exporter)
+            exporter.close()
+        if args.stats != None:
+            print(validator.stats.format(args.stats), file=sys.stderr)
+
+def _run(args, validator, out):
+    file_name = None
+    if len(args.file) > 0:
+        file_name = args.file[0]
 
     if args.list_licenses:
-        for lic in validator.licenses():
-            print(lic)
+        list_licenses()
         sys.exit(0)
     
 
@@ -149,12 +439,35 @@ def main():
     # ... kidding, let's validate
     # 
     formatter = FormatFactory.formatter(args.format)
+    if is_batch(args.file):
+        try:
+            sys.exit(validate_batch(validator, formatter, args, out))
+        except SPDXValidationException as e:
+            # the output file could not be written
+            print(e, file=sys.stderr)
+            sys.exit(1)
+
     try:
-        data = validator.validate_file(file_name, recursive = args.recursive, discard_checksum = args.discard_checksum)
+        if args.concurrency != None:
+            import asyncio
+            data = asyncio.run(validator.validate_file_async(file_name, recursive = args.recursive, discard_checksum = args.discard_checksum,
+                                                             concurrency = args.concurrency))
+        else:
+            data = validator.validate_file(file_name, recursive = args.recursive, discard_checksum = args.discard_checksum)
+        if args.error_report != None:
+            write_error_report(args.error_report, validator.errors.report())
+        if len(validator.errors) > 0:
+            message = str(len(validator.errors)) + " errors"
+            if validator.errors.truncated:
+                message += " (stopped at --max-errors)"
+            raise SPDXValidationException("\n".join([ message ] + [ str(error) for error in validator.errors.errors ]))
         if args.print_packages:
-            deps = validator.packages_deps()
-            formatted = formatter.format_packages(data, deps, args.package_name)
-            print(formatted)
+            if args.dag:
+                print(formatter.format_dag(validator.packages_dag(args.package_name)), file=out)
+            elif args.stream_packages:
+                print_packages(formatter, data, validator.iter_packages_deps(), args, out)
+            else:
+                print_packages(formatter, data, validator.packages_deps(), args, out)
     except Exception as e:
         if args.verbose:
             import traceback
@@ -164,17 +477,30 @@ def main():
         if args.verbose:
             import traceback
             traceback.print_exc()
-        exit(1)
+        sys.exit(1)
     if args.convert == None:
         if args.format is None:
             print("Can't convert file " + file_name + ". Missing format.", file=sys.stderr)
-            exit(10)
+            sys.exit(10)
         else:
             #print(formatter.convert(validator.data(), args.package_name))
-            exit(0)
+            sys.exit(0)
     else:
-        exit(0)
+        sys.exit(0)
+
+def main():
+    if sys.argv[1:2] == [ "serve" ]:
+        from spdx_validator.server import main as serve
+        sys.exit(serve(sys.argv[2:]))
+
+    args = parse()    
+    if args.list_licenses:
+        # no validator needed
+        list_licenses()
+        sys.exit(0)
+
+    validator = create_validator(args)
+    run(args, validator)
 
 if __name__ == '__main__':
     main()
-
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import glob
+import logging
+import os
+
+SPDX_FILE_SUFFIXES = [ ".json", ".yml", ".yaml" ]
+GLOB_CHARACTERS = [ "*", "?", "[" ]
+
+
+def _is_glob(path):
+    for c in GLOB_CHARACTERS:
+        if c in path:
+            return True
+    return False
+
+
+def is_batch(paths):
+    """True if paths should be handled in batch mode, i.e. more than one
+    path, a directory or a glob pattern"""
+    if len(paths) > 1:
+        return True
+    for path in paths:
+        if os.path.isdir(path) or _is_glob(path):
+            return True
+    return False
+
+
+def _dir_files(dir_name):
+    files = []
+    for root, dirs, dir_files in os.walk(dir_name):
+        dirs.sort()
+        for f in sorted(dir_files):
+            if os.path.splitext(f)[1].lower() in SPDX_FILE_SUFFIXES:
+                files.append(os.path.join(root, f))
+    return files
+
+
+def expand_paths(paths):
+    """Expand paths (files, directories and glob patterns) to a list of
+    files. Directories are searched recursively for files with an SPDX
+    file suffix (json, yaml, yml)."""
+    files = []
+    for path in paths:
+        if _is_glob(path):
+            matches = sorted(glob.glob(path, recursive=True))
+        else:
+            matches = [ path ]
+        for match in matches:
+            if os.path.isdir(match):
+                files += _dir_files(match)
+            else:
+                files.append(match)
+
+    unique_files = []
+    seen = set()
+    for f in files:
+        if f not in seen:
+            seen.add(f)
+            unique_files.append(f)
+    return unique_files
+
+
+class BatchResult:
+
+    def __init__(self, file_name, error = None, data = None, packages = None, errors = None, dag = None):
+        self.file_name = file_name
+        self.error = error
+        self.data = data
+        self.packages = packages
+        # the packages as a DAG, see SPDXValidator.packages_dag()
+        self.dag = dag
+        # collected errors (as dicts), when collecting errors
+        self.errors = errors
+        # stats of a worker process, as a dict
+        self.stats = None
+
+    def ok(self):
+        return self.error == None
+
+
+def _validate(validator, spdx_file, recursive, discard_checksum, print_packages, dag = False, package_name = None):
+    validator.reset()
+    try:
+        data = validator.validate_file(spdx_file, recursive, discard_checksum)
+        if len(validator.errors) > 0:
+            report = validator.errors.report()
+            return BatchResult(spdx_file, error=str(report['error_count']) + " errors, first: " + str(validator.errors.errors[0]),
+                               errors=report['errors'])
+        if print_packages and dag:
+            return BatchResult(spdx_file, data=data, dag=validator.packages_dag(package_name))
+        if print_packages:
+            return BatchResult(spdx_file, data=data, packages=validator.packages_deps())
+        return BatchResult(spdx_file)
+    except Exception as e:
+        logging.debug("Failed validating " + str(spdx_file) + ": " + str(e))
+        return BatchResult(spdx_file, error=str(e))
+
+
+def validate_batch_file(config, spdx_file, recursive, discard_checksum, print_packages, dag = False, package_name = None):
+    """Validate a file in a worker process"""
+    from spdx_validator.resolver import worker_validator
+    validator = worker_validator(config)
+    validator.stats.reset()
+    result = _validate(validator, spdx_file, recursive, discard_checksum, print_packages, dag, package_name)
+    result.stats = validator.stats.to_dict()
+    return result
+
+
+class BatchValidator:
+    """Validates many files, one by one with the same (warm) validator
+    or, if jobs > 1, on a process pool with one validator per process.
+
+    Results are returned in the order of the files."""
+
+    def __init__(self, validator, recursive = False, discard_checksum = False, jobs = 1, print_packages = False, dag = False, package_name = None):
+        self.validator = validator
+        self.recursive = recursive
+        self.discard_checksum = discard_checksum
+        self.jobs = jobs
+        self.print_packages = print_packages
+        self.dag = dag
+        self.package_name = package_name
+
+    def validate(self, files):
+        if self.jobs <= 1 or len(files) <= 1:
+            for f in files:
+                yield _validate(self.validator, f, self.recursive, self.discard_checksum, self.print_packages, self.dag, self.package_name)
+            return
+
+        import concurrent.futures
+        n = len(files)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.jobs) as executor:
+            for result in executor.map(validate_batch_file,
+                                       [ self.validator.config() ] * n,
+                                       files,
+                                       [ self.recursive ] * n,
+                                       [ self.discard_checksum ] * n,
+                                       [ self.print_packages ] * n,
+                                       [ self.dag ] * n,
+                                       [ self.package_name ] * n):
+                self.validator.stats.merge(result.stats)
+                yield result
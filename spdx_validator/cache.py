@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import hashlib
+import json
+import logging
+import os
+
+CACHE_DIR_NAME = "spdx-validator"
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+
+def default_cache_dir(sub_dir = None):
+    """Return the directory spdx-validator caches data in,
+    $XDG_CACHE_HOME/spdx-validator (~/.cache/spdx-validator by default)"""
+    base = os.environ.get("XDG_CACHE_HOME")
+    if base == None or base == "":
+        base = os.path.join(os.path.expanduser("~"), ".cache")
+    cache_dir = os.path.join(base, CACHE_DIR_NAME)
+    if sub_dir != None:
+        cache_dir = os.path.join(cache_dir, sub_dir)
+    return cache_dir
+
+
+class DiskCache:
+    """Size bounded on-disk key/value store.
+
+    Each entry is stored as a JSON file, named by the hash of the key,
+    in cache_dir. Entries are refreshed when read and, when the total
+    size exceeds max_size bytes, the least recently used entries are
+    removed. Problems reading or writing the cache are never fatal; the
+    entry is simply treated as missing."""
+
+    def __init__(self, cache_dir, max_size = DEFAULT_MAX_SIZE):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.size = None
+
+    def _path(self, key):
+        key_hash = hashlib.sha256(json.dumps(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key_hash + ".json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+            if entry['key'] != json.loads(json.dumps(key)):
+                return None
+            os.utime(path)
+            return entry['value']
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def put(self, key, value):
+        import tempfile
+        path = self._path(key)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, 'w') as f:
+                json.dump({ 'key': key, 'value': value }, f)
+            old_size = 0
+            if self.size != None and os.path.exists(path):
+                old_size = os.path.getsize(path)
+            os.replace(tmp_path, path)
+            if self.size == None:
+                self.size = self._total_size()
+            else:
+                # an overwritten entry is replaced, not added
+                self.size += os.path.getsize(path) - old_size
+            if self.size > self.max_size:
+                self.evict()
+        except OSError as e:
+            logging.debug("Could not store cache entry in " + self.cache_dir + ": " + str(e))
+
+    def _entries(self):
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(".json"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        return entries
+
+    def _total_size(self):
+        return sum([ size for _, size, _ in self._entries() ])
+
+    def evict(self):
+        """Remove least recently used entries until the cache is below
+        90% of max_size"""
+        entries = sorted(self._entries())
+        size = sum([ size for _, size, _ in entries ])
+        limit = self.max_size * 0.9
+        for _, entry_size, path in entries:
+            if size <= limit:
+                break
+            try:
+                os.remove(path)
+                size -= entry_size
+            except OSError:
+                pass
+        self.size = size
+
+    def clear(self):
+        for _, _, path in self._entries():
+            os.remove(path)
+        self.size = 0
@@ -5,6 +5,9 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 import hashlib
+import mmap
+import os
+import threading
 
 from spdx_validator.exception import SPDXValidationException
 
@@ -18,27 +21,119 @@ HASH_MD4 = "MD4"
 HASH_MD5 = "MD5"
 HASH_MD6 = "MD6"
 
-def hash_from_file(file_name, hash_name):
-    hash_fun = None
-    if hash_name.upper() == HASH_SHA1:
-        hash_fun = hashlib.sha1
-    elif hash_name.upper() == HASH_SHA224:
-        hash_fun = hashlib.sha224
-    elif hash_name.upper() == HASH_SHA256:
-        hash_fun = hashlib.sha256
-    elif hash_name.upper() == HASH_SHA384:
-        hash_fun = hashlib.sha384
-    elif hash_name.upper() == HASH_SHA512:
-        hash_fun = hashlib.sha512
-    elif hash_name.upper() == HASH_MD5:
-        hash_fun = hashlib.md5
-    else: # HASH_MD2,  HASH_MD6
+HASH_FUNCTIONS = {
+    HASH_SHA1: hashlib.sha1,
+    HASH_SHA224: hashlib.sha224,
+    HASH_SHA256: hashlib.sha256,
+    HASH_SHA384: hashlib.sha384,
+    HASH_SHA512: hashlib.sha512,
+    HASH_MD5: hashlib.md5,
+}
+# HASH_MD2,  HASH_MD4, HASH_MD6 are not supported
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+def _hash_fun(hash_name):
+    hash_fun = HASH_FUNCTIONS.get(str(hash_name).upper())
+    if hash_fun == None:
         raise SPDXValidationException("Unsupported checksum format (" + str(hash_name) + ")")
+    return hash_fun
+
+def hashes_from_file(file_name, hash_names, chunk_size = DEFAULT_CHUNK_SIZE, use_mmap = False):
+    """Compute the checksums, one for each algorithm in hash_names, of
+    a file in one pass over the file.
+
+    The file is read in chunks of chunk_size bytes or, if use_mmap is
+    True, memory mapped and handed to the hash functions directly.
+    Returns a dict with the (upper case) algorithm names as keys and
+    hex digests as values."""
+    hashers = {}
+    for hash_name in hash_names:
+        hashers[str(hash_name).upper()] = _hash_fun(hash_name)()
 
     with open(file_name, 'rb') as f:
-        f_bytes = f.read()
-        #print("hash.... " + str(f_bytes))
-        cs = hash_fun(f_bytes).hexdigest()
-        #print("hash.... " + str(cs))
-        return cs
-    
+        if use_mmap and os.fstat(f.fileno()).st_size > 0:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                for hasher in hashers.values():
+                    hasher.update(m)
+        else:
+            buf = bytearray(chunk_size)
+            view = memoryview(buf)
+            while True:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                for hasher in hashers.values():
+                    hasher.update(view[:n])
+
+    return { name: hasher.hexdigest() for name, hasher in hashers.items() }
+
+def hash_from_file(file_name, hash_name, chunk_size = DEFAULT_CHUNK_SIZE, use_mmap = False):
+    return hashes_from_file(file_name, [ hash_name ], chunk_size, use_mmap)[str(hash_name).upper()]
+
+
+class ChecksumCache:
+    """Cache of file checksums, keyed by the identity of the file:
+    (real path, inode, size, modification time, algorithm).
+
+    Checksums are kept in memory for the life time of the object and,
+    if a DiskCache is supplied, stored on disk to be reused by later
+    runs. A changed file gets a new key, so stale entries are never
+    used.
+
+    The cache may be used by several threads, the files are hashed
+    concurrently."""
+
+    def __init__(self, disk_cache = None):
+        self.checksums = {}
+        self.disk_cache = disk_cache
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _key(self, file_name, hash_name):
+        stat = os.stat(file_name)
+        return [ os.path.realpath(file_name), stat.st_ino, stat.st_size, stat.st_mtime_ns, str(hash_name).upper() ]
+
+    def _lookup(self, key):
+        mem_key = tuple(key)
+        with self._lock:
+            if mem_key in self.checksums:
+                return self.checksums[mem_key]
+            if self.disk_cache != None:
+                checksum = self.disk_cache.get(key)
+                if checksum != None:
+                    self.checksums[mem_key] = checksum
+                    return checksum
+        return None
+
+    def store(self, file_name, hash_name, checksum):
+        key = self._key(file_name, hash_name)
+        with self._lock:
+            self.checksums[tuple(key)] = checksum
+            if self.disk_cache != None:
+                self.disk_cache.put(key, checksum)
+
+    def hashes_from_file(self, file_name, hash_names, chunk_size = DEFAULT_CHUNK_SIZE, use_mmap = False):
+        """Same as hashes_from_file() but only hashes the file (once) if
+        any of the checksums is missing in the cache"""
+        digests = {}
+        missing = []
+        for hash_name in hash_names:
+            _hash_fun(hash_name)
+            checksum = self._lookup(self._key(file_name, hash_name))
+            if checksum == None:
+                missing.append(hash_name)
+            else:
+                digests[str(hash_name).upper()] = checksum
+        with self._lock:
+            self.hits += len(digests)
+            self.misses += len(missing)
+        if missing != []:
+            for hash_name, checksum in hashes_from_file(file_name, missing, chunk_size, use_mmap).items():
+                self.store(file_name, hash_name, checksum)
+                digests[hash_name] = checksum
+        return digests
+
+    def hash_from_file(self, file_name, hash_name, chunk_size = DEFAULT_CHUNK_SIZE, use_mmap = False):
+        return self.hashes_from_file(file_name, [ hash_name ], chunk_size, use_mmap)[str(hash_name).upper()]
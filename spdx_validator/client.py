@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+#
+# Thin client to the validation daemon (see server.py). Takes the same
+# arguments as spdx-validator, has them validated by the daemon and
+# prints the output and exits with the exit code the daemon reports.
+#
+# Only the standard library is imported, unless the daemon can not be
+# reached and the arguments are validated in this process instead.
+#
+# The daemon's address is given with --server (first argument) or the
+# SPDX_VALIDATOR_SERVER environment variable: a Unix socket path or an
+# http://host:port URL. A daemon on a TCP port is sent the token it
+# wrote to its token file, SPDX_VALIDATOR_TOKEN_FILE (or the default).
+# A Unix socket is only connected to if it is the user's, so that no
+# one else's daemon reports the results.
+#
+
+import http.client
+import json
+import os
+import socket
+import stat
+import sys
+
+SERVER_ENV = "SPDX_VALIDATOR_SERVER"
+TOKEN_FILE_ENV = "SPDX_VALIDATOR_TOKEN_FILE"
+SERVER_OPTION = "--server"
+
+DEFAULT_TIMEOUT = 3600
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+
+    def __init__(self, socket_path, timeout = DEFAULT_TIMEOUT):
+        super().__init__("localhost", timeout = timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        check_socket(self.socket_path)
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def default_runtime_dir():
+    """The directory of the daemon's socket and token file:
+    XDG_RUNTIME_DIR or, if not set, a directory in /tmp the daemon
+    creates only accessible by the user (see server.py)"""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return runtime_dir
+    return os.path.join("/tmp", "spdx-validator-" + str(os.getuid()))
+
+
+def default_address():
+    address = os.environ.get(SERVER_ENV)
+    if address:
+        return address
+    # as default_socket_path() in server.py, not imported to keep the
+    # client light
+    return os.path.join(default_runtime_dir(), "spdx-validator.sock")
+
+
+def default_token_file():
+    token_file = os.environ.get(TOKEN_FILE_ENV)
+    if token_file:
+        return token_file
+    # as default_token_path() in server.py
+    return os.path.join(default_runtime_dir(), "spdx-validator.token")
+
+
+def check_socket(socket_path):
+    """Raise OSError unless socket_path is a socket of the user, that
+    others may not write to (e.g. one created by someone else at the
+    default path)"""
+    info = os.lstat(socket_path)
+    if not stat.S_ISSOCK(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o022 != 0:
+        raise OSError("Socket " + socket_path + " must be the user's and not writable by others")
+
+
+def read_token(token_file):
+    """The token in token_file. Raises OSError if it can not be read or
+    is accessible by others than the user (not written by the daemon)"""
+    with open(token_file) as f:
+        info = os.fstat(f.fileno())
+        if info.st_uid != os.getuid() or info.st_mode & 0o077 != 0:
+            raise OSError("Token file " + token_file + " must be the user's, with permissions 0600")
+        return f.read().strip()
+
+
+def connection(address, timeout = DEFAULT_TIMEOUT):
+    if address.startswith("http://"):
+        return http.client.HTTPConnection(address[len("http://"):].rstrip("/"), timeout = timeout)
+    return _UnixHTTPConnection(address, timeout)
+
+
+def request(address, method, path, data = None, token_file = None):
+    """Send a request to the daemon, return the decoded reply. Raises
+    OSError if the daemon can not be reached or rejects the request."""
+    headers = {}
+    if address.startswith("http://"):
+        headers["Authorization"] = "Bearer " + read_token(token_file or default_token_file())
+    conn = connection(address)
+    try:
+        body = None
+        if data != None:
+            body = json.dumps(data).encode()
+            headers["Content-Type"] = "application/json"
+        conn.request(method, path, body, headers)
+        response = conn.getresponse()
+        reply = json.loads(response.read())
+        if response.status != 200:
+            raise OSError("Server error " + str(response.status) + ": " + str(reply.get('error')))
+        return reply
+    finally:
+        conn.close()
+
+
+def validate(address, argv, cwd = None, token_file = None):
+    """Have the daemon run the spdx-validator command line argv, return
+    a dict with exit_code, stdout and stderr"""
+    if cwd == None:
+        cwd = os.getcwd()
+    return request(address, "POST", "/validate", { 'argv': argv, 'cwd': cwd }, token_file)
+
+
+def main():
+    argv = sys.argv[1:]
+    address = None
+    if argv[:1] == [ SERVER_OPTION ] and len(argv) > 1:
+        address = argv[1]
+        argv = argv[2:]
+    if address == None:
+        address = default_address()
+
+    try:
+        reply = validate(address, argv)
+    except (OSError, ValueError):
+        # no daemon, or the request is rejected (e.g. writes files),
+        # validate here
+        sys.argv = [ "spdx-validator" ] + argv
+        from spdx_validator.__main__ import main as validator_main
+        validator_main()
+        return
+
+    sys.stdout.write(reply['stdout'])
+    sys.stderr.write(reply['stderr'])
+    sys.exit(reply['exit_code'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+#
+# Schema validation engine generating specialized Python code.
+#
+# A JSON schema is translated into a Python module with one function
+# per (non trivial) sub schema, each function returning True/False.
+# The generated module is cached on disk, keyed by schema hash, so
+# later processes only need to import it.
+#
+# Only the decision (valid/invalid) is made by the generated code. When
+# a document is rejected jsonschema is used to produce the error, which
+# keeps the error messages identical to the jsonschema engine.
+#
+
+import importlib.util
+import logging
+import os
+import tempfile
+
+from spdx_validator.cache import default_cache_dir
+
+# bump when the generated code changes, invalidates cached modules
+CODEGEN_VERSION = "1"
+
+# keywords not affecting validation
+ANNOTATION_KEYWORDS = [ "$schema", "$id", "$comment", "title", "description",
+                        "default", "examples", "readOnly", "writeOnly", "format" ]
+
+TYPE_EXPRESSIONS = {
+    "object": "isinstance({v}, dict)",
+    "array": "isinstance({v}, list)",
+    "string": "isinstance({v}, str)",
+    "boolean": "isinstance({v}, bool)",
+    "null": "{v} is None",
+    "integer": "((isinstance({v}, int) and not isinstance({v}, bool)) or (isinstance({v}, float) and {v}.is_integer()))",
+    "number": "(isinstance({v}, _Number) and not isinstance({v}, bool))",
+}
+
+OBJECT_KEYWORDS = [ "properties", "required", "additionalProperties",
+                    "patternProperties", "minProperties", "maxProperties" ]
+ARRAY_KEYWORDS = [ "items", "minItems", "maxItems" ]
+STRING_KEYWORDS = [ "minLength", "maxLength", "pattern" ]
+NUMBER_KEYWORDS = [ "minimum", "maximum" ]
+SUPPORTED_KEYWORDS = ANNOTATION_KEYWORDS + OBJECT_KEYWORDS + ARRAY_KEYWORDS + \
+    STRING_KEYWORDS + NUMBER_KEYWORDS + [ "type", "enum", "const" ]
+
+
+class CodegenUnsupported(Exception):
+    """Raised when a schema uses something the generator can't translate"""
+    pass
+
+
+class _Generator:
+
+    def __init__(self):
+        self.constants = []
+        self.functions = []
+        self.counter = 0
+
+    def _name(self, prefix):
+        self.counter += 1
+        return prefix + str(self.counter)
+
+    def _constant(self, prefix, value_source):
+        name = self._name(prefix)
+        self.constants.append(name + " = " + value_source)
+        return name
+
+    def _check_schema(self, schema):
+        if isinstance(schema, bool):
+            return
+        if not isinstance(schema, dict):
+            raise CodegenUnsupported("Schema is not an object: " + repr(schema))
+        for keyword in schema:
+            if keyword not in SUPPORTED_KEYWORDS:
+                raise CodegenUnsupported("Unsupported keyword: " + str(keyword))
+
+    def _type_condition(self, schema, var):
+        types = schema.get("type")
+        if types == None:
+            return None
+        if isinstance(types, str):
+            types = [ types ]
+        exprs = []
+        for t in types:
+            if t not in TYPE_EXPRESSIONS:
+                raise CodegenUnsupported("Unsupported type: " + str(t))
+            exprs.append(TYPE_EXPRESSIONS[t].format(v=var))
+        if len(exprs) == 0:
+            return "False"
+        return " or ".join(exprs)
+
+    def _enum_condition(self, values, var):
+        strings = []
+        has_none = False
+        for value in values:
+            if value is None:
+                has_none = True
+            elif isinstance(value, str):
+                strings.append(value)
+            else:
+                raise CodegenUnsupported("Unsupported enum value: " + repr(value))
+        exprs = []
+        if has_none:
+            exprs.append(var + " is None")
+        if strings:
+            name = self._constant("_E", "frozenset(" + repr(sorted(strings)) + ")")
+            exprs.append("(isinstance(" + var + ", str) and " + var + " in " + name + ")")
+        if len(exprs) == 0:
+            return "False"
+        return " or ".join(exprs)
+
+    def inline(self, schema, var):
+        """Return a Python expression for trivial schemas, None otherwise"""
+        self._check_schema(schema)
+        if schema is True:
+            return "True"
+        if schema is False:
+            return "False"
+        checks = [ k for k in schema if k not in ANNOTATION_KEYWORDS ]
+        if checks == []:
+            return "True"
+        if checks == [ "type" ]:
+            return "(" + self._type_condition(schema, var) + ")"
+        if checks == [ "enum" ]:
+            return "(" + self._enum_condition(schema["enum"], var) + ")"
+        return None
+
+    def check(self, schema, var):
+        """Return an expression validating var against schema"""
+        expr = self.inline(schema, var)
+        if expr != None:
+            return expr
+        return self.function(schema) + "(" + var + ")"
+
+    def function(self, schema):
+        name = self._name("_v")
+        body = []
+        types = schema.get("type")
+
+        type_cond = self._type_condition(schema, "x")
+        if type_cond != None:
+            body.append("if not (" + type_cond + "):")
+            body.append("    return False")
+
+        if "enum" in schema:
+            body.append("if not (" + self._enum_condition(schema["enum"], "x") + "):")
+            body.append("    return False")
+        if "const" in schema:
+            body.append("if not (" + self._enum_condition([ schema["const"] ], "x") + "):")
+            body.append("    return False")
+
+        body += self._guarded(types, "object", "isinstance(x, dict)", self._object_lines(schema))
+        body += self._guarded(types, "array", "isinstance(x, list)", self._array_lines(schema))
+        body += self._guarded(types, "string", "isinstance(x, str)", self._string_lines(schema))
+        body += self._guarded(types, "number", "(isinstance(x, _Number) and not isinstance(x, bool))",
+                              self._number_lines(schema))
+
+        lines = [ "def " + name + "(x):" ]
+        for line in body:
+            lines.append("    " + line)
+        lines.append("    return True")
+        self.functions.append("\n".join(lines))
+        return name
+
+    def _guarded(self, types, type_name, guard, lines):
+        if lines == []:
+            return []
+        # no need to check the type again if the schema requires it
+        if types == type_name or (type_name == "number" and types == "integer"):
+            return lines
+        return [ "if " + guard + ":" ] + [ "    " + line for line in lines ]
+
+    def _object_lines(self, schema):
+        lines = []
+        properties = schema.get("properties", {})
+        pattern_properties = schema.get("patternProperties", {})
+        for key in schema.get("required", []):
+            lines.append("if " + repr(key) + " not in x:")
+            lines.append("    return False")
+        if "minProperties" in schema:
+            lines.append("if len(x) < " + repr(schema["minProperties"]) + ":")
+            lines.append("    return False")
+        if "maxProperties" in schema:
+            lines.append("if len(x) > " + repr(schema["maxProperties"]) + ":")
+            lines.append("    return False")
+        for key, sub_schema in properties.items():
+            expr = self.check(sub_schema, "v")
+            if expr == "True":
+                continue
+            lines.append("v = x.get(" + repr(key) + ", _MISSING)")
+            lines.append("if v is not _MISSING and not " + expr + ":")
+            lines.append("    return False")
+        patterns = []
+        for pattern, sub_schema in pattern_properties.items():
+            regex = self._constant("_P", "re.compile(" + repr(pattern) + ")")
+            patterns.append(regex)
+            expr = self.check(sub_schema, "v")
+            if expr == "True":
+                continue
+            lines.append("for k, v in x.items():")
+            lines.append("    if " + regex + ".search(k) and not " + expr + ":")
+            lines.append("        return False")
+        if "additionalProperties" in schema:
+            additional = schema["additionalProperties"]
+            known = self._constant("_K", "frozenset(" + repr(sorted(properties)) + ")")
+            if additional is False and patterns == []:
+                lines.append("if not x.keys() <= " + known + ":")
+                lines.append("    return False")
+            else:
+                expr = self.check(additional, "v")
+                if expr != "True":
+                    extra = " or ".join([ p + ".search(k)" for p in patterns ])
+                    lines.append("for k, v in x.items():")
+                    if extra == "":
+                        lines.append("    if k not in " + known + " and not " + expr + ":")
+                    else:
+                        lines.append("    if k not in " + known + " and not (" + extra + ") and not " + expr + ":")
+                    lines.append("        return False")
+        return lines
+
+    def _array_lines(self, schema):
+        lines = []
+        if "minItems" in schema:
+            lines.append("if len(x) < " + repr(schema["minItems"]) + ":")
+            lines.append("    return False")
+        if "maxItems" in schema:
+            lines.append("if len(x) > " + repr(schema["maxItems"]) + ":")
+            lines.append("    return False")
+        if "items" in schema:
+            items = schema["items"]
+            if isinstance(items, list):
+                raise CodegenUnsupported("Unsupported keyword: items (array form)")
+            expr = self.check(items, "i")
+            if expr != "True":
+                lines.append("for i in x:")
+                lines.append("    if not " + expr + ":")
+                lines.append("        return False")
+        return lines
+
+    def _string_lines(self, schema):
+        lines = []
+        if "minLength" in schema:
+            lines.append("if len(x) < " + repr(schema["minLength"]) + ":")
+            lines.append("    return False")
+        if "maxLength" in schema:
+            lines.append("if len(x) > " + repr(schema["maxLength"]) + ":")
+            lines.append("    return False")
+        if "pattern" in schema:
+            regex = self._constant("_P", "re.compile(" + repr(schema["pattern"]) + ")")
+            lines.append("if not " + regex + ".search(x):")
+            lines.append("    return False")
+        return lines
+
+    def _number_lines(self, schema):
+        lines = []
+        if "minimum" in schema:
+            lines.append("if x < " + repr(schema["minimum"]) + ":")
+            lines.append("    return False")
+        if "maximum" in schema:
+            lines.append("if x > " + repr(schema["maximum"]) + ":")
+            lines.append("    return False")
+        return lines
+
+
+def generate_source(schema, schema_hash = ""):
+    """Generate the source of a Python module, with an is_valid(instance)
+    function, validating instances against schema"""
+    draft = str(schema.get("$schema", "")) if isinstance(schema, dict) else ""
+    if "draft-03" in draft or "draft-04" in draft:
+        # different integer semantics, leave these to jsonschema
+        raise CodegenUnsupported("Unsupported schema draft: " + draft)
+
+    generator = _Generator()
+    expr = generator.check(schema, "instance")
+
+    lines = [ "# Generated by spdx-validator (codegen " + CODEGEN_VERSION + ") from schema " + schema_hash,
+              "# Do not edit.",
+              "",
+              "import re",
+              "from numbers import Number as _Number",
+              "",
+              "_MISSING = object()",
+              "" ]
+    lines += generator.constants
+    lines.append("")
+    for function in generator.functions:
+        lines.append("")
+        lines.append(function)
+    lines.append("")
+    lines.append("")
+    lines.append("def is_valid(instance):")
+    lines.append("    return " + expr)
+    lines.append("")
+    return "\n".join(lines)
+
+
+def _module_from_file(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _module_from_source(name, source):
+    namespace = {}
+    exec(compile(source, "<" + name + ">", "exec"), namespace)
+
+    class _Module:
+        pass
+    module = _Module()
+    module.is_valid = namespace['is_valid']
+    return module
+
+
+def load_module(schema, schema_hash, cache_dir = None):
+    """Return the generated validation module for schema, from the disk
+    cache if present, otherwise generated (and stored in the cache)"""
+    if cache_dir == None:
+        cache_dir = default_cache_dir("codegen")
+    name = "spdx_schema_" + CODEGEN_VERSION + "_" + schema_hash
+    path = os.path.join(cache_dir, name + ".py")
+
+    if os.path.isfile(path):
+        try:
+            logging.debug("Loading generated schema module: " + path)
+            return _module_from_file(name, path)
+        except Exception as e:
+            logging.debug("Could not load generated module " + path + ": " + str(e))
+
+    source = generate_source(schema, schema_hash)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, 'w') as f:
+            f.write(source)
+        os.replace(tmp_path, path)
+        logging.debug("Stored generated schema module: " + path)
+        return _module_from_file(name, path)
+    except OSError as e:
+        logging.debug("Could not store generated module in " + cache_dir + ": " + str(e))
+        return _module_from_source(name, source)
+
+
+class CodegenValidator:
+    """Validator using generated code for the valid/invalid decision
+    and a jsonschema validator for reporting errors.
+
+    Has the same interface as the jsonschema validators used by
+    spdx-validator (schema, is_valid, iter_errors)."""
+
+    def __init__(self, jsonschema_validator, schema_hash, cache_dir = None):
+        self.jsonschema_validator = jsonschema_validator
+        self.schema = jsonschema_validator.schema
+        self.module = load_module(self.schema, schema_hash, cache_dir)
+
+    def is_valid(self, instance):
+        return self.module.is_valid(instance)
+
+    def iter_errors(self, instance):
+        if self.module.is_valid(instance):
+            return iter([])
+        return self.jsonschema_validator.iter_errors(instance)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+#
+# The documents validated in a run. A validator keeps a summary of
+# every document (SPDXValidator.all_manifests) and the full documents
+# in a DocumentCache. Bounded (max_documents, --max-documents) the
+# cache keeps the least recently used documents only, the others are
+# read again when asked for (SPDXValidator.document()), so that the
+# memory used by recursive runs does not grow with the number of
+# documents.
+#
+
+import collections
+import sys
+
+from spdx_validator.package_graph import PackageRecord
+
+
+class DocumentSummary:
+    """What is kept of every validated document: its name, namespace,
+    file and packages (PackageRecords by SPDXID), to resolve links to
+    it"""
+
+    __slots__ = [ 'name', 'namespace', 'spdx_file', 'packages' ]
+
+    def __init__(self, name, namespace, spdx_file, packages):
+        self.name = sys.intern(name)
+        self.namespace = namespace
+        self.spdx_file = spdx_file
+        self.packages = packages
+
+    @staticmethod
+    def from_data(spdx_file, manifest_data):
+        packages = {}
+        for package in manifest_data.get('packages', []):
+            record = PackageRecord.from_package(package)
+            packages[record.spdx_id] = record
+        return DocumentSummary(manifest_data['name'], manifest_data['documentNamespace'], spdx_file, packages)
+
+    def qualified_package(self, elem_id):
+        """The PackageRecord referred to as "<document name>:<SPDXID>\""""
+        prefix = self.name + ":"
+        if not elem_id.startswith(prefix):
+            return None
+        return self.packages.get(elem_id[len(prefix):])
+
+    def __repr__(self):
+        return "DocumentSummary(" + repr(self.name) + ", " + repr(self.namespace) + ")"
+
+
+class DocumentCache:
+    """Full documents by namespace, the max_documents (if not None)
+    most recently used"""
+
+    def __init__(self, max_documents = None):
+        self.max_documents = max_documents
+        self.documents = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, namespace):
+        manifest_data = self.documents.get(namespace)
+        if manifest_data == None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.documents.move_to_end(namespace)
+        return manifest_data
+
+    def put(self, namespace, manifest_data):
+        if self.max_documents == 0:
+            return
+        self.documents[namespace] = manifest_data
+        self.documents.move_to_end(namespace)
+        if self.max_documents != None:
+            while len(self.documents) > self.max_documents:
+                self.documents.popitem(last=False)
+
+    def __len__(self):
+        return len(self.documents)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+#
+# Errors collected when validating with collect_errors (--all-errors):
+# instead of stopping at the first error, all schema, license,
+# relationship and checksum errors of all documents are gathered, up to
+# max_errors, and reported with a JSON pointer to where in the
+# document they are.
+#
+
+from spdx_validator.exception import SPDXValidationException
+
+ERROR_READ = "read"
+ERROR_SCHEMA = "schema"
+ERROR_LICENSE = "license"
+ERROR_RELATIONSHIP = "relationship"
+ERROR_CHECKSUM = "checksum"
+ERROR_DOCUMENT = "document"
+
+REPORT_FORMAT = 1
+
+
+def json_pointer(path):
+    """JSON pointer (RFC 6901) of path, a sequence of keys and
+    indexes"""
+    return "".join([ "/" + str(part).replace("~", "~0").replace("/", "~1") for part in path ])
+
+
+class ErrorLimitReached(SPDXValidationException):
+    """Raised when an error is found after max_errors errors have been
+    collected"""
+    pass
+
+
+class CollectedError:
+
+    def __init__(self, error_type, message, spdx_file, pointer = ""):
+        self.error_type = error_type
+        self.message = message
+        self.spdx_file = spdx_file
+        self.pointer = pointer
+
+    def to_dict(self):
+        return {
+            'file': self.spdx_file,
+            'type': self.error_type,
+            'pointer': self.pointer,
+            'message': self.message,
+        }
+
+    def __str__(self):
+        return str(self.spdx_file) + ":" + self.pointer + ": " + self.error_type + ": " + self.message
+
+
+class ErrorCollector:
+    """Collects errors, raises ErrorLimitReached when one more than
+    max_errors (if not None) is found. It is not collected, but marks
+    the errors as truncated"""
+
+    def __init__(self, max_errors = None):
+        self.max_errors = max_errors
+        self.errors = []
+        self.truncated = False
+        self._seen = set()
+
+    def add(self, error_type, message, spdx_file, pointer = ""):
+        key = (error_type, message, spdx_file, pointer)
+        if key in self._seen:
+            # a document validated again, when linked to more than once
+            return
+        if self.max_errors != None and len(self.errors) >= self.max_errors:
+            self.truncated = True
+            raise ErrorLimitReached("Stopped after " + str(len(self.errors)) + " errors")
+        self._seen.add(key)
+        self.errors.append(CollectedError(error_type, message, spdx_file, pointer))
+
+    def __len__(self):
+        return len(self.errors)
+
+    def report(self):
+        """The errors as a dict, to be written as JSON"""
+        return {
+            'format': REPORT_FORMAT,
+            'valid': self.errors == [],
+            'error_count': len(self.errors),
+            'truncated': self.truncated,
+            'errors': [ error.to_dict() for error in self.errors ],
+        }
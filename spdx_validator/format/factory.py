@@ -4,10 +4,8 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-
-from spdx_validator.format.format_json import JsonFormatter
-from spdx_validator.format.format_yaml import YamlFormatter
-from spdx_validator.format.format_flict import FlictFormatter
+# The formatters are imported when used, the YAML formatter imports
+# yaml
 
 FORMAT_JSON = "json"
 FORMAT_YAML = "yaml"
@@ -17,19 +15,30 @@ FORMATS = [ FORMAT_JSON, FORMAT_YAML ]
 
 class FormatFactory:
 
-    _instance = None
+    # formatters by format, shared by all (e.g. daemon) requests
+    _formatters = {}
 
     @staticmethod
     def formatter(format):
-        if FormatFactory._instance is None:
-            if format.lower() == "json":
-                FormatFactory._instance = JsonFormatter()
-            elif format.lower() == "yaml" or format.lower() == "yml":
-                FormatFactory._instance = YamlFormatter()
-            elif format.lower() == "flict":
-                FormatFactory._instance = FlictFormatter()
-
-        return FormatFactory._instance
+        format = format.lower()
+        if format == "yml":
+            format = FORMAT_YAML
+        formatter = FormatFactory._formatters.get(format)
+        if formatter is None:
+            if format == FORMAT_JSON:
+                from spdx_validator.format.format_json import JsonFormatter
+                formatter = JsonFormatter()
+            elif format == FORMAT_YAML:
+                from spdx_validator.format.format_yaml import YamlFormatter
+                formatter = YamlFormatter()
+            elif format == FORMAT_FLICT:
+                from spdx_validator.format.format_flict import FlictFormatter
+                formatter = FlictFormatter()
+            else:
+                return None
+            FormatFactory._formatters[format] = formatter
+
+        return formatter
 
 def supported_formats():
     return FORMATS
@@ -30,18 +30,20 @@ class FlictFormatter(FormatInterface):
         }
         
     
+    def _packages_to_flict_project(self, _p):
+        p = _p['package']
+        dependencies = _p['dependencies']
+        deps = []
+        for d in dependencies:
+            deps.append(self._package_to_flict(d))
+        return self._package_to_flict_project(p, deps)
+
     def format_packages(self, package, packages, package_name = None):
         package_list = []
         for _p in packages:
-            p = _p['package']
-            dependencies = _p['dependencies']
-            if package_name != None and package_name != p['name']:
+            if package_name != None and package_name != _p['package']['name']:
                 continue
-            deps = []
-            for d in dependencies:
-                deps.append(self._package_to_flict(d))
-            top = self._package_to_flict_project(p, deps)
-            package_list.append(top)
+            package_list.append(self._packages_to_flict_project(_p))
 
         if package_name != None:
             if len(package_list) == 1:
@@ -51,6 +53,9 @@ class FlictFormatter(FormatInterface):
         else:
             return json.dumps(package_list, indent=4)
     
+    def format_package(self, package):
+        return json.dumps(self._packages_to_flict_project(package)) + "\n"
+
     def _format_package(self, package, dependencies):
         print("package: " + str(package['name']))
         print("dependencies: " + str(dependencies))
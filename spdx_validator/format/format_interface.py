@@ -4,11 +4,43 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+import json
+
 class FormatInterface:
 
     def format_packages(self, package, packages, package_name = None):
         return "default implementation format_packages(packages)"
 
+    def format_package(self, package):
+        """One package, and its dependencies, as in packages_deps(), as a
+        record of the streamed output. By default a line of JSON
+        (NDJSON)"""
+        return json.dumps(package) + "\n"
+
+    def stream_packages(self, packages, package_name = None):
+        """Generate the records of packages, any iterable of packages as
+        in packages_deps() (e.g. SPDXValidator.iter_packages_deps()), as
+        they are formatted"""
+        for package in packages:
+            if package_name != None and package_name != package['package']['name']:
+                continue
+            yield self.format_package(package)
+
+    def write_packages(self, packages, f, package_name = None):
+        """Write the records of packages to the file object f, one at a
+        time, return the number written"""
+        count = 0
+        for record in self.stream_packages(packages, package_name):
+            f.write(record)
+            count += 1
+        return count
+
+    def format_dag(self, dag):
+        """The packages, and dependencies, as returned by
+        SPDXValidator.packages_dag(). By default JSON, also for formats
+        with no way to refer to a package twice (e.g. flict)"""
+        return json.dumps(dag)
+
     def convert(self, data):
         return "default implementation convert(data)"
         
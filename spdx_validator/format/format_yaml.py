@@ -13,9 +13,16 @@ class YamlFormatter(FormatInterface):
     def __init__(self):
         pass
     
-    def format_packages(self, packages):
+    def format_packages(self, package, packages, package_name = None):
         return yaml.safe_dump(packages)
 
+    def format_package(self, package):
+        # a YAML document per package
+        return yaml.safe_dump(package, explicit_start=True)
+
+    def format_dag(self, dag):
+        return yaml.safe_dump(dag)
+
     def convert(self, data):
         return yaml.safe_dump(data)
 
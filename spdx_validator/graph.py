@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import logging
+
+
+def dep_node(dep):
+    """The node (SPDXID) a dependency ("<document name>:<SPDXID>") refers to"""
+    return dep.split(":")[1]
+
+
+class DependencyGraph:
+    """Transitive dependencies of packages.
+
+    dependencies maps an SPDXID to the list of its (direct) dependencies,
+    each as "<document name>:<SPDXID>". Other node and dependency types
+    (e.g. the integer ids of a PackageGraph) can be used, with a
+    dep_node function returning the node a dependency refers to. The
+    strongly connected components
+    of the graph are found in one (iterative, Tarjan's algorithm) pass.
+    Components with more than one package, or a package depending on
+    itself, are dependency cycles and listed in cycles.
+
+    The closures of packages depended on by more than one package are
+    then computed, dependencies first, and memoized, so shared sub
+    graphs are walked once. Other closures are computed when asked for,
+    by walking the graph down to the memoized closures.
+
+    The closure of a package lists its dependencies in depth first
+    order, each dependency once."""
+
+    def __init__(self, dependencies, dep_node = dep_node):
+        self.dependencies = dependencies
+        self.dep_node = dep_node
+        self.closures = {}
+        self.cycles = []
+
+        parents = {}
+        for node, deps in dependencies.items():
+            for dep in deps:
+                parents.setdefault(self.dep_node(dep), set()).add(node)
+
+        for component in self._components():
+            if len(component) > 1 or component[0] in self._children(component[0]):
+                self.cycles.append(list(reversed(component)))
+                logging.debug("Dependency cycle: " + str(component))
+            for node in component:
+                if len(parents.get(node, [])) > 1:
+                    self.closures[node] = self._walk(node)
+
+    def closure(self, spdx_id):
+        closure = self.closures.get(spdx_id)
+        if closure == None:
+            closure = self._walk(spdx_id)
+        return closure
+
+    def _children(self, node):
+        return [ self.dep_node(dep) for dep in self.dependencies.get(node, []) ]
+
+    def _components(self):
+        """Strongly connected components, each component listed after
+        the components it depends on"""
+        index = {}
+        low = {}
+        stack = []
+        on_stack = set()
+        components = []
+
+        for root in self.dependencies:
+            if root in index:
+                continue
+            index[root] = low[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            work = [ (root, iter(self._children(root))) ]
+            while work != []:
+                node, children = work[-1]
+                descended = False
+                for child in children:
+                    if child not in index:
+                        index[child] = low[child] = len(index)
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(self._children(child))))
+                        descended = True
+                        break
+                    elif child in on_stack:
+                        low[node] = min(low[node], index[child])
+                if descended:
+                    continue
+
+                work.pop()
+                if work != []:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+        return components
+
+    def _walk(self, node):
+        """Depth first walk from node, using the memoized closures"""
+        closure = []
+        seen = set()
+        visited = set([ node ])
+        work = [ iter(self.dependencies.get(node, [])) ]
+        while work != []:
+            dep = next(work[-1], None)
+            if dep == None:
+                work.pop()
+                continue
+            if dep not in seen:
+                seen.add(dep)
+                closure.append(dep)
+            child = self.dep_node(dep)
+            if child in visited:
+                continue
+            visited.add(child)
+            memoized = self.closures.get(child)
+            if memoized == None:
+                work.append(iter(self.dependencies.get(child, [])))
+                continue
+            for inner_dep in memoized:
+                if inner_dep not in seen:
+                    seen.add(inner_dep)
+                    closure.append(inner_dep)
+                    visited.add(self.dep_node(inner_dep))
+        return closure
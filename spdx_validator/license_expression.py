@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+#
+# Parser for SPDX license expressions (SPDX 2.2, Annex D):
+#
+#   compound-expression = simple-expression
+#                       | simple-expression "WITH" license-exception-id
+#                       | compound-expression "AND" compound-expression
+#                       | compound-expression "OR" compound-expression
+#                       | "(" compound-expression ")"
+#   simple-expression   = license-id | license-id "+" | license-ref
+#   license-ref         = ["DocumentRef-" idstring ":"] "LicenseRef-" idstring
+#
+# WITH binds harder than AND, which binds harder than OR. Operators are
+# accepted in upper or lower case. Allowed licenses (allowed_licenses)
+# are accepted as license and exception ids whatever their syntax.
+#
+# Parsed expressions are represented as tuples:
+#
+#   (LICENSE, id, plus)
+#   (LICENSE_REF, ref)
+#   (WITH, license, exception_id)
+#   (AND, [expressions])
+#   (OR, [expressions])
+#
+
+import functools
+import re
+
+from spdx_validator.exception import SPDXValidationException
+
+LICENSE = "LICENSE"
+LICENSE_REF = "LICENSE_REF"
+WITH = "WITH"
+AND = "AND"
+OR = "OR"
+
+OPERATORS = { "AND": AND, "and": AND, "OR": OR, "or": OR, "WITH": WITH, "with": WITH }
+
+# valid as the complete value of a license field
+SPECIAL_VALUES = [ "NONE", "NOASSERTION" ]
+
+IDSTRING = "[A-Za-z0-9.-]+"
+LICENSE_ID_RE = re.compile("^" + IDSTRING + "$")
+LICENSE_REF_RE = re.compile("^(DocumentRef-" + IDSTRING + ":)?LicenseRef-" + IDSTRING + "$")
+TOKEN_RE = re.compile(r"\s*(\(|\)|[^\s()]+)")
+
+
+def _tokenize(expression):
+    tokens = []
+    pos = 0
+    expression = expression.rstrip()
+    while pos < len(expression):
+        match = TOKEN_RE.match(expression, pos)
+        tokens.append(match.group(1))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+
+    def __init__(self, expression, allowed_keys = frozenset()):
+        self.expression = expression
+        self.allowed_keys = allowed_keys
+        self.tokens = _tokenize(expression)
+        self.pos = 0
+
+    def error(self, message):
+        return SPDXValidationException("Invalid license expression \"" + str(self.expression) + "\": " + message)
+
+    def peek(self):
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return None
+
+    def next(self):
+        token = self.peek()
+        if token == None:
+            raise self.error("unexpected end of expression")
+        self.pos += 1
+        return token
+
+    def parse(self):
+        if self.tokens == []:
+            raise self.error("empty expression")
+        expr = self.parse_or()
+        if self.peek() != None:
+            raise self.error("unexpected \"" + self.peek() + "\"")
+        return expr
+
+    def _parse_operator(self, operator, parse_operand):
+        operands = [ parse_operand() ]
+        while OPERATORS.get(self.peek()) == operator:
+            self.next()
+            operands.append(parse_operand())
+        if len(operands) == 1:
+            return operands[0]
+        return (operator, operands)
+
+    def parse_or(self):
+        return self._parse_operator(OR, self.parse_and)
+
+    def parse_and(self):
+        return self._parse_operator(AND, self.parse_with)
+
+    def parse_with(self):
+        expr = self.parse_simple()
+        if OPERATORS.get(self.peek()) == WITH:
+            self.next()
+            if expr[0] != LICENSE:
+                raise self.error("WITH must follow a license identifier")
+            exception_id = self.next()
+            if exception_id not in self.allowed_keys and not LICENSE_ID_RE.match(exception_id):
+                raise self.error("invalid license exception \"" + exception_id + "\"")
+            expr = (WITH, expr, exception_id)
+        return expr
+
+    def parse_simple(self):
+        token = self.next()
+        if token == "(":
+            expr = self.parse_or()
+            if self.next() != ")":
+                raise self.error("missing \")\"")
+            return expr
+        if token == ")" or token in OPERATORS:
+            raise self.error("unexpected \"" + token + "\"")
+        if token in self.allowed_keys:
+            return (LICENSE, token, False)
+        if LICENSE_REF_RE.match(token):
+            return (LICENSE_REF, token)
+        plus = token.endswith("+")
+        license_id = token
+        if plus:
+            license_id = token[:-1]
+        if license_id not in self.allowed_keys and not LICENSE_ID_RE.match(license_id):
+            raise self.error("invalid license identifier \"" + token + "\"")
+        return (LICENSE, license_id, plus)
+
+
+@functools.lru_cache(maxsize=4096)
+def parse(expression, allowed_keys = frozenset()):
+    """Parse a license expression, raise SPDXValidationException if not
+    a valid expression. Identifiers in allowed_keys (a frozenset) are
+    accepted as they are. Results are cached."""
+    return _Parser(expression, allowed_keys).parse()
+
+
+def identifiers(expr):
+    """Return the (licenses, exceptions, license refs) in a parsed
+    expression, as sets"""
+    licenses = set()
+    exceptions = set()
+    refs = set()
+    work = [ expr ]
+    while work != []:
+        node = work.pop()
+        kind = node[0]
+        if kind == LICENSE:
+            licenses.add(node[1])
+        elif kind == LICENSE_REF:
+            refs.add(node[1])
+        elif kind == WITH:
+            work.append(node[1])
+            exceptions.add(node[2])
+        else:
+            work += node[1]
+    return licenses, exceptions, refs
+
+
+def defined_license_refs(manifest_data):
+    """The license refs defined by a document: the licenseIds of its
+    hasExtractedLicensingInfos and the ids of its "DocumentRef-"
+    externalDocumentRefs, defining the "DocumentRef-x:LicenseRef-y"
+    refs of the documents they refer to. Malformed entries (schema
+    errors) are skipped."""
+    refs = set()
+    if not isinstance(manifest_data, dict):
+        return refs
+    infos = manifest_data.get('hasExtractedLicensingInfos', [])
+    for info in infos if isinstance(infos, list) else []:
+        if isinstance(info, dict) and 'licenseId' in info:
+            refs.add(info['licenseId'])
+    doc_refs = manifest_data.get('externalDocumentRefs', [])
+    for doc_ref in doc_refs if isinstance(doc_refs, list) else []:
+        doc_ref_id = doc_ref.get('externalDocumentId') if isinstance(doc_ref, dict) else None
+        if isinstance(doc_ref_id, str) and doc_ref_id.startswith("DocumentRef-"):
+            refs.add(doc_ref_id)
+    return refs
+
+
+def undefined_refs(refs, license_refs):
+    """The license refs of refs not defined by license_refs (as returned
+    by defined_license_refs()), sorted"""
+    return sorted([ ref for ref in refs if ref not in license_refs and ref.split(":")[0] not in license_refs ])
+
+
+def allowed_license_keys(allowed_licenses):
+    """Normalize a list of allowed licenses, strings or dicts with a
+    "key", to a frozenset of license identifiers"""
+    keys = set()
+    for lic_map in allowed_licenses:
+        if isinstance(lic_map, str):
+            keys.add(lic_map)
+        else:
+            keys.add(lic_map['key'])
+    return frozenset(keys)
+
+
+class LicenseChecker:
+    """Checks that the identifiers in license expressions are SPDX
+    licenses/exceptions or among the allowed licenses. License refs
+    (LicenseRef-...) must be allowed or defined in the document
+    (license_refs, see defined_license_refs()).
+
+    The outcome for an expression is memoized, since the same few
+    expressions typically are used by most packages."""
+
+    def __init__(self, spdx_licenses, spdx_exceptions, allowed_licenses):
+        self.spdx_licenses = frozenset(spdx_licenses)
+        self.spdx_exceptions = frozenset(spdx_exceptions)
+        self.allowed_licenses = allowed_licenses
+        self.allowed_keys = allowed_license_keys(allowed_licenses)
+        self.results = {}
+
+    def _check(self, license_expression):
+        """Return (unknown identifiers, license refs) of an expression"""
+        if license_expression in SPECIAL_VALUES:
+            return (), frozenset()
+        licenses, exceptions, refs = identifiers(parse(license_expression, self.allowed_keys))
+        unknown = [ lic for lic in licenses if lic not in self.spdx_licenses and lic not in self.allowed_keys ]
+        unknown += [ exc for exc in exceptions if exc not in self.spdx_exceptions and exc not in self.allowed_keys ]
+        refs = frozenset([ ref for ref in refs if ref not in self.allowed_keys ])
+        return tuple(sorted(unknown)), refs
+
+    def license_refs(self, license_expression):
+        """Check the licenses of an expression, as check() does, but
+        return the license refs (not among the allowed licenses) instead
+        of checking they are defined in the document. For documents where
+        the definitions are not known yet, e.g. when streaming."""
+        result = self.results.get(license_expression)
+        if result == None:
+            result = self._check(license_expression)
+            self.results[license_expression] = result
+        unknown, refs = result
+        if unknown != ():
+            raise self.error(unknown[0])
+        return refs
+
+    def check(self, license_expression, license_refs = ()):
+        refs = self.license_refs(license_expression)
+        if refs != frozenset():
+            unknown = undefined_refs(refs, license_refs)
+            if unknown != []:
+                raise self.error(unknown[0])
+
+    def error(self, identifier):
+        return SPDXValidationException("License \"" + str(identifier) + "\" not SPDX or among allowed licenses: " + str(self.allowed_licenses))
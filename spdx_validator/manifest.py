@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+DOCUMENT_REF_PREFIX = "DocumentRef-"
+
+
+class IndexedManifest:
+    """A parsed manifest with lookup tables, built once when the
+    manifest is loaded, for the lookups done per relationship.
+
+    Where the manifest contains duplicates (e.g. two packages with the
+    same SPDXID) the last one is used."""
+
+    def __init__(self, data):
+        self.data = data
+
+        self.packages_by_id = {}
+        for pkg in data.get('packages', []):
+            self.packages_by_id[pkg['SPDXID']] = pkg
+
+        self.doc_refs = data.get('externalDocumentRefs')
+        self.doc_refs_by_id = {}
+        # references not in "DocumentRef-" form, by their id (without
+        # any ":..." suffix), checked against the documents' checksums
+        self.checksum_refs_by_id = {}
+        self.has_document_refs = False
+        for doc_ref in self.doc_refs or []:
+            external_doc_id = doc_ref['externalDocumentId']
+            self.doc_refs_by_id[external_doc_id] = doc_ref
+            if external_doc_id.startswith(DOCUMENT_REF_PREFIX):
+                self.has_document_refs = True
+            else:
+                doc_ref_id = external_doc_id.split(":")[0].replace(DOCUMENT_REF_PREFIX, "")
+                self.checksum_refs_by_id.setdefault(doc_ref_id, []).append(doc_ref)
+
+    def name(self):
+        return self.data['name']
+
+    def namespace(self):
+        return self.data['documentNamespace']
+
+    def relationships(self):
+        return self.data.get('relationships', [])
+
+    def indexed_relationships(self):
+        """(index in the document, relationship) pairs"""
+        return enumerate(self.relationships())
+
+    def package(self, spdx_id):
+        return self.packages_by_id.get(spdx_id)
+
+    def qualified_package(self, elem_id):
+        """The package referred to as "<document name>:<SPDXID>\""""
+        prefix = self.data['name'] + ":"
+        if not elem_id.startswith(prefix):
+            return None
+        return self.packages_by_id.get(elem_id[len(prefix):])
+
+    def spdx_document(self, external_doc_id):
+        """The spdxDocument of the external document reference"""
+        doc_ref = self.doc_refs_by_id.get(external_doc_id)
+        if doc_ref == None:
+            return None
+        return doc_ref['spdxDocument']
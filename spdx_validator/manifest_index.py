@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import logging
+import os
+
+from spdx_validator.exception import SPDXValidationException
+
+SPDX_FILE_SUFFIXES = [ ".json", ".yml", ".yaml" ]
+
+
+def _add(index, key, path):
+    paths = index.setdefault(key, [])
+    if path not in paths:
+        paths.append(path)
+
+
+class ManifestIndex:
+    """Index of the SPDX files in a list of directories.
+
+    The directories are scanned (recursively, skipping hidden
+    directories, unless recursive is False) once, on the first lookup.
+    Files can then be looked up by their path relative to one of the
+    directories, by file name or, when reading all files to find it is
+    needed, by documentNamespace or document name."""
+
+    def __init__(self, spdx_dirs, parser, recursive = True):
+        self.spdx_dirs = spdx_dirs
+        self.parser = parser
+        self.recursive = recursive
+        self.clear()
+
+    def clear(self):
+        """Forget the scanned files, the directories are scanned again
+        on the next lookup"""
+        self.top_files_by_name = None
+        self.files_by_name = None
+        self.files_by_namespace = None
+        self.files_by_doc_name = None
+
+    def _scan(self):
+        self.top_files_by_name = {}
+        self.files_by_name = {}
+        seen = {}
+        for spdx_dir in self.spdx_dirs:
+            for root, dirs, files in os.walk(spdx_dir):
+                if self.recursive:
+                    dirs[:] = sorted([ d for d in dirs if not d.startswith(".") ])
+                else:
+                    dirs[:] = []
+                for f in sorted(files):
+                    if os.path.splitext(f)[1].lower() not in SPDX_FILE_SUFFIXES:
+                        continue
+                    path = os.path.join(root, f)
+                    # the same file, found through different directories,
+                    # is kept once
+                    real_path = os.path.realpath(path)
+                    path = seen.setdefault(real_path, path)
+                    if os.path.normpath(root) == os.path.normpath(spdx_dir):
+                        _add(self.top_files_by_name, f, path)
+                    _add(self.files_by_name, f, path)
+        logging.debug("Indexed " + str(len(seen)) + " files in " + str(self.spdx_dirs))
+
+    def _read_documents(self):
+        self.files_by_namespace = {}
+        self.files_by_doc_name = {}
+        for paths in self.files_by_name.values():
+            for path in paths:
+                try:
+                    data = self.parser.load(path)
+                    if 'documentNamespace' in data:
+                        _add(self.files_by_namespace, data['documentNamespace'], path)
+                    if 'name' in data:
+                        _add(self.files_by_doc_name, data['name'], path)
+                except Exception as e:
+                    logging.debug("Could not index " + path + ": " + str(e))
+
+    def candidates(self, spdx_doc):
+        """Return the files matching spdx_doc, tried as a path relative
+        to the directories, a file directly in one of the directories, a
+        file name anywhere below them, a documentNamespace and a document
+        name (in that order, until some file matches)"""
+        if os.path.isabs(spdx_doc):
+            if os.path.isfile(spdx_doc):
+                return [ spdx_doc ]
+            return []
+
+        if os.path.dirname(spdx_doc) != "":
+            # a path, relative to the directories
+            files = []
+            real_paths = set()
+            for spdx_dir in self.spdx_dirs:
+                path = os.path.join(spdx_dir, spdx_doc)
+                if os.path.isfile(path) and os.path.realpath(path) not in real_paths:
+                    real_paths.add(os.path.realpath(path))
+                    files.append(path)
+            if files != []:
+                return files
+
+        if self.top_files_by_name == None:
+            self._scan()
+
+        files = self.top_files_by_name.get(spdx_doc, [])
+        if files == []:
+            files = self.files_by_name.get(os.path.basename(spdx_doc), [])
+        if files == []:
+            if self.files_by_namespace == None:
+                self._read_documents()
+            files = self.files_by_namespace.get(spdx_doc, [])
+            if files == []:
+                files = self.files_by_doc_name.get(spdx_doc, [])
+        return files
+
+    def find(self, spdx_doc):
+        """Return the one file matching spdx_doc, raise an exception if
+        none or more than one file matches"""
+        files = self.candidates(spdx_doc)
+        files_cnt = len(files)
+        if files_cnt == 0:
+            raise SPDXValidationException("Could not find manifest file for : " + str(spdx_doc))
+
+        if files_cnt > 1:
+            raise SPDXValidationException("Found " + str(files_cnt) + " manifest files for : " + str(spdx_doc))
+
+        return files[0]
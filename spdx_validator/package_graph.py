@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+#
+# Compact in-memory model of the packages, and the dependencies between
+# them, found while validating. On large recursive runs this is most of
+# what a validator keeps: a record (with __slots__) of the package
+# fields validation and formatting use, instead of the package dict, and
+# integer ids, in arrays, instead of "<document name>:<SPDXID>"
+# strings. The strings kept are interned, so the SPDXIDs, names and
+# licenses repeated across documents are stored once.
+#
+
+import sys
+from array import array
+
+from spdx_validator.graph import DependencyGraph
+
+# the package fields kept, also by the streaming validator (the full
+# package is in its document, see SPDXValidator.package_data())
+PACKAGE_SUMMARY_KEYS = [ "SPDXID", "name", "versionInfo", "licenseConcluded" ]
+
+
+def _intern(value):
+    if type(value) == str:
+        return sys.intern(value)
+    return value
+
+
+class PackageRecord:
+    """The fields (PACKAGE_SUMMARY_KEYS) of a package used after it is
+    validated"""
+
+    __slots__ = [ 'spdx_id', 'name', 'version', 'license' ]
+
+    def __init__(self, spdx_id, name, version = None, license = None):
+        self.spdx_id = _intern(spdx_id)
+        self.name = _intern(name)
+        self.version = _intern(version)
+        self.license = _intern(license)
+
+    @staticmethod
+    def from_package(package):
+        return PackageRecord(package['SPDXID'], package.get('name'), package.get('versionInfo'), package.get('licenseConcluded'))
+
+    def to_dict(self):
+        """The package as a dict, with the SPDX keys, as used by the
+        formatters"""
+        package = { 'SPDXID': self.spdx_id, 'name': self.name }
+        if self.version != None:
+            package['versionInfo'] = self.version
+        if self.license != None:
+            package['licenseConcluded'] = self.license
+        return package
+
+    def __repr__(self):
+        return "PackageRecord(" + repr(self.to_dict()) + ")"
+
+
+class PackageGraph:
+    """The packages checked while validating, by their "<document
+    name>:<SPDXID>" key, and the (DYNAMIC_LINK) dependencies of packages
+    on them.
+
+    Each key is given an integer id, the index in keys and records, when
+    first seen. As in the dependencies dict the validator used to keep,
+    a package depending on others is identified by its SPDXID only (a
+    node) and its dependencies by their keys: adjacency maps a node id
+    to an array of key ids and key_nodes the key ids to the node ids of
+    their SPDXIDs."""
+
+    def __init__(self):
+        self.ids = {}
+        self.keys = []
+        self.records = []
+        self.key_nodes = array('i')
+        self.nodes = {}
+        self.node_names = []
+        self.adjacency = {}
+        # key ids, in the order the packages were checked
+        self.checked = array('i')
+
+    def _node(self, spdx_id):
+        node = self.nodes.get(spdx_id)
+        if node == None:
+            node = len(self.node_names)
+            spdx_id = _intern(spdx_id)
+            self.nodes[spdx_id] = node
+            self.node_names.append(spdx_id)
+        return node
+
+    def key_id(self, key):
+        """The id of key, added if new"""
+        key_id = self.ids.get(key)
+        if key_id == None:
+            key_id = len(self.keys)
+            key = _intern(key)
+            self.ids[key] = key_id
+            self.keys.append(key)
+            self.records.append(None)
+            parts = key.split(":")
+            self.key_nodes.append(self._node(parts[1] if len(parts) > 1 else key))
+        return key_id
+
+    def add_package(self, key, package):
+        """Store package (a dict) as checked, as a PackageRecord"""
+        self.add_record(key, PackageRecord.from_package(package))
+
+    def add_record(self, key, record):
+        """Store the PackageRecord record as checked"""
+        key_id = self.key_id(key)
+        if self.records[key_id] == None:
+            self.checked.append(key_id)
+        self.records[key_id] = record
+
+    def is_checked(self, key):
+        key_id = self.ids.get(key)
+        return key_id != None and self.records[key_id] != None
+
+    def package(self, key):
+        """The PackageRecord of key, None if not checked"""
+        key_id = self.ids.get(key)
+        if key_id == None:
+            return None
+        return self.records[key_id]
+
+    def add_dependency(self, spdx_id, key):
+        """Add a dependency of the package spdx_id on the package key"""
+        node = self._node(spdx_id)
+        dependencies = self.adjacency.get(node)
+        if dependencies == None:
+            dependencies = array('i')
+            self.adjacency[node] = dependencies
+        dependencies.append(self.key_id(key))
+
+    def dependency_graph(self):
+        """A DependencyGraph over the node and key ids"""
+        return DependencyGraph(self.adjacency, self.key_nodes.__getitem__)
+
+    def closure(self, graph, spdx_id):
+        """The PackageRecords of the transitive dependencies of the
+        package spdx_id, graph as returned by dependency_graph()"""
+        node = self.nodes.get(spdx_id)
+        if node == None:
+            return []
+        return [ self.records[key_id] for key_id in graph.closure(node) ]
+
+    def closure_keys(self, graph, spdx_id):
+        """As closure(), but the keys of the packages"""
+        node = self.nodes.get(spdx_id)
+        if node == None:
+            return []
+        return [ self.keys[key_id] for key_id in graph.closure(node) ]
+
+    def package_dict(self, key):
+        """The package key as a dict, with the fields of its record"""
+        return self.package(key).to_dict()
+
+    def checked_packages(self, package_dict = None):
+        """The checked packages, as dicts by key. package_dict (by
+        default the method) returns the dict of a key"""
+        package_dict = package_dict or self.package_dict
+        return { self.keys[key_id]: package_dict(self.keys[key_id]) for key_id in self.checked }
+
+    def dag(self, top_keys, closure_keys = [], package_dict = None):
+        """The packages top_keys and their (checked) dependencies, each
+        once, and the dependencies between them, as a dict with:
+         - 'packages': the package dicts, with an 'id' (the index in the
+           list)
+         - 'top': the ids of the packages top_keys
+         - 'edges': [ package id, dependency id ] pairs, each once
+         - 'closures' (if closure_keys): the id and the ids of the
+           transitive dependencies of each package closure_keys
+        The size is linear in the number of packages and dependencies,
+        unlike the closures of all packages. Dependencies not checked
+        are left out. package_dict is as in checked_packages()."""
+        package_dict = package_dict or self.package_dict
+        reachable = set()
+        work = [ self.ids[key] for key in top_keys if self.is_checked(key) ]
+        while work != []:
+            key_id = work.pop()
+            if key_id not in reachable:
+                reachable.add(key_id)
+                work.extend(self.adjacency.get(self.key_nodes[key_id], []))
+
+        ids = {}
+        packages = []
+        for key_id in self.checked:
+            if key_id not in reachable:
+                continue
+            ids[key_id] = len(packages)
+            package = { 'id': len(packages) }
+            package.update(package_dict(self.keys[key_id]))
+            packages.append(package)
+
+        edges = []
+        for key_id in ids:
+            seen = set()
+            for dep in self.adjacency.get(self.key_nodes[key_id], []):
+                dep_id = ids.get(dep)
+                if dep_id != None and dep_id not in seen:
+                    seen.add(dep_id)
+                    edges.append([ ids[key_id], dep_id ])
+
+        dag = {
+            'packages': packages,
+            'top': [ ids[self.ids[key]] for key in top_keys if self.is_checked(key) ],
+            'edges': edges,
+        }
+        if closure_keys != []:
+            graph = self.dependency_graph()
+            dag['closures'] = [ { 'id': ids[self.ids[key]],
+                                  'dependencies': [ ids[dep] for dep in graph.closure(self.key_nodes[self.ids[key]]) if dep in ids ] }
+                                for key in closure_keys if self.is_checked(key) ]
+        return dag
+
+    def dependencies(self):
+        """The dependencies as a dict: SPDXID to list of keys"""
+        return { self.node_names[node]: [ self.keys[key_id] for key_id in key_ids ]
+                 for node, key_ids in self.adjacency.items() }
+
+
+def dag_closure(dag, package_id):
+    """The ids of the transitive dependencies of the package package_id
+    in dag (as returned by PackageGraph.dag()), in the order of
+    PackageGraph.closure()"""
+    adjacency = {}
+    for package, dependency in dag['edges']:
+        adjacency.setdefault(package, []).append(dependency)
+    return DependencyGraph(adjacency, lambda dependency: dependency).closure(package_id)
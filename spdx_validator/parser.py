@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+#
+# Parser backends for reading SPDX files.
+#
+# JSON files are read as raw bytes (or a memory mapped buffer) and
+# parsed with orjson, if installed, or the json module. YAML files are
+# parsed with the libyaml based CSafeLoader, if PyYAML is built with
+# libyaml, or the pure Python SafeLoader. orjson and yaml are imported
+# when the first file needing them is read.
+#
+
+import importlib.util
+import json
+import logging
+import mmap
+import os
+
+from spdx_validator.exception import SPDXValidationException
+
+BACKEND_AUTO = "auto"
+
+JSON_BACKEND_JSON = "json"
+JSON_BACKEND_ORJSON = "orjson"
+JSON_BACKENDS = [ BACKEND_AUTO, JSON_BACKEND_JSON, JSON_BACKEND_ORJSON ]
+
+YAML_BACKEND_PYTHON = "python"
+YAML_BACKEND_LIBYAML = "libyaml"
+YAML_BACKENDS = [ BACKEND_AUTO, YAML_BACKEND_PYTHON, YAML_BACKEND_LIBYAML ]
+
+JSON_SUFFIXES = [ ".json" ]
+YAML_SUFFIXES = [ ".yaml", ".yml" ]
+
+
+def available_json_backends():
+    backends = [ JSON_BACKEND_JSON ]
+    if importlib.util.find_spec("orjson") != None:
+        backends.append(JSON_BACKEND_ORJSON)
+    return backends
+
+
+def available_yaml_backends():
+    import yaml
+    backends = [ YAML_BACKEND_PYTHON ]
+    if hasattr(yaml, "CSafeLoader"):
+        backends.append(YAML_BACKEND_LIBYAML)
+    return backends
+
+
+class ManifestParser:
+    """Reads SPDX files, JSON or YAML (decided by the file suffix), with
+    the selected backends. "auto" picks the fastest available backend,
+    asking for a backend that is not available raises an
+    SPDXValidationException."""
+
+    def __init__(self, json_backend = BACKEND_AUTO, yaml_backend = BACKEND_AUTO, use_mmap = False):
+        self.json_backend = self._select(json_backend, JSON_BACKENDS, available_json_backends())
+        if yaml_backend not in YAML_BACKENDS:
+            raise SPDXValidationException("Unsupported parser backend (" + str(yaml_backend) + ")")
+        self.requested_yaml_backend = yaml_backend
+        self._yaml_backend = None
+        self.use_mmap = use_mmap
+        logging.debug("JSON parser backend: " + self.json_backend)
+
+    @property
+    def yaml_backend(self):
+        """The YAML backend, selected (importing yaml) on first use"""
+        if self._yaml_backend == None:
+            self._yaml_backend = self._select(self.requested_yaml_backend, YAML_BACKENDS, available_yaml_backends())
+            logging.debug("YAML parser backend: " + self._yaml_backend)
+        return self._yaml_backend
+
+    def _yaml_loader(self):
+        import yaml
+        if self.yaml_backend == YAML_BACKEND_LIBYAML:
+            return yaml.CSafeLoader
+        return yaml.SafeLoader
+
+    def _select(self, backend, backends, available):
+        if backend not in backends:
+            raise SPDXValidationException("Unsupported parser backend (" + str(backend) + ")")
+        if backend == BACKEND_AUTO:
+            return available[-1]
+        if backend not in available:
+            raise SPDXValidationException("Parser backend not available (" + str(backend) + ")")
+        return backend
+
+    def is_json(self, file_name):
+        return os.path.splitext(file_name)[1].lower() in JSON_SUFFIXES
+
+    def is_yaml(self, file_name):
+        return os.path.splitext(file_name)[1].lower() in YAML_SUFFIXES
+
+    def loads_json(self, data):
+        """Parse JSON from bytes (or, with orjson, a buffer)"""
+        if self.json_backend == JSON_BACKEND_ORJSON:
+            import orjson
+            return orjson.loads(data)
+        return json.loads(data)
+
+    def _load_json(self, f):
+        if self.use_mmap and self.json_backend == JSON_BACKEND_ORJSON and os.fstat(f.fileno()).st_size > 0:
+            import orjson
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                with memoryview(m) as view:
+                    return orjson.loads(view)
+        return self.loads_json(f.read())
+
+    def loads(self, file_name, data):
+        """Parse the content (bytes) of a file, JSON or YAML decided by
+        the file name as in load()"""
+        if self.is_json(file_name):
+            return self.loads_json(data)
+        elif self.is_yaml(file_name):
+            import yaml
+            return yaml.load(data, Loader=self._yaml_loader())
+        raise SPDXValidationException("Unsupported file type: " + str(file_name))
+
+    def load(self, file_name):
+        """Parse a file. Parse errors from the backends (e.g.
+        json.decoder.JSONDecodeError) are not caught."""
+        if self.is_json(file_name):
+            with open(file_name, 'rb') as f:
+                return self._load_json(f)
+        elif self.is_yaml(file_name):
+            import yaml
+            loader = self._yaml_loader()
+            with open(file_name, 'rb') as f:
+                return yaml.load(f, Loader=loader)
+        raise SPDXValidationException("Unsupported file type: " + str(file_name))
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import asyncio
+import concurrent.futures
+import json
+import logging
+import threading
+
+from spdx_validator.exception import SPDXValidationException
+from spdx_validator.manifest import DOCUMENT_REF_PREFIX
+from spdx_validator.manifest import IndexedManifest
+from spdx_validator.stats import PHASE_PARSE
+from spdx_validator.stats import PHASE_SCHEMA
+
+# validators in worker processes (or threads), one per configuration
+# and thread, since validators (their stats and caches) are not thread
+# safe
+_WORKER = threading.local()
+
+
+def worker_validator(config):
+    """Return a validator, created from config (see
+    SPDXValidator.config()), to use in this worker process or thread"""
+    from spdx_validator.validator import SPDXValidator
+    key = json.dumps(config)
+    validators = getattr(_WORKER, 'validators', None)
+    if validators == None:
+        validators = {}
+        _WORKER.validators = validators
+    validator = validators.get(key)
+    if validator == None:
+        checksum_cache = None
+        if config['checksum_cache_dir'] != None:
+            from spdx_validator.cache import DiskCache
+            from spdx_validator.checksum import ChecksumCache
+            checksum_cache = ChecksumCache(DiskCache(config['checksum_cache_dir'], config['checksum_cache_size']))
+        result_cache = None
+        if config['result_cache_dir'] != None:
+            from spdx_validator.cache import DiskCache
+            from spdx_validator.result_cache import ResultCache
+            result_cache = ResultCache(DiskCache(config['result_cache_dir'], config['result_cache_size']))
+        validator = SPDXValidator(spdx_version = config['spdx_version'],
+                                  schema_file = config['schema_file'],
+                                  spdx_dirs = config['spdx_dirs'],
+                                  allowed_licenses = config['allowed_licenses'],
+                                  schema_engine = config['schema_engine'],
+                                  checksum_cache = checksum_cache,
+                                  json_backend = config['json_backend'],
+                                  yaml_backend = config['yaml_backend'],
+                                  use_mmap = config['use_mmap'],
+                                  streaming = config['streaming'],
+                                  result_cache = result_cache,
+                                  collect_errors = config['collect_errors'],
+                                  max_errors = config['max_errors'],
+                                  max_documents = config['max_documents'],
+                                  debug = config['debug'])
+        validators[key] = validator
+    return validator
+
+
+def prevalidate_file(config, spdx_file, content = None, with_stats = False):
+    """Read (unless content, the bytes of the file, is given) and
+    validate (licenses and schema) a file, in a worker process or
+    thread. Returns a PrevalidatedManifest, with the stats of the
+    validation if with_stats."""
+    validator = worker_validator(config)
+    if with_stats:
+        validator.stats.reset()
+    prevalidated = _prevalidate(validator, spdx_file, content)
+    if with_stats:
+        prevalidated.stats = validator.stats.to_dict()
+    return prevalidated
+
+
+def _prevalidate(validator, spdx_file, content):
+    from spdx_validator.validator import PrevalidatedManifest
+    content_hash, cached = validator._cached_result(spdx_file, content)
+    if cached != None:
+        return cached
+    manifest_data = None
+    stage = PrevalidatedManifest.STAGE_READ
+    try:
+        with validator._phase(PHASE_PARSE, file = spdx_file):
+            manifest_data = validator._read_manifest(spdx_file, content)
+        stage = PrevalidatedManifest.STAGE_PACKAGES
+        validator._validate_licenses(spdx_file, manifest_data)
+        stage = PrevalidatedManifest.STAGE_SCHEMA
+        with validator._phase(PHASE_SCHEMA, file = spdx_file):
+            validator.validate_json(manifest_data)
+    except SPDXValidationException as e:
+        if stage != PrevalidatedManifest.STAGE_READ:
+            validator._store_result(content_hash, manifest_data, stage, str(e))
+        return PrevalidatedManifest(manifest_data, stage, str(e))
+    validator._store_result(content_hash, manifest_data)
+    return PrevalidatedManifest(manifest_data)
+
+
+def linked_documents(validator, manifest_data):
+    """The documents linked (DYNAMIC_LINK) from manifest_data, in the
+    order the relationship walk visits them, as (file, checksum
+    algorithms) pairs: the algorithms the walk checks the file's
+    checksum with"""
+    documents = []
+    manifest = IndexedManifest(manifest_data)
+    for relationship in manifest_data.get('relationships', []):
+        if relationship['relationshipType'] != 'DYNAMIC_LINK':
+            continue
+        spdx_doc = manifest.spdx_document(relationship['spdxElementId'].split(":")[0])
+        if spdx_doc == None:
+            continue
+        try:
+            f = validator._find_manifest_file(spdx_doc)
+        except SPDXValidationException:
+            # reported by the relationship walk
+            continue
+        ext_doc_ref = relationship['spdxElementId'].replace(DOCUMENT_REF_PREFIX, "").split(":")[0]
+        algorithms = [ doc_ref['checksum']['algorithm'] for doc_ref in manifest.checksum_refs_by_id.get(ext_doc_ref, []) ]
+        documents.append((f, algorithms))
+    return documents
+
+
+def _read_file(file_name):
+    with open(file_name, 'rb') as f:
+        return f.read()
+
+
+class ParallelResolver:
+    """Finds the documents linked (DYNAMIC_LINK) from a document,
+    directly or indirectly, and validates them on a process pool.
+
+    The documents are handled level by level, breadth first, since the
+    links of a document are known only once it is read. The results are
+    stored in the validator's prevalidated dict, and the (serial)
+    relationship walk in validate_file then uses them instead of
+    validating the documents itself. Since the walk decides the order
+    in which results are merged and errors raised, the outcome is the
+    same as in a serial run."""
+
+    def __init__(self, validator, jobs):
+        self.validator = validator
+        self.jobs = jobs
+
+    def linked_files(self, manifest_data):
+        """Files of the documents linked from manifest_data, in the
+        order the relationship walk visits them"""
+        return [ f for f, algorithms in linked_documents(self.validator, manifest_data) ]
+
+    def resolve(self, spdx_file):
+        config = self.validator.config()
+        seen = set([ spdx_file ])
+        level = [ spdx_file ]
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.jobs) as executor:
+            while level != []:
+                logging.debug("Validating " + str(len(level)) + " documents in parallel")
+                results = executor.map(prevalidate_file, [ config ] * len(level), level, [ None ] * len(level), [ True ] * len(level))
+                next_level = []
+                for f, prevalidated in zip(level, results):
+                    # the time spent, and counted, in the workers
+                    self.validator.stats.merge(prevalidated.stats)
+                    prevalidated.stats = None
+                    self.validator.prevalidated[f] = prevalidated
+                    if prevalidated.error != None:
+                        continue
+                    for linked in self.linked_files(prevalidated.data):
+                        if linked not in seen:
+                            seen.add(linked)
+                            next_level.append(linked)
+                level = next_level
+
+
+class AsyncResolver:
+    """Reads the documents linked (DYNAMIC_LINK) from a document,
+    directly or indirectly, with asyncio: at most concurrency files are
+    read or hashed at a time, in a thread pool, so that the latency of
+    e.g. a network file system is overlapped. The (CPU bound) parsing
+    and validation is done in executor, a thread or process pool, by
+    default the event loop's.
+
+    The links of a document are followed as soon as it is validated,
+    not level by level. The linked files are also hashed, with the
+    algorithms of the externalDocumentRefs linking them, into the
+    validator's (thread safe) checksum cache. The stats of the
+    validations in executor, each thread with its own validator, are
+    merged into the validator's. As with ParallelResolver, the results
+    are stored in the validator's prevalidated dict and the (serial)
+    relationship walk in validate_file decides the outcome."""
+
+    def __init__(self, validator, concurrency, executor = None):
+        if concurrency < 1:
+            raise SPDXValidationException("Concurrency must be at least 1 (" + str(concurrency) + ")")
+        self.validator = validator
+        self.concurrency = concurrency
+        self.executor = executor
+
+    async def resolve(self, spdx_file, recursive = True):
+        loop = asyncio.get_running_loop()
+        config = self.validator.config()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        seen = set([ spdx_file ])
+        hashed = set()
+        pending = []
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.concurrency) as io_executor:
+
+            async def io(fun, *args):
+                async with semaphore:
+                    return await loop.run_in_executor(io_executor, fun, *args)
+
+            async def hash_file(f, algorithm):
+                try:
+                    await io(self.validator.checksum_cache.hash_from_file, f, algorithm)
+                except (OSError, SPDXValidationException):
+                    # reported by the relationship walk
+                    pass
+
+            async def prevalidate(f):
+                try:
+                    content = await io(_read_file, f)
+                except OSError:
+                    # read, and reported, by prevalidate_file
+                    content = None
+                prevalidated = await loop.run_in_executor(self.executor, prevalidate_file, config, f, content, True)
+                # the time spent, and counted, in the executor
+                self.validator.stats.merge(prevalidated.stats)
+                prevalidated.stats = None
+                self.validator.prevalidated[f] = prevalidated
+                if not recursive or prevalidated.error != None:
+                    return
+                for linked, algorithms in linked_documents(self.validator, prevalidated.data):
+                    for algorithm in algorithms:
+                        if (linked, algorithm) not in hashed:
+                            hashed.add((linked, algorithm))
+                            pending.append(asyncio.ensure_future(hash_file(linked, algorithm)))
+                    if linked not in seen:
+                        seen.add(linked)
+                        pending.append(asyncio.ensure_future(prevalidate(linked)))
+
+            pending.append(asyncio.ensure_future(prevalidate(spdx_file)))
+            while pending != []:
+                await pending.pop(0)
+        logging.debug("Read %d documents concurrently", len(seen))
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+#
+# Persistent cache of per document validation results.
+#
+# A result is keyed by the content hash (SHA256) of the document and
+# everything else the result depends on: the schema (hash), SPDX
+# version, allowed licenses, SPDX license list version and validator
+# version. An unchanged document is then neither parsed nor validated
+# again; the relationship walk of recursive runs uses the stored
+# summary of the document instead, and validate_file() returns it.
+#
+# The cache is used by SPDXValidator only if given (result_cache), it
+# is on by default in the command line tool only.
+#
+
+from spdx_validator.cache import DiskCache
+from spdx_validator.cache import default_cache_dir
+
+RESULT_CACHE_SUB_DIR = "results"
+DEFAULT_RESULT_CACHE_SIZE = 256 * 1024 * 1024
+
+CONTENT_HASH = "SHA256"
+
+# the parts of a document the relationship walk, packages_deps() and
+# the formatters use
+SUMMARY_KEYS = [ 'SPDXID', 'spdxVersion', 'name', 'documentNamespace', 'packages', 'externalDocumentRefs' ]
+SUMMARY_RELATIONSHIP_TYPES = [ 'DYNAMIC_LINK' ]
+
+
+def summary(manifest_data):
+    """The summary of a document stored in the cache: the document
+    without files, snippets and relationships other than links"""
+    data = {}
+    for key in SUMMARY_KEYS:
+        if key in manifest_data:
+            data[key] = manifest_data[key]
+    data['relationships'] = [ relationship for relationship in manifest_data.get('relationships', [])
+                              if relationship.get('relationshipType') in SUMMARY_RELATIONSHIP_TYPES ]
+    return data
+
+
+class ResultCache:
+    """Validation results, per content hash and context (a list of the
+    other values the result depends on), stored in a DiskCache"""
+
+    def __init__(self, disk_cache = None):
+        if disk_cache == None:
+            disk_cache = DiskCache(default_cache_dir(RESULT_CACHE_SUB_DIR), DEFAULT_RESULT_CACHE_SIZE)
+        self.disk_cache = disk_cache
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, content_hash, context):
+        return [ content_hash ] + list(context)
+
+    def get(self, content_hash, context):
+        """Return the stored result, a dict with the document summary
+        (data) and the stage and message of the error (error_stage and
+        error, None if the document is valid), or None"""
+        result = self.disk_cache.get(self._key(content_hash, context))
+        if result == None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def put(self, content_hash, context, manifest_data, error_stage = None, error = None):
+        self.disk_cache.put(self._key(content_hash, context), {
+            'data': summary(manifest_data),
+            'error_stage': error_stage,
+            'error': error,
+        })
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import hashlib
+import json
+import logging
+
+from spdx_validator.exception import SPDXValidationException
+
+SCHEMA_ENGINE_JSONSCHEMA = "jsonschema"
+SCHEMA_ENGINE_CODEGEN = "codegen"
+SCHEMA_ENGINES = [ SCHEMA_ENGINE_JSONSCHEMA, SCHEMA_ENGINE_CODEGEN ]
+
+
+class SchemaRegistry:
+    """Process wide registry of compiled schema validators.
+
+    Checking a schema and building a jsonschema validator object is
+    expensive compared to validating a small document. The registry
+    does it once per (SPDX version, schema content hash, engine) and hands out
+    the same validator to every SPDXValidator in the process.
+    """
+
+    _validators = {}
+
+    @staticmethod
+    def schema_hash(schema_bytes):
+        return hashlib.sha256(schema_bytes).hexdigest()
+
+    @staticmethod
+    def validator(spdx_version, schema_file, engine = SCHEMA_ENGINE_JSONSCHEMA):
+        with open(schema_file, 'rb') as f:
+            schema_bytes = f.read()
+        return SchemaRegistry.validator_from_bytes(spdx_version, schema_bytes, engine)
+
+    @staticmethod
+    def validator_from_schema(spdx_version, schema, engine = SCHEMA_ENGINE_JSONSCHEMA):
+        """Validator for a schema built at run time (e.g. a sub schema)"""
+        schema_bytes = json.dumps(schema, sort_keys = True).encode()
+        return SchemaRegistry.validator_from_bytes(spdx_version, schema_bytes, engine)
+
+    @staticmethod
+    def validator_from_bytes(spdx_version, schema_bytes, engine = SCHEMA_ENGINE_JSONSCHEMA):
+        if engine not in SCHEMA_ENGINES:
+            raise SPDXValidationException("Unsupported schema engine (" + str(engine) + ")")
+        schema_hash = SchemaRegistry.schema_hash(schema_bytes)
+        key = (spdx_version, schema_hash, engine)
+        validator = SchemaRegistry._validators.get(key)
+        if validator is None:
+            logging.debug("Compiling schema: " + str(key))
+            if engine == SCHEMA_ENGINE_CODEGEN:
+                jsonschema_validator = SchemaRegistry.validator_from_bytes(spdx_version, schema_bytes)
+                validator = SchemaRegistry._generate(jsonschema_validator, schema_hash)
+            else:
+                validator = SchemaRegistry._compile(json.loads(schema_bytes))
+            SchemaRegistry._validators[key] = validator
+        return validator
+
+    @staticmethod
+    def _compile(schema):
+        import jsonschema
+        cls = jsonschema.validators.validator_for(schema)
+        try:
+            cls.check_schema(schema)
+        except jsonschema.exceptions.SchemaError as exc:
+            raise SPDXValidationException("Invalid schema: " + str(exc.message))
+        return cls(schema)
+
+    @staticmethod
+    def _generate(jsonschema_validator, schema_hash):
+        from spdx_validator.codegen import CodegenValidator
+        from spdx_validator.codegen import CodegenUnsupported
+        try:
+            return CodegenValidator(jsonschema_validator, schema_hash)
+        except CodegenUnsupported as e:
+            logging.info("Schema not supported by the codegen engine, using jsonschema: " + str(e))
+            return jsonschema_validator
+
+    @staticmethod
+    def clear():
+        SchemaRegistry._validators = {}
+
+
+def validate_instance(validator, instance):
+    """Validate instance with a compiled validator.
+
+    Raises the same error as jsonschema.validate() would, i.e. the
+    best match among all errors.
+    """
+    from jsonschema.exceptions import best_match
+    error = best_match(validator.iter_errors(instance))
+    if error is not None:
+        raise error
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+#
+# Validation daemon, "spdx-validator serve".
+#
+# Validation requests, the command line arguments and working
+# directory of a client (see client.py), are accepted as HTTP requests
+# over a Unix socket or a localhost TCP port:
+#
+#   POST /validate  {"argv": [...], "cwd": "..."}
+#   ->              {"exit_code": 0, "stdout": "...", "stderr": "..."}
+#   GET /status     {"status": "ok", "workers": 4}
+#
+# The Unix socket is only accessible by the user and, by default, in a
+# directory only the user may access. On a TCP port, where
+# any local user may connect, requests must carry a secret token
+# ("Authorization: Bearer <token>"), written by the daemon to a file
+# only the user may read. Requests with options writing files (e.g.
+# --output) are rejected: files are written by the daemon's user, the
+# client validates such requests itself.
+#
+# Requests are run, concurrently, by a pool of worker processes. Each
+# worker keeps its validators (one per set of validator options, with
+# compiled schemas and checksum caches) between requests.
+#
+
+import argparse
+import concurrent.futures
+import contextlib
+import hmac
+import http.server
+import io
+import json
+import logging
+import os
+import secrets
+import socketserver
+import stat
+import sys
+
+from spdx_validator.client import check_socket
+from spdx_validator.client import default_runtime_dir
+
+DEFAULT_HOST = "127.0.0.1"
+SOCKET_NAME = "spdx-validator.sock"
+TOKEN_NAME = "spdx-validator.token"
+
+VALIDATE_PATH = "/validate"
+STATUS_PATH = "/status"
+
+# the (argparse dest of) options writing files, and the option
+WRITING_OPTIONS = [ ('output', "--output"), ('error_report', "--error-report"), ('trace_file', "--trace"),
+                    ('cache_dir', "--cache-dir"), ('checksum_cache_dir', "--checksum-cache-dir") ]
+
+_WORKER_VALIDATORS = {}
+
+
+class RequestRejected(Exception):
+    pass
+
+
+def default_socket_path():
+    return os.path.join(default_runtime_dir(), SOCKET_NAME)
+
+
+def default_token_path():
+    return os.path.join(default_runtime_dir(), TOKEN_NAME)
+
+
+def make_private_dir(path):
+    """Create the directory path, only accessible by the user. Raises
+    OSError if it exists and is not the user's only"""
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077 != 0:
+        raise OSError("Directory " + path + " must be the user's, with permissions 0700")
+
+
+def write_token(token_file):
+    """Write a new secret token to token_file, readable by the user
+    only, and return it"""
+    token = secrets.token_hex(32)
+    if os.path.lexists(token_file):
+        os.unlink(token_file)
+    # created, not opened, so that no one else's file (or link) is used
+    fd = os.open(token_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(token)
+    return token
+
+
+def _worker_init():
+    # pay for the imports, and the default validator, before the first
+    # request
+    from spdx_validator.__main__ import parse
+    _warm_validator(parse([]))
+
+
+def _warm_validator(args):
+    from spdx_validator.__main__ import create_validator
+    from spdx_validator.__main__ import VALIDATOR_OPTIONS
+    key = [ os.getcwd() ]
+    for option in VALIDATOR_OPTIONS:
+        value = getattr(args, option)
+        if isinstance(value, list):
+            value = tuple(value)
+        key.append(value)
+    if args.schema_file != None and os.path.isfile(args.schema_file):
+        # a changed schema file is compiled again
+        key.append(os.stat(args.schema_file).st_mtime_ns)
+    key = tuple(key)
+
+    validator = _WORKER_VALIDATORS.get(key)
+    if validator == None:
+        validator = create_validator(args)
+        _WORKER_VALIDATORS[key] = validator
+    else:
+        validator.reset()
+        validator.stats.reset()
+        # files may have been added or removed since the last request
+        validator.manifest_index.clear()
+    return validator
+
+
+def _exit_code(exc):
+    if exc.code == None:
+        return 0
+    if isinstance(exc.code, int):
+        return exc.code
+    print(exc.code, file=sys.stderr)
+    return 1
+
+
+def run_request(argv, cwd):
+    """Run the command line argv, in directory cwd, in a worker process
+    and return the exit code and output"""
+    from spdx_validator.__main__ import parse
+    from spdx_validator.__main__ import run
+
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    exit_code = 0
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        try:
+            os.chdir(cwd)
+            args = parse(argv)
+            for dest, option in WRITING_OPTIONS:
+                if getattr(args, dest) != None:
+                    raise RequestRejected(option + " writes files, not accepted by the daemon")
+            run(args, _warm_validator(args))
+        except RequestRejected:
+            raise
+        except SystemExit as e:
+            exit_code = _exit_code(e)
+        except Exception as e:
+            logging.debug("Request failed: " + str(e))
+            print("Failed validating: " + str(e), file=sys.stderr)
+            exit_code = 1
+    return {
+        'exit_code': exit_code,
+        'stdout': stdout.getvalue(),
+        'stderr': stderr.getvalue(),
+    }
+
+
+class _RequestHandler(http.server.BaseHTTPRequestHandler):
+
+    def _reply(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _authorized(self):
+        token = self.server.validation_server.token
+        if token == None:
+            return True
+        authorization = self.headers.get("Authorization", "")
+        if hmac.compare_digest(authorization.encode(), ("Bearer " + token).encode()):
+            return True
+        self._reply(401, { 'error': "Unauthorized" })
+        return False
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        if self.path != STATUS_PATH:
+            self._reply(404, { 'error': "Not found: " + self.path })
+            return
+        self._reply(200, { 'status': "ok", 'workers': self.server.validation_server.workers })
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        if self.path != VALIDATE_PATH:
+            self._reply(404, { 'error': "Not found: " + self.path })
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length))
+            argv = [ str(arg) for arg in request['argv'] ]
+            cwd = str(request['cwd'])
+        except Exception as e:
+            self._reply(400, { 'error': "Bad request: " + str(e) })
+            return
+        future = self.server.validation_server.executor.submit(run_request, argv, cwd)
+        try:
+            reply = future.result()
+        except RequestRejected as e:
+            self._reply(403, { 'error': str(e) })
+            return
+        self._reply(200, reply)
+
+    def address_string(self):
+        # Unix socket clients have no address
+        if isinstance(self.client_address, tuple):
+            return self.client_address[0]
+        return "local"
+
+    def log_message(self, format, *args):
+        logging.debug(self.address_string() + " " + (format % args))
+
+
+class _TCPServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+class ValidationServer:
+    """Serves validation requests on a Unix socket (socket_path) or, if
+    port is given, on a TCP port on host, to clients with the token
+    written to token_file"""
+
+    def __init__(self, socket_path = None, host = DEFAULT_HOST, port = None, workers = None, token_file = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.socket_path = None
+        self.token = None
+        self.token_file = None
+        if port != None:
+            if token_file == None:
+                token_file = default_token_path()
+                make_private_dir(os.path.dirname(token_file))
+            self.token_file = token_file
+            self.token = write_token(self.token_file)
+            self.http_server = _TCPServer((host, port), _RequestHandler)
+            self.address = "http://" + host + ":" + str(self.http_server.server_address[1])
+        else:
+            if socket_path == None:
+                socket_path = default_socket_path()
+                make_private_dir(os.path.dirname(socket_path))
+            self.socket_path = socket_path
+            if os.path.lexists(self.socket_path):
+                # left by a previous daemon, not anything else
+                check_socket(self.socket_path)
+                os.unlink(self.socket_path)
+            # only the user may connect
+            old_umask = os.umask(0o077)
+            try:
+                self.http_server = _UnixServer(self.socket_path, _RequestHandler)
+            finally:
+                os.umask(old_umask)
+            self.address = self.socket_path
+        self.http_server.validation_server = self
+        self.executor = concurrent.futures.ProcessPoolExecutor(max_workers = self.workers,
+                                                               initializer = _worker_init)
+        # start (and warm) the workers now, not on the first requests
+        started = [ self.executor.submit(os.getpid) for i in range(self.workers) ]
+        concurrent.futures.wait(started)
+
+    def serve_forever(self):
+        logging.info("Serving on " + self.address + " with " + str(self.workers) + " workers")
+        self.http_server.serve_forever()
+
+    def shutdown(self):
+        self.http_server.shutdown()
+
+    def close(self):
+        self.http_server.server_close()
+        self.executor.shutdown()
+        if self.socket_path != None and os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        if self.token_file != None and os.path.exists(self.token_file):
+            os.unlink(self.token_file)
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(prog = "spdx-validator serve",
+                                     description = "Serve validation requests, from spdx-validator-client, with warm validators")
+    parser.add_argument('--socket', '-s',
+                        help='Unix socket to listen on (default: ' + default_socket_path() + ')',
+                        type=str,
+                        default=None)
+    parser.add_argument('--port', '-p',
+                        help='Listen on this TCP port, instead of a Unix socket',
+                        type=int,
+                        default=None)
+    parser.add_argument('--token-file',
+                        help='With --port, file to write the token clients must send to (default: ' + default_token_path() + ')',
+                        type=str,
+                        default=None)
+    parser.add_argument('--host',
+                        help='Host to listen on, with --port (default: ' + DEFAULT_HOST + ')',
+                        type=str,
+                        default=DEFAULT_HOST)
+    parser.add_argument('--workers', '-w',
+                        help='Number of worker processes (default: number of CPUs)',
+                        type=int,
+                        default=None)
+    parser.add_argument('-v', '--verbose',
+                        action='store_true',
+                        help='output verbose information to stderr',
+                        default=False)
+    args = parser.parse_args(argv)
+
+    level = logging.INFO
+    if args.verbose:
+        level = logging.DEBUG
+    logging.basicConfig(format='%(asctime)s:   %(message)s', datefmt='%Y-%m-%d %H:%M:%S', level=level)
+
+    try:
+        server = ValidationServer(args.socket, args.host, args.port, args.workers, args.token_file)
+    except OSError as e:
+        print("Could not start the server: " + str(e), file=sys.stderr)
+        sys.exit(1)
+    print("spdx-validator serving on " + server.address, file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+    return 0
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+#
+# Per phase timing and counters of validation runs, see
+# SPDXValidator.stats and the --stats option.
+#
+
+import json
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows
+    resource = None
+
+PHASE_PARSE = "parse"
+PHASE_SCHEMA = "schema"
+PHASE_LICENSE = "license"
+PHASE_CHECKSUM = "checksum"
+PHASE_RESOLVE = "resolve"
+PHASE_STREAM = "stream"
+PHASE_PREVALIDATE = "prevalidate"
+PHASES = [ PHASE_PARSE, PHASE_SCHEMA, PHASE_LICENSE, PHASE_CHECKSUM, PHASE_RESOLVE, PHASE_STREAM, PHASE_PREVALIDATE ]
+
+COUNTER_DOCUMENTS = "documents"
+COUNTER_BYTES_READ = "bytes_read"
+COUNTER_BYTES_HASHED = "bytes_hashed"
+COUNTER_PACKAGES = "packages"
+COUNTER_RELATIONSHIPS = "relationships"
+COUNTER_CHECKSUM_CACHE_HITS = "checksum_cache_hits"
+COUNTER_CHECKSUM_CACHE_MISSES = "checksum_cache_misses"
+COUNTER_LICENSE_CACHE_HITS = "license_cache_hits"
+COUNTER_LICENSE_CACHE_MISSES = "license_cache_misses"
+COUNTER_CHECKED_PACKAGE_HITS = "checked_package_hits"
+COUNTER_RESULT_CACHE_HITS = "result_cache_hits"
+COUNTER_RESULT_CACHE_MISSES = "result_cache_misses"
+COUNTERS = [ COUNTER_DOCUMENTS, COUNTER_BYTES_READ, COUNTER_BYTES_HASHED, COUNTER_PACKAGES, COUNTER_RELATIONSHIPS,
+             COUNTER_CHECKSUM_CACHE_HITS, COUNTER_CHECKSUM_CACHE_MISSES, COUNTER_LICENSE_CACHE_HITS,
+             COUNTER_LICENSE_CACHE_MISSES, COUNTER_CHECKED_PACKAGE_HITS, COUNTER_RESULT_CACHE_HITS,
+             COUNTER_RESULT_CACHE_MISSES ]
+
+STATS_FORMAT_TEXT = "text"
+STATS_FORMAT_JSON = "json"
+STATS_FORMATS = [ STATS_FORMAT_TEXT, STATS_FORMAT_JSON ]
+
+
+def peak_rss():
+    """Peak resident set size of this process, in bytes, or None if
+    not known"""
+    if resource == None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return rss
+    # kilobytes on Linux and the BSDs
+    return rss * 1024
+
+
+class PhaseStats:
+    """Accumulated wall and CPU time, in seconds, of a phase"""
+
+    def __init__(self):
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+
+    def to_dict(self):
+        return { 'calls': self.calls, 'wall': self.wall, 'cpu': self.cpu }
+
+
+class _Phase:
+
+    __slots__ = [ 'phase', 'wall', 'cpu' ]
+
+    def __init__(self, phase):
+        self.phase = phase
+
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.phase.calls += 1
+        self.phase.wall += time.perf_counter() - self.wall
+        self.phase.cpu += time.process_time() - self.cpu
+        return False
+
+
+class ValidationStats:
+    """Timing, per phase, and counters of the validations made by a
+    validator since it was created or reset()"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.phases = {}
+        for name in PHASES:
+            self.phases[name] = PhaseStats()
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.started = time.perf_counter()
+        self.cpu_started = time.process_time()
+        self.worker_peak_rss = None
+
+    def phase(self, name):
+        """Context manager adding the time spent in the block to phase
+        name"""
+        return _Phase(self.phases[name])
+
+    def count(self, name, value = 1):
+        self.counters[name] += value
+
+    def merge(self, stats):
+        """Add stats (a dict, as returned by to_dict(), e.g. from a worker
+        process) to these"""
+        for name, phase in stats['phases'].items():
+            self.phases[name].calls += phase['calls']
+            self.phases[name].wall += phase['wall']
+            self.phases[name].cpu += phase['cpu']
+        for name, value in stats['counters'].items():
+            self.counters[name] += value
+        rss = stats.get('peak_rss')
+        if rss != None and (self.worker_peak_rss == None or rss > self.worker_peak_rss):
+            self.worker_peak_rss = rss
+
+    def to_dict(self):
+        result = {
+            'wall': time.perf_counter() - self.started,
+            'cpu': time.process_time() - self.cpu_started,
+            'peak_rss': peak_rss(),
+            'phases': {},
+            'counters': dict(self.counters),
+        }
+        if self.worker_peak_rss != None:
+            result['worker_peak_rss'] = self.worker_peak_rss
+        for name, phase in self.phases.items():
+            if phase.calls > 0:
+                result['phases'][name] = phase.to_dict()
+        return result
+
+    def format(self, stats_format = STATS_FORMAT_TEXT):
+        stats = self.to_dict()
+        if stats_format == STATS_FORMAT_JSON:
+            return json.dumps(stats, indent=2)
+        lines = [ "%-22s %10.2f ms wall %10.2f ms cpu" % ("total", stats['wall'] * 1e3, stats['cpu'] * 1e3) ]
+        for name, phase in stats['phases'].items():
+            lines.append("%-22s %10.2f ms wall %10.2f ms cpu %8d calls" % (name, phase['wall'] * 1e3, phase['cpu'] * 1e3, phase['calls']))
+        for name, value in stats['counters'].items():
+            lines.append("%-22s %10d" % (name, value))
+        for key in [ 'peak_rss', 'worker_peak_rss' ]:
+            if stats.get(key) != None:
+                lines.append("%-22s %10.1f MB" % (key, stats[key] / 1e6))
+        return "\n".join(lines)
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+#
+# Streaming validation of (huge) SPDX JSON documents.
+#
+# The items of the "packages", "files" and "relationships" arrays are
+# read, one at a time, from an incremental reader (built in, or event
+# based using ijson, if installed) and validated against the item
+# schemas. The rest of the document (the "skeleton", the other top
+# level members) is small and validated as a whole. Only a summary of
+# each package, and the relationships needed when validating
+# recursively, are kept.
+#
+
+import codecs
+import copy
+import json
+import jsonschema
+import logging
+import re
+
+from spdx_validator.exception import SPDXValidationException
+from spdx_validator.license_expression import defined_license_refs
+from spdx_validator.license_expression import undefined_refs
+from spdx_validator.manifest import IndexedManifest
+from spdx_validator.package_graph import PACKAGE_SUMMARY_KEYS
+from spdx_validator.parser import BACKEND_AUTO
+from spdx_validator.schema import SchemaRegistry
+from spdx_validator.schema import validate_instance
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+STREAM_BACKEND_BUILTIN = "builtin"
+STREAM_BACKEND_IJSON = "ijson"
+STREAM_BACKENDS = [ BACKEND_AUTO, STREAM_BACKEND_BUILTIN, STREAM_BACKEND_IJSON ]
+
+STREAMED_ARRAYS = [ "packages", "files", "relationships" ]
+
+EVENT_MEMBER = "member"
+EVENT_ARRAY = "array"
+EVENT_ITEM = "item"
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+WHITESPACE_RE = re.compile(r"[ \t\n\r]*")
+
+
+def available_stream_backends():
+    """The available backends, the fastest last. The built in reader,
+    decoding each item with the (C) json decoder, is faster than
+    building the items from ijson events."""
+    backends = []
+    if ijson != None:
+        backends.append(STREAM_BACKEND_IJSON)
+    backends.append(STREAM_BACKEND_BUILTIN)
+    return backends
+
+
+def _parse_errors():
+    if ijson != None:
+        return (json.JSONDecodeError, ijson.JSONError)
+    return (json.JSONDecodeError, )
+
+
+class _BuiltinReader:
+    """Incremental reader of a JSON object, decoding one top level
+    member, or streamed array item, at a time from a buffer holding
+    (little more than) that value"""
+
+    def __init__(self, f, streamed, chunk_size = DEFAULT_CHUNK_SIZE):
+        self.f = f
+        self.streamed = streamed
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.json_decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        # read at least as much as is buffered, so a value needing many
+        # reads is decoded a logarithmic number of times
+        data = self.f.read(max(self.chunk_size, len(self.buf) - self.pos))
+        self.eof = data == b""
+        self.buf = self.buf[self.pos:] + self.decoder.decode(data, self.eof)
+        self.pos = 0
+
+    def _error(self, message):
+        return json.JSONDecodeError(message, self.buf, self.pos)
+
+    def _peek(self):
+        """The next non whitespace character, None at the end"""
+        while True:
+            self.pos = WHITESPACE_RE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if self.eof:
+                return None
+            self._fill()
+
+    def _expect(self, chars):
+        c = self._peek()
+        if c == None or c not in chars:
+            raise self._error("Expecting one of \"" + chars + "\"")
+        self.pos += 1
+        return c
+
+    def _value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self.json_decoder.raw_decode(self.buf, self.pos)
+                # a value at the end of the buffer (e.g. a number) may
+                # continue in the next chunk
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def events(self):
+        self._expect("{")
+        if self._peek() == "}":
+            self.pos += 1
+        else:
+            while True:
+                key = self._value()
+                if not isinstance(key, str):
+                    raise self._error("Expecting property name")
+                self._expect(":")
+                if key in self.streamed and self._peek() == "[":
+                    self.pos += 1
+                    yield (EVENT_ARRAY, key, None)
+                    if self._peek() == "]":
+                        self.pos += 1
+                    else:
+                        while True:
+                            yield (EVENT_ITEM, key, self._value())
+                            if self._expect(",]") == "]":
+                                break
+                else:
+                    yield (EVENT_MEMBER, key, self._value())
+                if self._expect(",}") == "}":
+                    break
+        if self._peek() != None:
+            raise self._error("Extra data")
+
+
+def _ijson_build(events, event, value):
+    builder = ijson.ObjectBuilder()
+    builder.event(event, value)
+    depth = 0
+    if event in ("start_map", "start_array"):
+        depth = 1
+    while depth > 0:
+        prefix, event, value = next(events)
+        builder.event(event, value)
+        if event in ("start_map", "start_array"):
+            depth += 1
+        elif event in ("end_map", "end_array"):
+            depth -= 1
+    return builder.value
+
+
+def _ijson_events(f, streamed):
+    events = ijson.parse(f, use_float = True)
+    prefix, event, value = next(events)
+    if event != "start_map":
+        raise json.JSONDecodeError("Expecting object", "", 0)
+    for prefix, event, value in events:
+        if event == "end_map":
+            # fails on data after the object
+            for prefix, event, value in events:
+                raise json.JSONDecodeError("Extra data", "", 0)
+            break
+        key = value
+        prefix, event, value = next(events)
+        if key in streamed and event == "start_array":
+            yield (EVENT_ARRAY, key, None)
+            for prefix, event, value in events:
+                if event == "end_array":
+                    break
+                yield (EVENT_ITEM, key, _ijson_build(events, event, value))
+        else:
+            yield (EVENT_MEMBER, key, _ijson_build(events, event, value))
+
+
+def document_events(f, backend = BACKEND_AUTO, streamed = STREAMED_ARRAYS):
+    """Events of the JSON object in the (binary) file f:
+
+      (EVENT_MEMBER, key, value) for the top level members
+      (EVENT_ARRAY, key, None)   when a streamed array starts
+      (EVENT_ITEM, key, item)    for each item of a streamed array
+
+    Invalid JSON raises json.JSONDecodeError (or ijson.JSONError)."""
+    if backend == BACKEND_AUTO:
+        backend = available_stream_backends()[-1]
+    if backend == STREAM_BACKEND_IJSON:
+        return _ijson_events(f, streamed)
+    return _BuiltinReader(f, streamed).events()
+
+
+class StreamedManifest(IndexedManifest):
+    """An IndexedManifest of a streamed document. data is the skeleton
+    of the document, with package summaries, and only the given
+    relationships are kept, at relationship_indexes in the document."""
+
+    def __init__(self, data, relationships, relationship_indexes = None):
+        super().__init__(data)
+        self.kept_relationships = relationships
+        if relationship_indexes == None:
+            relationship_indexes = list(range(len(relationships)))
+        self.relationship_indexes = relationship_indexes
+
+    def relationships(self):
+        return self.kept_relationships
+
+    def indexed_relationships(self):
+        return zip(self.relationship_indexes, self.kept_relationships)
+
+
+class StreamValidator:
+    """Validates SPDX JSON documents without loading them, see above.
+
+    The outcome is the same as for SPDXValidator reading the document,
+    with the exception of which error is reported for documents with
+    more than one error."""
+
+    def __init__(self, schema, spdx_version, schema_engine, license_checker, backend = BACKEND_AUTO):
+        if backend not in STREAM_BACKENDS:
+            raise SPDXValidationException("Unsupported stream backend (" + str(backend) + ")")
+        if backend not in available_stream_backends() + [ BACKEND_AUTO ]:
+            raise SPDXValidationException("Stream backend not available (" + str(backend) + ")")
+        self.backend = backend
+        self.license_checker = license_checker
+
+        self.item_validators = {}
+        skeleton_schema = copy.deepcopy(schema)
+        for key in STREAMED_ARRAYS:
+            array_schema = schema['properties'].get(key)
+            if array_schema == None:
+                continue
+            item_schema = copy.deepcopy(array_schema.get('items', {}))
+            if '$schema' in schema:
+                item_schema['$schema'] = schema['$schema']
+            self.item_validators[key] = SchemaRegistry.validator_from_schema(spdx_version, item_schema, schema_engine)
+            # the items are validated one by one, leave only the type
+            # check to the skeleton
+            skeleton_schema['properties'][key] = { k: v for k, v in array_schema.items() if k in ('type', 'description') }
+        self.skeleton_validator = SchemaRegistry.validator_from_schema(spdx_version, skeleton_schema, schema_engine)
+
+    def _validate_item(self, key, index, item):
+        try:
+            validate_instance(self.item_validators[key], item)
+        except jsonschema.exceptions.ValidationError as exc:
+            # report the location in the document
+            exc.path.extendleft([ index, key ])
+            exc.schema_path.extendleft([ 'items', key, 'properties' ])
+            raise SPDXValidationException(exc)
+
+    def validate(self, spdx_file, keep_relationships = False):
+        """Validate the document and return a StreamedManifest, keeping
+        the "DYNAMIC_LINK" relationships if keep_relationships"""
+        skeleton = {}
+        relationships = []
+        relationship_indexes = []
+        indexes = {}
+        pending_refs = set()
+        logging.debug("Stream validating file: %s", spdx_file)
+        try:
+            with open(spdx_file, 'rb') as f:
+                for event, key, value in document_events(f, self.backend):
+                    if event == EVENT_MEMBER:
+                        skeleton[key] = value
+                        continue
+                    if event == EVENT_ARRAY:
+                        skeleton[key] = []
+                        indexes[key] = 0
+                        continue
+
+                    index = indexes[key]
+                    indexes[key] = index + 1
+                    if key in self.item_validators:
+                        self._validate_item(key, index, value)
+                    if key == 'packages':
+                        # Validate concluded licenses have SPDX values
+                        pending_refs.update(self.license_checker.license_refs(value['licenseConcluded']))
+                        skeleton[key].append({ k: value[k] for k in PACKAGE_SUMMARY_KEYS if k in value })
+                    elif key == 'relationships':
+                        if keep_relationships and value.get('relationshipType') == 'DYNAMIC_LINK':
+                            relationships.append(value)
+                            relationship_indexes.append(index)
+        except _parse_errors() as e:
+            logging.debug(str(e))
+            raise SPDXValidationException("File not in correct JSON format: " + str(spdx_file))
+        except (OSError, UnicodeDecodeError) as e:
+            logging.debug(str(e))
+            raise SPDXValidationException("Could not open file: " + str(spdx_file))
+
+        try:
+            validate_instance(self.skeleton_validator, skeleton)
+        except jsonschema.exceptions.ValidationError as exc:
+            raise SPDXValidationException(exc)
+
+        unknown = undefined_refs(pending_refs, defined_license_refs(skeleton))
+        if unknown != []:
+            raise self.license_checker.error(unknown[0])
+
+        logging.debug("  %s items streamed", indexes)
+        return StreamedManifest(skeleton, relationships, relationship_indexes)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+#
+# Tracing of validations, for embedding the validator in services.
+#
+# Subscribers (TraceSubscriber), added to a validator's tracer, get a
+# callback when a span starts and ends and for events:
+#
+#   span "document"   validation of a document (linked documents
+#                     validated recursively are child spans)
+#   span "parse", "schema", "license", "checksum", "resolve", "stream",
+#        "prevalidate"
+#                     the phases, as in stats.py
+#   event "relationship_resolved"
+#                     a linked package was found in its document
+#
+# Spans and events carry attributes (file, document name, ...). With no
+# subscribers nothing is created, apart from the validator's stats.
+#
+# FileExporter writes the spans and events, one JSON object per line,
+# to a file for offline analysis (--trace FILE).
+#
+
+import itertools
+import json
+import time
+
+SPAN_DOCUMENT = "document"
+EVENT_RELATIONSHIP_RESOLVED = "relationship_resolved"
+
+
+class Span:
+    """A timed operation. start and end are time.time() values,
+    duration is measured with time.perf_counter(). error is set if the
+    operation raised an exception."""
+
+    def __init__(self, span_id, parent_id, name, attributes):
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start = None
+        self.end = None
+        self.duration = None
+        self.error = None
+
+    def to_dict(self):
+        return {
+            'type': "span",
+            'id': self.span_id,
+            'parent': self.parent_id,
+            'name': self.name,
+            'start': self.start,
+            'end': self.end,
+            'duration': self.duration,
+            'error': self.error,
+            'attributes': self.attributes,
+        }
+
+
+class TraceSubscriber:
+    """Base class of subscribers, the callbacks do nothing"""
+
+    def on_span_start(self, span):
+        pass
+
+    def on_span_end(self, span):
+        pass
+
+    def on_event(self, name, attributes, timestamp, parent_id):
+        pass
+
+
+class _SpanContext:
+
+    __slots__ = [ 'tracer', 'span', 'inner', 'perf_start' ]
+
+    def __init__(self, tracer, span, inner):
+        self.tracer = tracer
+        self.span = span
+        self.inner = inner
+
+    def __enter__(self):
+        span = self.span
+        span.start = time.time()
+        self.tracer._stack.append(span.span_id)
+        for subscriber in self.tracer.subscribers:
+            subscriber.on_span_start(span)
+        if self.inner != None:
+            self.inner.__enter__()
+        self.perf_start = time.perf_counter()
+        return span
+
+    def __exit__(self, exc_type, exc, tb):
+        span = self.span
+        span.duration = time.perf_counter() - self.perf_start
+        if self.inner != None:
+            self.inner.__exit__(exc_type, exc, tb)
+        span.end = time.time()
+        if exc != None:
+            span.error = str(exc)
+        self.tracer._stack.pop()
+        for subscriber in self.tracer.subscribers:
+            subscriber.on_span_end(span)
+        return False
+
+
+class Tracer:
+    """Creates spans and events and hands them to the subscribers"""
+
+    def __init__(self):
+        self.subscribers = []
+        self._ids = itertools.count(1)
+        self._stack = []
+
+    def add_subscriber(self, subscriber):
+        self.subscribers.append(subscriber)
+
+    def remove_subscriber(self, subscriber):
+        self.subscribers.remove(subscriber)
+
+    def span(self, name, attributes = None, inner = None):
+        """Context manager tracing the block as a span, the child of the
+        current span if any. inner, if given, is a context manager
+        entered and exited with the span (e.g. a stats phase). Only to
+        be used when there are subscribers."""
+        parent_id = None
+        if self._stack:
+            parent_id = self._stack[-1]
+        return _SpanContext(self, Span(next(self._ids), parent_id, name, attributes or {}), inner)
+
+    def event(self, name, attributes = None):
+        if not self.subscribers:
+            return
+        parent_id = None
+        if self._stack:
+            parent_id = self._stack[-1]
+        timestamp = time.time()
+        for subscriber in self.subscribers:
+            subscriber.on_event(name, attributes or {}, timestamp, parent_id)
+
+
+class FileExporter(TraceSubscriber):
+    """Writes ended spans and events, as JSON lines, to file_name"""
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.f = open(file_name, "w")
+
+    def on_span_end(self, span):
+        self.f.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+    def on_event(self, name, attributes, timestamp, parent_id):
+        self.f.write(json.dumps({ 'type': "event", 'name': name, 'time': timestamp,
+                                  'parent': parent_id, 'attributes': attributes }, default=str) + "\n")
+
+    def close(self):
+        self.f.close()
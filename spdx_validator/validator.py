@@ -4,106 +4,330 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-import glob
 import json
-import jsonschema
 import logging
 import os
-import re
 import sys
-import spdx_license_list
-import yaml
 
-from spdx_validator.checksum import hash_from_file
+from spdx_validator.checksum import ChecksumCache
+from spdx_validator.checksum import HASH_FUNCTIONS
+from spdx_validator.config import spdx_validator_version
+from spdx_validator.documents import DocumentCache
+from spdx_validator.documents import DocumentSummary
+from spdx_validator.errors import ERROR_CHECKSUM
+from spdx_validator.errors import ERROR_DOCUMENT
+from spdx_validator.errors import ERROR_LICENSE
+from spdx_validator.errors import ERROR_READ
+from spdx_validator.errors import ERROR_RELATIONSHIP
+from spdx_validator.errors import ERROR_SCHEMA
+from spdx_validator.errors import ErrorCollector
+from spdx_validator.errors import ErrorLimitReached
+from spdx_validator.errors import json_pointer
 from spdx_validator.exception import SPDXValidationException
+from spdx_validator.license_expression import LicenseChecker
+from spdx_validator.license_expression import defined_license_refs
+from spdx_validator.license_expression import parse as parse_license_expression
+from spdx_validator.licenses import LICENSE_LIST_VERSION
+from spdx_validator.licenses import SPDX_EXCEPTION_IDS
+from spdx_validator.licenses import SPDX_LICENSE_IDS
+from spdx_validator.manifest import IndexedManifest
+from spdx_validator.manifest_index import ManifestIndex
+from spdx_validator.package_graph import PackageGraph
+from spdx_validator.parser import BACKEND_AUTO
+from spdx_validator.parser import ManifestParser
+from spdx_validator.result_cache import CONTENT_HASH
+from spdx_validator.schema import SchemaRegistry
+from spdx_validator.schema import SCHEMA_ENGINE_JSONSCHEMA
+from spdx_validator.schema import validate_instance
+from spdx_validator.stats import COUNTER_BYTES_HASHED
+from spdx_validator.stats import COUNTER_BYTES_READ
+from spdx_validator.stats import COUNTER_CHECKED_PACKAGE_HITS
+from spdx_validator.stats import COUNTER_CHECKSUM_CACHE_HITS
+from spdx_validator.stats import COUNTER_CHECKSUM_CACHE_MISSES
+from spdx_validator.stats import COUNTER_DOCUMENTS
+from spdx_validator.stats import COUNTER_LICENSE_CACHE_HITS
+from spdx_validator.stats import COUNTER_LICENSE_CACHE_MISSES
+from spdx_validator.stats import COUNTER_PACKAGES
+from spdx_validator.stats import COUNTER_RELATIONSHIPS
+from spdx_validator.stats import COUNTER_RESULT_CACHE_HITS
+from spdx_validator.stats import COUNTER_RESULT_CACHE_MISSES
+from spdx_validator.stats import PHASE_CHECKSUM
+from spdx_validator.stats import PHASE_LICENSE
+from spdx_validator.stats import PHASE_PARSE
+from spdx_validator.stats import PHASE_PREVALIDATE
+from spdx_validator.stats import PHASE_RESOLVE
+from spdx_validator.stats import PHASE_SCHEMA
+from spdx_validator.stats import PHASE_STREAM
+from spdx_validator.stats import ValidationStats
+from spdx_validator.tracing import EVENT_RELATIONSHIP_RESOLVED
+from spdx_validator.tracing import SPAN_DOCUMENT
+from spdx_validator.tracing import Tracer
 
 SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
 DEBUG = True
 
 SPDX_VERSION_2_2 = "2.2"
 SPDX_VERSIONS = [ SPDX_VERSION_2_2 ]
-IGNORE_LICENSE_TOKENS = [ "OR", "AND", "WITH", "(", ")", "" ]
+
+# documents read at a time by validate_file_async
+DEFAULT_CONCURRENCY = 16
+
+class PrevalidatedManifest:
+    """Outcome of reading and validating (licenses and schema) a
+    manifest ahead of the relationship walk, e.g. in a worker process.
+
+    An error is kept together with the stage it occurred in and raised
+    when the walk reaches that stage, so the walk fails exactly as if
+    the manifest had been validated in place."""
+
+    STAGE_READ = "read"
+    STAGE_PACKAGES = "packages"
+    STAGE_SCHEMA = "schema"
+
+    def __init__(self, data, error_stage = None, error = None):
+        self.data = data
+        self.error_stage = error_stage
+        self.error = error
+        # stats of a worker process, as a dict
+        self.stats = None
+
+    def raise_error(self, stage):
+        if self.error_stage == stage:
+            raise SPDXValidationException(self.error)
+
+
+class _Walk:
+    """A document being validated, and its relationships walked"""
+
+    __slots__ = [ 'spdx_file', 'manifest', 'summary', 'relationships', 'link', 'span' ]
+
+    def __init__(self, spdx_file):
+        self.spdx_file = spdx_file
+        self.manifest = None
+        self.summary = None
+        self.relationships = None
+        self.link = None
+        self.span = None
+
 
 class SPDXValidator:
 
-    def __init__(self, spdx_version = SPDX_VERSION_2_2, schema_file = None, spdx_dirs = [], debug = False, allowed_licenses = []):
+    def __init__(self, spdx_version = SPDX_VERSION_2_2, schema_file = None, spdx_dirs = [], debug = False, allowed_licenses = [], schema_engine = SCHEMA_ENGINE_JSONSCHEMA, checksum_cache = None, jobs = 1, json_backend = BACKEND_AUTO, yaml_backend = BACKEND_AUTO, use_mmap = False, streaming = False, result_cache = None, collect_errors = False, max_errors = None, max_documents = None):
         self.debug = debug
+        self.schema_file = schema_file
+        self.schema_engine = schema_engine
+        self.jobs = jobs
+        self.parser = ManifestParser(json_backend, yaml_backend, use_mmap)
+        self.streaming = streaming
+        self._stream_validator = None
         self.spdx_version = spdx_version
-        self.checked_packages = {}
-        self.manifest_data = None
-        self.all_manifests = {}
-        self.dependencies = {}
+        # gather all errors, up to max_errors, see errors.py
+        self.collect_errors = collect_errors
+        self.max_errors = max_errors
+        # full documents kept, None for all, see documents.py
+        self.max_documents = max_documents
+        # timing and counters, kept over reset(), see stats.py
+        self.stats = ValidationStats()
+        # spans and events for subscribers, see tracing.py
+        self.tracer = Tracer()
+        self.reset()
+        if checksum_cache == None:
+            checksum_cache = ChecksumCache()
+        self.checksum_cache = checksum_cache
+        # validation results of unchanged documents, see result_cache.py
+        self.result_cache = result_cache
+        self._result_context = None
         if spdx_version not in SPDX_VERSIONS:
             raise SPDXValidationException("Unsupported SPDX version (" + str(spdx_version) + ")")
 
+        #
+        # The schema is loaded, and compiled, on first use
+        #
         if schema_file == None:
             schema_file = os.path.join(SCRIPT_DIR, "var/spdx-schema-" + spdx_version + ".json")
-        with open(schema_file, 'r') as f:
-            self.schema = json.load(f)
+        self.schema_path = schema_file
+        self._schema_validator = None
 
+        #
+        # The default, current, directory is not searched recursively
+        #
         if spdx_dirs == []: 
             self.spdx_dirs = [ "." ]
+            self.manifest_index = ManifestIndex(self.spdx_dirs, self.parser, recursive = False)
         else:
             self.spdx_dirs = spdx_dirs
+            self.manifest_index = ManifestIndex(self.spdx_dirs, self.parser)
 
         debug_level = logging.INFO
         if self.debug:
             debug_level = logging.DEBUG
 
-        self.spdx_licenses = spdx_license_list.LICENSES
+        self.spdx_licenses = SPDX_LICENSE_IDS
         self.allowed_licenses = allowed_licenses
+        self.license_checker = LicenseChecker(SPDX_LICENSE_IDS,
+                                              SPDX_EXCEPTION_IDS,
+                                              allowed_licenses)
 
         logging.basicConfig(format='%(asctime)s:   %(message)s', datefmt='%Y-%m-%d %H:%M:%S', level=debug_level)
         
+    @property
+    def schema_validator(self):
+        if self._schema_validator == None:
+            self._schema_validator = SchemaRegistry.validator(self.spdx_version, self.schema_path, self.schema_engine)
+        return self._schema_validator
+
+    @property
+    def schema(self):
+        return self.schema_validator.schema
+
+    def reset(self):
+        """Forget the outcome of previous validations, but keep the
+        configuration and the (schema, checksum) caches"""
+        self.prevalidated = {}
+        self.manifest_data = None
+        # namespace -> DocumentSummary of the documents validated
+        self.all_manifests = {}
+        self.documents = DocumentCache(self.max_documents)
+        # file -> DocumentSummary (None if not usable) of the documents
+        # validated by the relationship walk
+        self._visited_files = {}
+        # the checked packages and their dependencies, see package_graph.py
+        self.packages = PackageGraph()
+        self.errors = ErrorCollector(self.max_errors)
+
+    def config(self):
+        """The configuration of this validator, as a (picklable) dict,
+        used to create identical validators in worker processes"""
+        return {
+            'spdx_version': self.spdx_version,
+            'schema_file': self.schema_file,
+            'spdx_dirs': self.spdx_dirs,
+            'allowed_licenses': self.allowed_licenses,
+            'schema_engine': self.schema_engine,
+            'checksum_cache_dir': self.checksum_cache.disk_cache.cache_dir if self.checksum_cache.disk_cache != None else None,
+            'checksum_cache_size': self.checksum_cache.disk_cache.max_size if self.checksum_cache.disk_cache != None else None,
+            'json_backend': self.parser.json_backend,
+            'yaml_backend': self.parser.yaml_backend,
+            'use_mmap': self.parser.use_mmap,
+            'streaming': self.streaming,
+            'result_cache_dir': self.result_cache.disk_cache.cache_dir if self.result_cache != None else None,
+            'result_cache_size': self.result_cache.disk_cache.max_size if self.result_cache != None else None,
+            'collect_errors': self.collect_errors,
+            'max_errors': self.max_errors,
+            'max_documents': self.max_documents,
+            'debug': self.debug,
+        }
+
     def data(self):
         return self.manifest_data
 
-    def _dep_list(self, spdx_id, indent = ""):
-        dependencies = []
-        if spdx_id in self.dependencies:
-            logging.debug(indent + "     " + spdx_id + "   deps: " + str(self.dependencies[spdx_id]))
-            for dep in self.dependencies[spdx_id]:
-                if dep not in dependencies:
-                    dependencies.append(dep)
-                dependencies += self._dep_list(dep.split(":")[1], indent + "   ")
-                logging.debug(indent + "        d: " + str(dep))
-        return dependencies
+    def document(self, namespace):
+        """The data of the validated document namespace, from the
+        document cache or, if evicted, read again"""
+        manifest_data = self.documents.get(namespace)
+        if manifest_data != None:
+            return manifest_data
+        summary = self.all_manifests.get(namespace)
+        if summary == None:
+            raise SPDXValidationException("No validated document with namespace: " + str(namespace))
+        manifest_data = self._read_manifest(summary.spdx_file)
+        self.documents.put(namespace, manifest_data)
+        return manifest_data
+
+    def _add_document(self, spdx_file, manifest_data):
+        if manifest_data['documentNamespace'] not in self.all_manifests:
+            self.all_manifests[manifest_data['documentNamespace']] = DocumentSummary.from_data(spdx_file, manifest_data)
+        self.documents.put(manifest_data['documentNamespace'], manifest_data)
+
+    @property
+    def checked_packages(self):
+        """The checked packages, as dicts (see package_data()) by
+        "<document name>:<SPDXID>\""""
+        return self.packages.checked_packages(self.package_data())
+
+    def package_data(self):
+        """Return a function returning the package dict, as in its
+        document, of a checked package "<document name>:<SPDXID>". The
+        documents evicted from the document cache are read again, once
+        per returned function. Streamed (--stream) documents keep the
+        PACKAGE_SUMMARY_KEYS fields of their packages only, as do the
+        packages not found in their document"""
+        namespaces = {}
+        for namespace, summary in self.all_manifests.items():
+            namespaces.setdefault(summary.name, namespace)
+        packages_by_name = {}
+
+        def package_dict(key):
+            name, _, spdx_id = key.rpartition(":")
+            packages = packages_by_name.get(name)
+            if packages == None:
+                packages = {}
+                if name in namespaces:
+                    for package in self.document(namespaces[name]).get('packages', []):
+                        packages[package['SPDXID']] = package
+                packages_by_name[name] = packages
+            package = packages.get(spdx_id)
+            if package == None:
+                return self.packages.package_dict(key)
+            return package
+
+        return package_dict
+
+    @property
+    def dependencies(self):
+        """The dependencies found while validating: SPDXID to list of
+        "<document name>:<SPDXID>\""""
+        return self.packages.dependencies()
+
+    def dependency_graph(self):
+        """Return a DependencyGraph, with the transitive dependencies of
+        all packages, of the dependencies found while validating. The
+        graph is over the ids of self.packages, see
+        PackageGraph.closure()"""
+        graph = self.packages.dependency_graph()
+        for cycle in graph.cycles:
+            names = [ self.packages.node_names[node] for node in cycle + cycle[:1] ]
+            logging.warning("Dependency cycle: " + " -> ".join(names))
+        return graph
 
     def packages_deps(self):
-        packages = []
+        return list(self.iter_packages_deps())
+
+    def packages_dag(self, package_name = None):
+        """The packages of packages_deps() and all their dependencies,
+        each package once, and the dependencies as edges between them,
+        see PackageGraph.dag(). If package_name is given, the closures
+        of the packages of the document with that name are added"""
+        top_name = self.manifest_data['name']
+        top_keys = [ top_name + ":" + pkg['SPDXID'] for pkg in self.manifest_data['packages'] ]
+        closure_keys = []
+        if package_name != None:
+            closure_keys = [ top_name + ":" + pkg['SPDXID'] for pkg in self.manifest_data['packages'] if pkg.get('name') == package_name ]
+        return self.packages.dag(top_keys, closure_keys, self.package_data())
+
+    def iter_packages_deps(self):
+        """Generate the packages of packages_deps() one at a time, the
+        dependencies of each found when it is asked for"""
+        graph = self.dependency_graph()
+        package_dict = self.package_data()
         top_name = self.manifest_data['name']
         for pkg in self.manifest_data['packages']:
             pkg_spdx_id = pkg['SPDXID']
-            pkg_key = top_name + ":" + pkg_spdx_id
-            checked_pkg = self.checked_packages[pkg_key]
-            dependencies = self._dep_list(pkg_spdx_id)
             package = {}
-            package['package'] = checked_pkg
-            package['dependencies'] = []
-            for dep in dependencies:
-                package['dependencies'].append(self.checked_packages[dep])
-            packages.append(package)
-
-        return packages
+            package['package'] = package_dict(top_name + ":" + pkg_spdx_id)
+            package['dependencies'] = [ package_dict(key) for key in self.packages.closure_keys(graph, pkg_spdx_id) ]
+            yield package
     
-    def validate_file(self, spdx_file, recursive = False, discard_checksum = False):
-
+    def _read_manifest(self, spdx_file, content = None):
+        """Parse spdx_file or, if not None, its already read content"""
         manifest_data = None
-        logging.debug("Validate file: " + str(spdx_file))
         try:
-            logging.debug("Determine file suffix ")
-            filename, suff = os.path.splitext(spdx_file)
-            logging.debug(" file suffix: " + str(suff))
-
             logging.debug("Read data from file ")
-            with open(spdx_file, 'r') as f:
-                if suff.lower() == ".yaml" or suff.lower() == ".yml":
-                    manifest_data = yaml.safe_load(f) 
-                elif suff.lower() == ".json":
-                    manifest_data = json.load(f)
-                else:
-                    raise SPDXValidationException("Unsupported file type: " + str(spdx_file))
-                logging.debug(" data read")
+            if content == None:
+                manifest_data = self.parser.load(spdx_file)
+            else:
+                manifest_data = self.parser.loads(spdx_file, content)
+            logging.debug(" data read")
 
         except json.decoder.JSONDecodeError as e:
             if self.debug:
@@ -120,10 +344,146 @@ class SPDXValidator:
 
         if manifest_data == None:
             raise SPDXValidationException("Could not read file: " + str(spdx_file))
-    
-        self.all_manifests[manifest_data['documentNamespace']] = manifest_data
 
-        self.validate_packages(manifest_data)
+        return manifest_data
+
+    def validate_file(self, spdx_file, recursive = False, discard_checksum = False):
+        """Validate spdx_file and, if recursive, the documents it links
+        to. Return the data of the document: with a result cache (opt
+        in, the result_cache argument), on a hit, only its summary
+        (SUMMARY_KEYS and the DYNAMIC_LINK relationships, see
+        result_cache.py), since the document is not read.
+
+        Raises SPDXValidationException on the first error or, if
+        collecting errors, gathers the errors in self.errors and returns
+        None if the document could not be used"""
+        if not self.collect_errors:
+            return self._validate_file(spdx_file, recursive, discard_checksum).data
+        try:
+            self._validate_file(spdx_file, recursive, discard_checksum)
+        except ErrorLimitReached as e:
+            logging.debug("%s", e)
+        return self.manifest_data
+
+    async def validate_file_async(self, spdx_file, recursive = False, discard_checksum = False, concurrency = DEFAULT_CONCURRENCY, executor = None):
+        """As validate_file, but first reading spdx_file and, if
+        recursive, the documents it links to concurrently, at most
+        concurrency at a time, with asyncio. The documents are parsed
+        and validated in executor (by default the event loop's), see
+        AsyncResolver. The outcome is the same as of validate_file."""
+        if not self.streaming and not self.collect_errors and self.manifest_data == None and spdx_file not in self.prevalidated:
+            from spdx_validator.resolver import AsyncResolver
+            with self._phase(PHASE_PREVALIDATE, file = spdx_file):
+                await AsyncResolver(self, concurrency, executor).resolve(spdx_file, recursive)
+        return self.validate_file(spdx_file, recursive, discard_checksum)
+
+    def _error(self, error_type, message, spdx_file, pointer = ""):
+        """Raise an SPDXValidationException with message or, if
+        collecting errors, add it to the errors"""
+        if not self.collect_errors:
+            raise SPDXValidationException(message)
+        self.errors.add(error_type, message, spdx_file, pointer)
+
+    def _phase(self, name, **attributes):
+        """Context manager timing phase name (see stats.py) and, if
+        there are trace subscribers, tracing it as a span"""
+        phase = self.stats.phase(name)
+        if not self.tracer.subscribers:
+            return phase
+        return self.tracer.span(name, attributes, phase)
+
+    def _validate_file(self, spdx_file, recursive, discard_checksum):
+        """Validate spdx_file and, if recursive, walk the relationships of
+        it and of the documents it links to.
+
+        The walk is depth first, with an explicit stack of the documents
+        being walked (no recursion, so chains of linked documents may be
+        of any length), in the same order as the recursive walk it
+        replaces. Each document is validated and walked once: later
+        links to it, or to another file with the same documentNamespace,
+        are resolved with its DocumentSummary."""
+        top = self._begin_document(spdx_file, recursive)
+        if not recursive or top.manifest == None:
+            self._end_document(top)
+            return top.manifest
+
+        stack = [ top ]
+        try:
+            while stack != []:
+                walk = stack[-1]
+                f = self._walk_links(walk, discard_checksum)
+                if f == None:
+                    # all relationships walked
+                    stack.pop()
+                    self._end_document(walk)
+                    if stack != []:
+                        self._resolve_link(stack[-1], walk.summary)
+                    continue
+
+                logging.debug(" * --->  Validate file %s", f)
+                child = self._begin_document(f, recursive)
+                if child.manifest == None or child.summary.spdx_file != f:
+                    # errors collected, or the document is already
+                    # validated (from another file)
+                    self._end_document(child)
+                    self._resolve_link(walk, child.summary)
+                    continue
+                stack.append(child)
+        except BaseException as e:
+            for walk in reversed(stack):
+                self._end_document(walk, e)
+            raise
+        return top.manifest
+
+    def _begin_document(self, spdx_file, recursive):
+        """Load (validate) spdx_file, return a _Walk of it"""
+        walk = _Walk(spdx_file)
+        if self.tracer.subscribers:
+            walk.span = self.tracer.span(SPAN_DOCUMENT, { 'file': spdx_file, 'recursive': recursive })
+            walk.span.__enter__()
+        try:
+            walk.manifest = self._load_document(spdx_file, recursive)
+        except BaseException as e:
+            self._end_document(walk, e)
+            raise
+        if walk.manifest == None:
+            self._visited_files[spdx_file] = None
+            return walk
+        walk.summary = self.all_manifests[walk.manifest.namespace()]
+        self._visited_files[spdx_file] = walk.summary
+        walk.relationships = iter(walk.manifest.indexed_relationships())
+        return walk
+
+    def _end_document(self, walk, error = None):
+        if walk.span == None:
+            return
+        if walk.manifest != None:
+            walk.span.span.attributes['name'] = walk.manifest.name()
+            walk.span.span.attributes['namespace'] = walk.manifest.namespace()
+        if error == None:
+            walk.span.__exit__(None, None, None)
+        else:
+            walk.span.__exit__(type(error), error, error.__traceback__)
+        walk.span = None
+
+    def _load_document(self, spdx_file, recursive):
+
+        logging.debug("Validate file: %s", spdx_file)
+
+        #
+        # Top file in a parallel recursive run, validate all linked
+        # files in parallel before walking the relationships
+        #
+        if recursive and self.jobs > 1 and not self.streaming and not self.collect_errors and self.manifest_data == None and spdx_file not in self.prevalidated:
+            from spdx_validator.resolver import ParallelResolver
+            with self._phase(PHASE_PREVALIDATE, file = spdx_file):
+                ParallelResolver(self, self.jobs).resolve(spdx_file)
+
+        manifest = self._load_manifest(spdx_file, recursive)
+        if manifest == None:
+            # collecting errors, and the document is not usable
+            return None
+        manifest_data = manifest.data
 
         #
         # If no manifest data in object, this must be the top one
@@ -133,23 +493,28 @@ class SPDXValidator:
             self.manifest_data = manifest_data
             for pkg in manifest_data['packages']:
                 elem_id = manifest_data['name'] + ":" + pkg['SPDXID'] 
-                self.checked_packages[elem_id] = pkg
+                self.packages.add_package(elem_id, pkg)
 
-        self.validate_json(manifest_data)
-        if not recursive:
-            return manifest_data
+        return manifest
+
+    def _walk_links(self, walk, discard_checksum):
+        """Walk the relationships of walk.manifest, from where the walk
+        stopped, until one links to a document not yet validated. Return
+        the file of that document, with the link kept in walk.link to be
+        resolved once the document is validated, or None when all
+        relationships are walked"""
+        manifest = walk.manifest
+        spdx_file = walk.spdx_file
 
-        if 'relationships' not in manifest_data:
-            return manifest_data
-        
         #
         # Loop through the relationships in this manifest
         # - if linked ("DYNAMIC_LINK")
         #   validate it
         #
-        for relationship in manifest_data['relationships']:
+        for index, relationship in walk.relationships:
 
             logging.debug("Validating relationships")
+            self.stats.count(COUNTER_RELATIONSHIPS)
             relation_type = relationship['relationshipType']
             if relation_type == 'DYNAMIC_LINK':
                 elem_id_doc_ref = relationship['spdxElementId'].split(":")[0]
@@ -157,26 +522,29 @@ class SPDXValidator:
                 related_elem = relationship['relatedSpdxElement']
 
                 #logging.debug(" relationship: " + related_elem + "  ---uses---> "  + elem_id)
-                if related_elem not in self.dependencies:
-                    self.dependencies[related_elem] = []
-                self.dependencies[related_elem].append(elem_id)
+                self.packages.add_dependency(related_elem, elem_id)
                     
-                if elem_id in self.checked_packages:
-                    logging.debug(" * " + elem_id + " is already check, continuing")
+                if self.packages.is_checked(elem_id):
+                    logging.debug(" * %s is already check, continuing", elem_id)
+                    self.stats.count(COUNTER_CHECKED_PACKAGE_HITS)
                     #logging.debug(" ignore: " + str(elem_id))
                     continue
 
-                spdx_doc = None
-                for doc_ref in manifest_data["externalDocumentRefs"]:
-                    if elem_id_doc_ref == doc_ref['externalDocumentId']:
-                        spdx_doc = doc_ref['spdxDocument']
+                pointer = json_pointer([ 'relationships', index ])
+                if manifest.doc_refs == None:
+                    self._error(ERROR_RELATIONSHIP, "externalDocumentRefs not found in " + str(spdx_file), spdx_file, pointer)
+                    continue
+                spdx_doc = manifest.spdx_document(elem_id_doc_ref)
                 
                 #
                 # Validate that the (internal) element in the
                 # relationship actually exists in the current SPDX
                 # 
-                logging.debug(" * " + "Validate internal element (" + related_elem + ") ")  
-                self._validate_related_elem(related_elem, manifest_data)
+                logging.debug(" * Validate internal element (%s)", related_elem)
+                if manifest.package(related_elem) == None:
+                    self._error(ERROR_RELATIONSHIP, "Could not find related element: " + str(related_elem), spdx_file,
+                                json_pointer([ 'relationships', index, 'relatedSpdxElement' ]))
+                    continue
                 logging.debug(" *   element validated")
 
                 #
@@ -184,7 +552,12 @@ class SPDXValidator:
                 #
                 f = None
                 if spdx_doc != None:
-                    f = self._find_manifest_file(spdx_doc)
+                    try:
+                        with self._phase(PHASE_RESOLVE, spdx_document = spdx_doc):
+                            f = self._find_manifest_file(spdx_doc)
+                    except SPDXValidationException as e:
+                        self._error(ERROR_RELATIONSHIP, str(e), spdx_file, pointer)
+                        continue
                 #logging.debug(" *   file for element found: " + str(f))
 
                 #
@@ -192,74 +565,237 @@ class SPDXValidator:
                 #
                 logging.debug(" * " + "Check checksum")
                 ext_doc_ref = elem_id.split(":")[0]
-                ext_doc_ref_found = False
-                # - find checksum in external doc refs
-                #logging.debug("manifest_data:" + str(manifest_data))
-                if "externalDocumentRefs" not in manifest_data:
-                    logging.error(f"externalDocumentRefs not found in {f}")
-                    logging.errort(f"Content in file: {manifest_data}")
-                    # TODO: replace with raised exception
-                    exit(1)
-
 
                 #
-                # for every doc in "externalDocumentRefs" 
-                # - check if we can find the current relationship's. If so, all fine
-                #   otherwise, raise exception
+                # find the current relationship's document among the
+                # "externalDocumentRefs". If so, all fine (after
+                # checking the checksum) otherwise, raise exception
                 #
-                if "externalDocumentRefs" not in manifest_data or manifest_data["externalDocumentRefs"] == []:
-                    ext_doc_ref_found = True
-                else:
-                    for doc_ref in manifest_data["externalDocumentRefs"]:
-                        external_doc_id = doc_ref['externalDocumentId']
-                        # if not external, continue
-                        if external_doc_id.startswith("DocumentRef-"):
-                            ext_doc_ref_found = True
-                            continue
-                        else:
-                            doc_ref_id = external_doc_id.split(":")[0].replace("DocumentRef-", "")
-                            # if id in ref list is the same as the file (f)
-                            if ext_doc_ref == doc_ref_id:
-                                # then control the checksums are the same
-                                check_sum_algorithm = doc_ref['checksum']['algorithm']
-                                check_sum = doc_ref['checksum']['checksumValue']
-                                f_check_sum = hash_from_file(f, check_sum_algorithm)
-                                if not discard_checksum:
-                                    if f_check_sum != check_sum:
-                                        raise SPDXValidationException("Checksum for " + str(f) + " (" + str(f_check_sum+ ") is not the same as in the \"externalDocumentRefs\" in " + str(spdx_file)))
-                                ext_doc_ref_found = True
+                checksum_refs = manifest.checksum_refs_by_id.get(ext_doc_ref, [])
+                ext_doc_ref_found = manifest.doc_refs == [] or manifest.has_document_refs or checksum_refs != []
+                checksum_ok = True
+                for doc_ref in checksum_refs:
+                    # control the checksums are the same
+                    check_sum_algorithm = doc_ref['checksum']['algorithm']
+                    check_sum = doc_ref['checksum']['checksumValue']
+                    f_check_sum = self._hash_from_file(f, check_sum_algorithm)
+                    if not discard_checksum:
+                        if f_check_sum != check_sum:
+                            checksum_ok = False
+                            self._error(ERROR_CHECKSUM, "Checksum for " + str(f) + " (" + str(f_check_sum+ ") is not the same as in the \"externalDocumentRefs\" in " + str(spdx_file)),
+                                        spdx_file, json_pointer([ 'externalDocumentRefs', manifest.doc_refs.index(doc_ref), 'checksum', 'checksumValue' ]))
                 if not ext_doc_ref_found:
-                    raise SPDXValidationException("Could not find " + str(ext_doc_ref) + " in \"externalDocumentRefs\" in " + str(spdx_file))
+                    self._error(ERROR_RELATIONSHIP, "Could not find " + str(ext_doc_ref) + " in \"externalDocumentRefs\" in " + str(spdx_file),
+                                spdx_file, json_pointer([ 'relationships', index, 'spdxElementId' ]))
+                    continue
+                if not checksum_ok:
+                    continue
                 logging.debug(" *   checksum correct")
 
                         
                 #
-                # Validate this file 
+                # Validate this file, unless already validated
                 #
                 if f != None:
-                    logging.debug(" * ---> " + " Validate file " + f)
-                    inner_manifest = self.validate_file(f, recursive, discard_checksum)
-                    logging.debug(" * <--- " + " Validate file: " + f)
-
-                    #
-                    # Validate that inner manifest contains the reference (elem_id)
-                    #
-                    inner_name_and_version = inner_manifest['name']
-                    inner_name = re.sub("-[0-9.-]*$", "", inner_name_and_version)
-                    
-                    inner_name_found = False
-                    inner_pkg = None
-                    for _inner_pkg in inner_manifest['packages']:
-                        full_ref = inner_name_and_version + ":" + _inner_pkg['SPDXID'] 
-                        if full_ref == elem_id:
-                            inner_name_found = True
-                            inner_pkg = _inner_pkg
-                    if not inner_name_found:
-                        raise SPDXValidationException("Could not find: " + str(elem_id) + " in file: " + f)
-                
-                    self.checked_packages[elem_id] = inner_pkg
+                    walk.link = (index, elem_id, related_elem, f)
+                    if f not in self._visited_files:
+                        return f
+                    self._resolve_link(walk, self._visited_files[f])
+
+        return None
+
+    def _resolve_link(self, walk, summary):
+        """Resolve walk.link, to the package in the document summary
+        (None if the document was not usable)"""
+        index, elem_id, related_elem, f = walk.link
+        walk.link = None
+        if summary == None:
+            # errors collected
+            return
 
-        return manifest_data
+        #
+        # Validate that inner manifest contains the reference (elem_id)
+        #
+        inner_pkg = summary.qualified_package(elem_id)
+        if inner_pkg == None:
+            self._error(ERROR_RELATIONSHIP, "Could not find: " + str(elem_id) + " in file: " + f,
+                        walk.spdx_file, json_pointer([ 'relationships', index, 'spdxElementId' ]))
+            return
+
+        self.packages.add_record(elem_id, inner_pkg)
+        if self.tracer.subscribers:
+            self.tracer.event(EVENT_RELATIONSHIP_RESOLVED, { 'element': elem_id, 'related_element': related_elem,
+                                                             'file': f, 'from_file': walk.spdx_file })
+
+    def _hash_from_file(self, file_name, hash_name):
+        hits = self.checksum_cache.hits
+        misses = self.checksum_cache.misses
+        with self._phase(PHASE_CHECKSUM, file = file_name, algorithm = hash_name):
+            checksum = self.checksum_cache.hash_from_file(file_name, hash_name)
+        self.stats.count(COUNTER_CHECKSUM_CACHE_HITS, self.checksum_cache.hits - hits)
+        if self.checksum_cache.misses != misses:
+            self.stats.count(COUNTER_CHECKSUM_CACHE_MISSES, self.checksum_cache.misses - misses)
+            self.stats.count(COUNTER_BYTES_HASHED, os.path.getsize(file_name))
+        return checksum
+
+    def _count_document(self, spdx_file, manifest_data):
+        self.stats.count(COUNTER_DOCUMENTS)
+        self.stats.count(COUNTER_BYTES_READ, os.path.getsize(spdx_file))
+        self.stats.count(COUNTER_PACKAGES, len(manifest_data.get('packages', [])))
+
+    def _load_manifest(self, spdx_file, recursive):
+        """Read (or stream) and validate a manifest, return it as an
+        IndexedManifest"""
+        if self.collect_errors:
+            return self._load_manifest_collecting(spdx_file, recursive)
+        if self.streaming and self.parser.is_json(spdx_file):
+            with self._phase(PHASE_STREAM, file = spdx_file):
+                manifest = self.stream_validator().validate(spdx_file, keep_relationships = recursive)
+            self._count_document(spdx_file, manifest.data)
+            self._add_document(spdx_file, manifest.data)
+            return manifest
+
+        if self.max_documents == None:
+            prevalidated = self.prevalidated.get(spdx_file)
+        else:
+            # released once used
+            prevalidated = self.prevalidated.pop(spdx_file, None)
+        content_hash = None
+        if prevalidated == None:
+            content_hash, prevalidated = self._cached_result(spdx_file)
+        if prevalidated == None:
+            with self._phase(PHASE_PARSE, file = spdx_file):
+                manifest_data = self._read_manifest(spdx_file)
+        else:
+            prevalidated.raise_error(PrevalidatedManifest.STAGE_READ)
+            manifest_data = prevalidated.data
+        self._count_document(spdx_file, manifest_data)
+    
+        self._add_document(spdx_file, manifest_data)
+        manifest = IndexedManifest(manifest_data)
+
+        if prevalidated == None:
+            stage = PrevalidatedManifest.STAGE_PACKAGES
+            try:
+                self._validate_licenses(spdx_file, manifest_data)
+                stage = PrevalidatedManifest.STAGE_SCHEMA
+                with self._phase(PHASE_SCHEMA, file = spdx_file):
+                    self.validate_json(manifest_data)
+            except SPDXValidationException as e:
+                self._store_result(content_hash, manifest_data, stage, str(e))
+                raise
+            self._store_result(content_hash, manifest_data)
+        else:
+            prevalidated.raise_error(PrevalidatedManifest.STAGE_PACKAGES)
+            prevalidated.raise_error(PrevalidatedManifest.STAGE_SCHEMA)
+        return manifest
+
+    def _validate_licenses(self, spdx_file, manifest_data):
+        """validate_packages(), timed and with the license cache counted"""
+        cache_info = parse_license_expression.cache_info()
+        try:
+            with self._phase(PHASE_LICENSE, file = spdx_file):
+                self.validate_packages(manifest_data)
+        finally:
+            new_cache_info = parse_license_expression.cache_info()
+            self.stats.count(COUNTER_LICENSE_CACHE_HITS, new_cache_info.hits - cache_info.hits)
+            self.stats.count(COUNTER_LICENSE_CACHE_MISSES, new_cache_info.misses - cache_info.misses)
+
+    def _load_manifest_collecting(self, spdx_file, recursive):
+        """As _load_manifest, but collecting the errors. Returns None if
+        the document can not be read or is not valid against the schema
+        (and its relationships can not be trusted).
+
+        The result cache is not used, it only holds the first error of
+        a document. A streamed document is reported with its first
+        error only."""
+        if self.streaming and self.parser.is_json(spdx_file):
+            try:
+                with self._phase(PHASE_STREAM, file = spdx_file):
+                    manifest = self.stream_validator().validate(spdx_file, keep_relationships = recursive)
+            except SPDXValidationException as e:
+                self._error(ERROR_DOCUMENT, str(e), spdx_file)
+                return None
+            self._count_document(spdx_file, manifest.data)
+            self._add_document(spdx_file, manifest.data)
+            return manifest
+
+        try:
+            with self._phase(PHASE_PARSE, file = spdx_file):
+                manifest_data = self._read_manifest(spdx_file)
+        except SPDXValidationException as e:
+            self._error(ERROR_READ, str(e), spdx_file)
+            return None
+        self._count_document(spdx_file, manifest_data)
+
+        # added as found, so that max_errors stops the schema validation
+        schema_errors = False
+        with self._phase(PHASE_SCHEMA, file = spdx_file):
+            for error in self.schema_validator.iter_errors(manifest_data):
+                schema_errors = True
+                self._error(ERROR_SCHEMA, error.message, spdx_file, json_pointer(error.absolute_path))
+
+        license_refs = defined_license_refs(manifest_data)
+        packages = manifest_data.get('packages', []) if isinstance(manifest_data, dict) else []
+        with self._phase(PHASE_LICENSE, file = spdx_file):
+            for index, package in enumerate(packages if isinstance(packages, list) else []):
+                license_expression = package.get('licenseConcluded') if isinstance(package, dict) else None
+                if not isinstance(license_expression, str):
+                    # a schema error
+                    continue
+                try:
+                    self.check_license_spdx(license_expression, license_refs)
+                except SPDXValidationException as e:
+                    self._error(ERROR_LICENSE, str(e), spdx_file, json_pointer([ 'packages', index, 'licenseConcluded' ]))
+
+        if schema_errors:
+            return None
+        self._add_document(spdx_file, manifest_data)
+        return IndexedManifest(manifest_data)
+
+    def result_context(self):
+        """The values, apart from the document, the validation result of
+        a document depends on"""
+        if self._result_context == None:
+            with open(self.schema_path, 'rb') as f:
+                schema_hash = SchemaRegistry.schema_hash(f.read())
+            self._result_context = [ self.spdx_version, schema_hash, sorted(self.license_checker.allowed_keys),
+                                     LICENSE_LIST_VERSION, spdx_validator_version ]
+        return self._result_context
+
+    def _cached_result(self, spdx_file, content = None):
+        """Return the content hash of spdx_file (or, if not None, its
+        already read content) and its result in the result cache, as a
+        PrevalidatedManifest (or None)"""
+        if self.result_cache == None:
+            return None, None
+        if content != None:
+            content_hash = HASH_FUNCTIONS[CONTENT_HASH](content).hexdigest()
+        else:
+            try:
+                content_hash = self._hash_from_file(spdx_file, CONTENT_HASH)
+            except OSError:
+                # reported when reading the file
+                return None, None
+        result = self.result_cache.get(content_hash, self.result_context())
+        if result == None:
+            self.stats.count(COUNTER_RESULT_CACHE_MISSES)
+            return content_hash, None
+        self.stats.count(COUNTER_RESULT_CACHE_HITS)
+        logging.debug("Cached result for %s", spdx_file)
+        return content_hash, PrevalidatedManifest(result['data'], result['error_stage'], result['error'])
+
+    def _store_result(self, content_hash, manifest_data, error_stage = None, error = None):
+        if self.result_cache == None or content_hash == None:
+            return
+        self.result_cache.put(content_hash, self.result_context(), manifest_data, error_stage, error)
+
+    def stream_validator(self):
+        """The StreamValidator, created on first use"""
+        if self._stream_validator == None:
+            from spdx_validator.stream import StreamValidator
+            self._stream_validator = StreamValidator(self.schema, self.spdx_version, self.schema_engine, self.license_checker)
+        return self._stream_validator
 
     def OBSOLETE_suggest_file(self, elem_id):
         files = []
@@ -286,78 +822,38 @@ class SPDXValidator:
         return files
     
     def _find_manifest_file(self, file_name):
-        files = []
-        # loop through all dirs to find matching files
-        for dir in self.spdx_dirs:
-            # create list of potential files
-            try_files = []
-            try_files.append(os.path.join(dir, file_name))
-            # try each potential file
-            for f in try_files:
-                # if present, store it
-                if os.path.isfile(f):
-                    files.append(f)
+        f = self.manifest_index.find(file_name)
+        logging.debug("files[0]: %s", f)
+        return f
 
-        #
-        # Only, one (1) file should be found, otherwise raise exception
-        #
-        files_cnt = len(files)
-        if files_cnt == 0:
-            raise SPDXValidationException("Could not find manifest file for : " + str(file_name))
-            
-        if files_cnt > 1:
-            raise SPDXValidationException("Found " + str(files_cnt) + " manifest files for : " + str(file_name))
-
-        logging.debug("files[0]: " + str(files[0]))
-        return files[0]
-
-    def _validate_related_elem(self, item, manifest_data):
-        found = False
-        for pkg in manifest_data['packages']:
-            spdx_id = pkg['SPDXID']
-            if spdx_id == item:
-                found = True
-        if not found:
-            raise SPDXValidationException("Could not find related element: " + str(item))
-        
-    
     def validate_json(self,  manifest_data):
+        from jsonschema.exceptions import ValidationError
         try:
             logging.debug("Validating spdx data")
-            jsonschema.validate(instance=manifest_data,
-                                schema=self.schema)
+            validate_instance(self.schema_validator, manifest_data)
             logging.debug("  spdx data validated")
 
-        except jsonschema.exceptions.ValidationError as exc:
+        except ValidationError as exc:
             raise SPDXValidationException(exc)
 
         return True
 
     def validate_packages(self, manifest_data):
+        license_refs = defined_license_refs(manifest_data)
+
         for package in manifest_data['packages']:
             # Validate concluded licenses have SPDX vlaues
-            self.check_license_spdx(package["licenseConcluded"])
+            self.check_license_spdx(package["licenseConcluded"], license_refs)
 
         
-    def check_license_spdx(self, license_expression):
-        """Loop through the licenses and calidate they're in the SPDX database"""
+    def check_license_spdx(self, license_expression, license_refs = ()):
+        """Parse the license expression and validate the licenses are in
+        the SPDX database, among the allowed licenses or (LicenseRef-)
+        in license_refs, see defined_license_refs()"""
+        self.license_checker.check(license_expression, license_refs)
 
-        
-        for lic in license_expression.replace("("," ( ").replace(")"," ) ").split(" "):
-            if lic.strip() in IGNORE_LICENSE_TOKENS:
-                continue
-            if lic not in self.spdx_licenses.keys():
-                lic_found = False
-                for lic_map in self.allowed_licenses:
-                    if isinstance(lic_map, str):
-                        check_license = lic_map
-                    else: 
-                        check_license = lic_map['key']
-                        
-                    if check_license == lic:
-                        lic_found = True
-                if not lic_found:
-                    raise SPDXValidationException("License \"" + str(lic) + "\" not SPDX or among allowed licenses: " + str(self.allowed_licenses))
-                                                                                              
     def licenses(self):
+        """The SPDX licenses, the LICENSES dict of spdx_license_list,
+        imported when asked for (the identifiers are in SPDX_LICENSES)"""
+        import spdx_license_list
         return spdx_license_list.LICENSES
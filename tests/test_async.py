@@ -0,0 +1,154 @@
+#!/bin/python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import asyncio
+import concurrent.futures
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+import spdx_validator.resolver
+from benchmarks.corpus import CorpusSpec
+from benchmarks.corpus import generate
+from spdx_validator.exception import SPDXValidationException
+from spdx_validator.validator import SPDXValidator
+
+
+class TestAsync(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.corpus = generate(os.path.join(self.tmp_dir.name, "corpus"),
+                               CorpusSpec(packages = 4, documents = 8, depth = 3, density = 1.5))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def validate(self, spdx_file, spdx_dirs, asynchronous, **params):
+        validator = SPDXValidator("2.2", None, spdx_dirs)
+        try:
+            if asynchronous:
+                asyncio.run(validator.validate_file_async(spdx_file, True, **params))
+            else:
+                validator.validate_file(spdx_file, True)
+        except SPDXValidationException as e:
+            return validator, str(e)
+        return validator, None
+
+    def assertSame(self, spdx_file, spdx_dirs, **params):
+        serial, serial_error = self.validate(spdx_file, spdx_dirs, False)
+        concurrent, concurrent_error = self.validate(spdx_file, spdx_dirs, True, **params)
+        self.assertEqual(concurrent_error, serial_error)
+        self.assertEqual(list(concurrent.checked_packages.items()), list(serial.checked_packages.items()))
+        self.assertEqual(concurrent.dependencies, serial.dependencies)
+        if serial_error == None:
+            self.assertEqual(concurrent.packages_deps(), serial.packages_deps())
+        return concurrent, concurrent_error
+
+    def test_same_result(self):
+        validator, error = self.assertSame("example-data/freetype-2.9.spdx.json", [ "example-data" ])
+        self.assertEqual(error, None)
+        self.assertEqual(len(validator.prevalidated), 3)
+
+        validator, error = self.assertSame(self.corpus.top_file, [ self.corpus.directory ], concurrency = 2)
+        self.assertEqual(error, None)
+        self.assertEqual(len(validator.prevalidated), len(self.corpus.files))
+
+        # not recursive
+        validator = SPDXValidator("2.2", None, [ self.corpus.directory ])
+        data = asyncio.run(validator.validate_file_async(self.corpus.top_file))
+        self.assertEqual(data['name'], "top-1.0")
+        self.assertEqual(list(validator.prevalidated), [ self.corpus.top_file ])
+
+    def test_checksums(self):
+        data_dir = os.path.join(self.tmp_dir.name, "data")
+        os.mkdir(data_dir)
+        for name in [ "freetype-2.9.spdx.json", "libpng-1.6.35.spdx.json", "zlib-1.2.11.spdx.json" ]:
+            shutil.copy(os.path.join("example-data", name), data_dir)
+        # a reference checked against the checksum of zlib
+        libpng_file = os.path.join(data_dir, "libpng-1.6.35.spdx.json")
+        with open(libpng_file) as f:
+            data = json.load(f)
+        data['externalDocumentRefs'][0]['externalDocumentId'] = "zlib-1.2.11"
+        data['relationships'][0]['spdxElementId'] = "zlib-1.2.11:SPDXRef-Package-zlib"
+        with open(libpng_file, "w") as f:
+            json.dump(data, f)
+        top_file = os.path.join(data_dir, "freetype-2.9.spdx.json")
+        validator, error = self.assertSame(top_file, [ data_dir ])
+        self.assertEqual(error, None)
+        # hashed while reading, not in the walk
+        counters = validator.stats.to_dict()['counters']
+        self.assertEqual((counters['checksum_cache_hits'], counters['checksum_cache_misses']), (1, 0))
+
+        data['externalDocumentRefs'][0]['checksum']['checksumValue'] = "0" * 40
+        with open(libpng_file, "w") as f:
+            json.dump(data, f)
+        validator, error = self.assertSame(top_file, [ data_dir ])
+        self.assertIn("Checksum for", error)
+
+    def test_process_pool(self):
+        with concurrent.futures.ProcessPoolExecutor(max_workers=2) as executor:
+            self.assertSame(self.corpus.top_file, [ self.corpus.directory ], executor = executor)
+
+    def test_errors(self):
+        # a leaf document with an invalid license
+        leaf_file = self.corpus.files[-1]
+        with open(leaf_file) as f:
+            data = json.load(f)
+        data['packages'][0]['licenseConcluded'] = "Not-A-License"
+        with open(leaf_file, "w") as f:
+            json.dump(data, f)
+        validator, error = self.assertSame(self.corpus.top_file, [ self.corpus.directory ])
+        self.assertIn("Not-A-License", error)
+
+        os.remove(leaf_file)
+        self.assertSame(self.corpus.top_file, [ self.corpus.directory ])
+        self.assertSame(os.path.join(self.corpus.directory, "missing.spdx.json"), [ self.corpus.directory ])
+        self.assertSame("example-data/freetype-2.9.spdx.json", [])
+
+        with self.assertRaises(SPDXValidationException):
+            asyncio.run(SPDXValidator().validate_file_async("example-data/freetype-2.9.spdx.json", concurrency = 0))
+
+    def test_concurrency(self):
+        lock = threading.Lock()
+        reading = [ 0, 0 ]
+        read_file = spdx_validator.resolver._read_file
+
+        def slow_read(file_name):
+            with lock:
+                reading[0] += 1
+                reading[1] = max(reading)
+            # network file system latency
+            time.sleep(0.05)
+            with lock:
+                reading[0] -= 1
+            return read_file(file_name)
+
+        spdx_validator.resolver._read_file = slow_read
+        try:
+            for concurrency in [ 1, 3 ]:
+                reading[1] = 0
+                self.validate(self.corpus.top_file, [ self.corpus.directory ], True, concurrency = concurrency)
+                self.assertTrue(reading[1] <= concurrency)
+            # documents linked from the same document are read concurrently
+            self.assertEqual(reading[1], 3)
+        finally:
+            spdx_validator.resolver._read_file = read_file
+
+    def test_cli(self):
+        argv = [ sys.executable, "-m", "spdx_validator", self.corpus.top_file, "-r", "-sd", self.corpus.directory, "--no-cache" ]
+        result = subprocess.run(argv + [ "--concurrency", "4", "-pp" ], capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(result.stdout, subprocess.run(argv + [ "-pp" ], capture_output=True, text=True).stdout)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+#!/bin/python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import subprocess
+import sys
+import unittest
+
+from spdx_validator.batch import BatchValidator
+from spdx_validator.batch import expand_paths
+from spdx_validator.batch import is_batch
+from spdx_validator.validator import SPDXValidator
+
+EXAMPLE_FILES = [ "example-data/freetype-2.9.spdx.json",
+                  "example-data/freetype.spdx.yml",
+                  "example-data/libpng-1.6.35.spdx.json",
+                  "example-data/zlib-1.2.11.spdx.json" ]
+
+class TestBatch(unittest.TestCase):
+
+    def test_expand_paths(self):
+        self.assertFalse(is_batch([ "example-data/zlib-1.2.11.spdx.json" ]))
+        self.assertTrue(is_batch([ "example-data" ]))
+        self.assertTrue(is_batch([ "example-data/*.json" ]))
+
+        self.assertEqual(expand_paths([ "example-data" ]), EXAMPLE_FILES)
+        self.assertEqual(expand_paths([ "example-data/*.json", "example-data/zlib-1.2.11.spdx.json" ]),
+                         [ f for f in EXAMPLE_FILES if f.endswith(".json") ])
+
+    def _validate(self, jobs):
+        validator = SPDXValidator("2.2", None, [ "example-data" ])
+        batch = BatchValidator(validator, recursive = True, jobs = jobs, print_packages = True)
+        files = EXAMPLE_FILES + [ "example-data/missing.spdx.json" ]
+        results = list(batch.validate(files))
+        self.assertEqual([ r.file_name for r in results ], files)
+        self.assertEqual([ r.ok() for r in results ], [ True, True, True, True, False ])
+        return results
+
+    def test_batch(self):
+        serial = self._validate(1)
+        parallel = self._validate(2)
+        self.assertEqual([ r.packages for r in serial ], [ r.packages for r in parallel ])
+        # freetype depends on libpng and zlib
+        self.assertEqual(len(serial[0].packages[0]['dependencies']), 2)
+
+    def test_no_files(self):
+        self.assertEqual(expand_paths([ "example-data/*.missing" ]), [])
+        result = subprocess.run([ sys.executable, "-m", "spdx_validator", "example-data/*.missing", "--no-cache" ],
+                                capture_output=True, text=True)
+        self.assertEqual(result.returncode, 1)
+        self.assertEqual(result.stdout, "")
+        self.assertTrue("No SPDX files found in: example-data/*.missing" in result.stderr)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,8 +7,13 @@
 import os
 import sys
 import subprocess
+import tempfile
 import unittest
 
+from spdx_validator.cache import DiskCache
+from spdx_validator.resolver import worker_validator
+from spdx_validator.result_cache import ResultCache
+
 from spdx_validator.validator import SPDXValidator
 from spdx_validator.validator import SPDXValidationException
 
@@ -22,6 +27,8 @@ from spdx_validator.checksum import HASH_MD4
 from spdx_validator.checksum import HASH_MD5 
 from spdx_validator.checksum import HASH_MD6 
 from spdx_validator.checksum import hash_from_file
+from spdx_validator.checksum import hashes_from_file
+from spdx_validator.checksum import ChecksumCache
 
 
 def os_checksum(file, hash_name):
@@ -62,5 +69,81 @@ class TestChecksum(unittest.TestCase):
         self.assertTrue(validate_checksums("setup.py", HASH_SHA512))
         self.assertTrue(validate_checksums("setup.py", HASH_MD5))
 
+    def test_chunked_and_mmap(self):
+        expected = os_checksum("setup.py", HASH_SHA256)
+        # chunk size not a divisor of the file size
+        self.assertEqual(hash_from_file("setup.py", HASH_SHA256, chunk_size=7), expected)
+        self.assertEqual(hash_from_file("setup.py", HASH_SHA256, use_mmap=True), expected)
+        self.assertEqual(hash_from_file("setup.py", "sha256"), expected)
+
+        with self.assertRaises(SPDXValidationException):
+            hash_from_file("setup.py", HASH_MD6)
+
+    def test_multiple_algorithms(self):
+        algos = [ HASH_SHA1, HASH_SHA256, HASH_SHA512, HASH_MD5 ]
+        for use_mmap in [ False, True ]:
+            digests = hashes_from_file("setup.py", algos, chunk_size=64, use_mmap=use_mmap)
+            self.assertEqual(sorted(digests.keys()), sorted(algos))
+            for algo in algos:
+                self.assertEqual(digests[algo], os_checksum("setup.py", algo))
+
+    def test_checksum_cache(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_name = os.path.join(tmp_dir, "doc.json")
+            with open(file_name, 'w') as f:
+                f.write("{}")
+            cache_dir = os.path.join(tmp_dir, "cache")
+
+            cache = ChecksumCache(DiskCache(cache_dir))
+            first = cache.hash_from_file(file_name, HASH_SHA1)
+            self.assertEqual(first, hash_from_file(file_name, HASH_SHA1))
+            self.assertEqual(cache.hash_from_file(file_name, HASH_SHA1), first)
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+            # a new cache (e.g. next run) finds the checksum on disk
+            cache = ChecksumCache(DiskCache(cache_dir))
+            self.assertEqual(cache.hash_from_file(file_name, HASH_SHA1), first)
+            self.assertEqual((cache.hits, cache.misses), (1, 0))
+
+            # changed file, new checksum
+            with open(file_name, 'w') as f:
+                f.write("{ }")
+            os.utime(file_name, ns=(0, 0))
+            self.assertEqual(cache.hash_from_file(file_name, HASH_SHA1), hash_from_file(file_name, HASH_SHA1))
+            self.assertEqual(cache.misses, 1)
+
+    def test_worker_checksum_cache(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            checksum_dir = os.path.join(tmp_dir, "checksums")
+            validator = SPDXValidator("2.2", None, [ "example-data" ], checksum_cache = ChecksumCache(DiskCache(checksum_dir, 4096)),
+                                      result_cache = ResultCache(DiskCache(os.path.join(tmp_dir, "results"))), jobs = 2)
+            worker = worker_validator(validator.config())
+            self.assertEqual((worker.checksum_cache.disk_cache.cache_dir, worker.checksum_cache.disk_cache.max_size), (checksum_dir, 4096))
+
+            # the content hashes of the documents, hashed in the workers
+            validator.validate_file("example-data/freetype-2.9.spdx.json", True)
+            self.assertEqual(len(os.listdir(checksum_dir)), 3)
+
+    def test_disk_cache_eviction(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = DiskCache(tmp_dir, max_size=2000)
+            for i in range(100):
+                cache.put([ "key", i ], "x" * 50)
+            self.assertTrue(len(os.listdir(tmp_dir)) < 100)
+            self.assertTrue(sum([ os.path.getsize(os.path.join(tmp_dir, f)) for f in os.listdir(tmp_dir) ]) <= 2000)
+            self.assertEqual(cache.get([ "key", 99 ]), "x" * 50)
+
+    def test_disk_cache_overwrite(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = DiskCache(tmp_dir, max_size=2000)
+            cache.put([ "key", 0 ], "x" * 50)
+            cache.put([ "key", 1 ], "x" * 50)
+            size = cache.size
+            for i in range(100):
+                cache.put([ "key", 1 ], "x" * 50)
+            self.assertEqual(cache.size, size)
+            self.assertEqual(len(os.listdir(tmp_dir)), 2)
+            self.assertEqual(cache.get([ "key", 0 ]), "x" * 50)
+
 if __name__ == '__main__':
     unittest.main()
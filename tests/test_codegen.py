@@ -0,0 +1,136 @@
+#!/bin/python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import copy
+import json
+import os
+import tempfile
+import unittest
+import yaml
+
+from spdx_validator.codegen import CodegenValidator
+from spdx_validator.codegen import CodegenUnsupported
+from spdx_validator.codegen import generate_source
+from spdx_validator.schema import SchemaRegistry
+from spdx_validator.validator import SCRIPT_DIR
+
+EXAMPLE_DIR = "example-data"
+
+SCHEMA_FILE = os.path.join(SCRIPT_DIR, "var/spdx-schema-2.2.json")
+
+
+def example_documents():
+    docs = []
+    for name in sorted(os.listdir(EXAMPLE_DIR)):
+        path = os.path.join(EXAMPLE_DIR, name)
+        with open(path) as f:
+            if name.endswith(".json"):
+                docs.append(json.load(f))
+            else:
+                docs.append(yaml.safe_load(f))
+    return docs
+
+
+def _paths(node, path = ()):
+    yield path, node
+    if isinstance(node, dict):
+        for key, value in node.items():
+            yield from _paths(value, path + (key,))
+    elif isinstance(node, list):
+        for index, value in enumerate(node):
+            yield from _paths(value, path + (index,))
+
+
+def _replace(doc, path, value):
+    doc = copy.deepcopy(doc)
+    if path == ():
+        return value
+    node = doc
+    for key in path[:-1]:
+        node = node[key]
+    node[path[-1]] = value
+    return doc
+
+
+def _delete(doc, path):
+    doc = copy.deepcopy(doc)
+    node = doc
+    for key in path[:-1]:
+        node = node[key]
+    del node[path[-1]]
+    return doc
+
+
+REPLACEMENTS = [ None, True, 0, 1.0, 1.5, "", "OTHER", "SHA1", [], {}, [ "x" ], { "x": 1 } ]
+
+def mutations(doc):
+    """Synthetic mutations of doc: every node replaced by values of
+    other types, removed, emptied and extended with unknown keys"""
+    for path, node in list(_paths(doc)):
+        for value in REPLACEMENTS:
+            yield _replace(doc, path, value)
+        if path != ():
+            yield _delete(doc, path)
+        if isinstance(node, dict):
+            extended = dict(node)
+            extended["unknownProperty"] = "x"
+            yield _replace(doc, path, extended)
+        if isinstance(node, list) and len(node) > 0:
+            yield _replace(doc, path, node + node[:1])
+
+
+class TestCodegen(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        with open(SCHEMA_FILE, 'rb') as f:
+            schema_bytes = f.read()
+        self.schema_hash = SchemaRegistry.schema_hash(schema_bytes)
+        self.jsonschema_validator = SchemaRegistry.validator_from_bytes("2.2", schema_bytes)
+        self.codegen_validator = CodegenValidator(self.jsonschema_validator, self.schema_hash, self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _assert_same_decision(self, doc):
+        self.assertEqual(self.jsonschema_validator.is_valid(doc),
+                         self.codegen_validator.is_valid(doc),
+                         msg=json.dumps(doc)[:500])
+
+    def test_example_data(self):
+        for doc in example_documents():
+            self.assertTrue(self.codegen_validator.is_valid(doc))
+            self._assert_same_decision(doc)
+
+    def test_mutations(self):
+        rejected = 0
+        for doc in example_documents():
+            for mutated in mutations(doc):
+                self._assert_same_decision(mutated)
+                if not self.jsonschema_validator.is_valid(mutated):
+                    rejected += 1
+        # make sure the mutations exercise the reject path
+        self.assertTrue(rejected > 100)
+
+    def test_disk_cache(self):
+        files = os.listdir(self.tmp_dir.name)
+        self.assertEqual(len(files), 1)
+        self.assertTrue(self.schema_hash in files[0])
+
+        # second validator loads the cached module
+        validator = CodegenValidator(self.jsonschema_validator, self.schema_hash, self.tmp_dir.name)
+        self.assertEqual(os.listdir(self.tmp_dir.name), files)
+        self.assertFalse(validator.is_valid({}))
+        self.assertTrue(len(list(validator.iter_errors({}))) > 0)
+
+    def test_unsupported(self):
+        with self.assertRaises(CodegenUnsupported):
+            generate_source({ "type": "object", "allOf": [] })
+        with self.assertRaises(CodegenUnsupported):
+            generate_source({ "type": "array", "items": [ { "type": "string" } ] })
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+#!/bin/python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import json
+import os
+import tempfile
+import unittest
+
+from benchmarks.__main__ import compare
+from benchmarks.__main__ import run_benchmarks
+from benchmarks.corpus import CorpusSpec
+from benchmarks.corpus import generate
+from benchmarks.corpus import LICENSE_MIX_SIMPLE
+from benchmarks.corpus import LICENSES
+from spdx_validator.validator import SPDXValidator
+
+
+def load(spdx_file):
+    with open(spdx_file) as f:
+        return json.load(f)
+
+
+class TestCorpus(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def generate(self, name, **params):
+        return generate(os.path.join(self.tmp_dir.name, name), CorpusSpec(**params))
+
+    def test_valid(self):
+        for license_mix in [ "simple", "mixed", "complex" ]:
+            corpus = self.generate(license_mix, packages = 5, documents = 6, depth = 2, density = 1.5, license_mix = license_mix)
+            validator = SPDXValidator("2.2", None, [ corpus.directory ])
+            validator.validate_file(corpus.top_file, True)
+            # every document is reached from the top document
+            self.assertEqual(len(validator.all_manifests), 6)
+            self.assertEqual(len(validator.packages_deps()), 5)
+
+    def test_parameters(self):
+        corpus = self.generate("params", packages = 7, documents = 9, depth = 4, density = 2, license_mix = LICENSE_MIX_SIMPLE)
+        self.assertEqual(len(corpus.files), 9)
+        self.assertEqual(corpus.files[0], corpus.top_file)
+        docs = [ load(spdx_file) for spdx_file in corpus.files ]
+        for doc in docs:
+            self.assertEqual(len(doc['packages']), 7)
+            for package in doc['packages']:
+                self.assertIn(package['licenseConcluded'], LICENSES)
+        links = [ r for r in docs[0]['relationships'] if r['relationshipType'] == "DYNAMIC_LINK" ]
+        self.assertEqual(len(links), 14)
+        # leaf documents link to nothing
+        self.assertNotIn('externalDocumentRefs', docs[-1])
+
+        no_links = self.generate("no-links", packages = 3, documents = 1, depth = 3)
+        self.assertEqual(len(no_links.files), 1)
+
+        with self.assertRaises(ValueError):
+            CorpusSpec(license_mix = "bogus")
+
+    def test_deterministic(self):
+        first = self.generate("first", seed = 3)
+        second = self.generate("second", seed = 3)
+        self.assertEqual([ load(f) for f in first.files ], [ load(f) for f in second.files ])
+
+    def test_run_and_compare(self):
+        corpus = self.generate("bench", packages = 3, documents = 3, depth = 2)
+        old = run_benchmarks(corpus, rounds = 1)
+        self.assertIn('recursive', old['results'])
+        self.assertIn('format.yaml', old['results'])
+        self.assertEqual(old['corpus']['files'], 3)
+        # survives a JSON round trip
+        old = json.loads(json.dumps(old))
+
+        new = run_benchmarks(corpus, rounds = 1, only = [ "parse", "recursive" ])
+        self.assertTrue(all([ name.startswith("parse.") or name == "recursive" for name in new['results'] ]))
+        new['results']['recursive']['best'] = old['results']['recursive']['best'] * 2
+        rows = compare(old, new)
+        self.assertEqual(len(rows), len(new['results']))
+        self.assertIn(('recursive', old['results']['recursive']['best'], new['results']['recursive']['best'], 2.0, "slower"), rows)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+#!/bin/python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from benchmarks.corpus import CorpusSpec
+from benchmarks.corpus import generate
+from spdx_validator.documents import DocumentCache
+from spdx_validator.exception import SPDXValidationException
+from spdx_validator.validator import SPDXValidator
+
+
+class TestDocuments(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.corpus = generate(os.path.join(self.tmp_dir.name, "corpus"),
+                               CorpusSpec(packages = 4, documents = 6, depth = 2, density = 1.5))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_cache(self):
+        cache = DocumentCache(2)
+        for name in [ "a", "b", "c" ]:
+            cache.put(name, { 'name': name })
+        self.assertEqual(list(cache.documents), [ "b", "c" ])
+        self.assertEqual(cache.get("a"), None)
+        # b is used, c is the least recently used
+        self.assertEqual(cache.get("b"), { 'name': "b" })
+        cache.put("d", { 'name': "d" })
+        self.assertEqual(list(cache.documents), [ "b", "d" ])
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        cache = DocumentCache(0)
+        cache.put("a", { 'name': "a" })
+        self.assertEqual(len(cache), 0)
+
+        cache = DocumentCache()
+        for i in range(100):
+            cache.put(str(i), {})
+        self.assertEqual(len(cache), 100)
+
+    def test_bounded(self):
+        unbounded = SPDXValidator("2.2", None, [ self.corpus.directory ])
+        unbounded.validate_file(self.corpus.top_file, True)
+        self.assertEqual(len(unbounded.documents), len(self.corpus.files))
+
+        validator = SPDXValidator("2.2", None, [ self.corpus.directory ], max_documents = 2)
+        validator.validate_file(self.corpus.top_file, True)
+        self.assertEqual(len(validator.documents), 2)
+        self.assertEqual(validator.packages_deps(), unbounded.packages_deps())
+        self.assertEqual(sorted(validator.all_manifests), sorted(unbounded.all_manifests))
+
+        # evicted documents are read again
+        for spdx_file in self.corpus.files:
+            with open(spdx_file) as f:
+                data = json.load(f)
+            summary = validator.all_manifests[data['documentNamespace']]
+            self.assertEqual((summary.name, summary.spdx_file, len(summary.packages)), (data['name'], spdx_file, 4))
+            self.assertEqual(validator.document(data['documentNamespace']), data)
+        self.assertEqual(len(validator.documents), 2)
+        with self.assertRaises(SPDXValidationException):
+            validator.document("http://example.com/missing")
+
+    def test_parallel(self):
+        validator = SPDXValidator("2.2", None, [ self.corpus.directory ], jobs = 2, max_documents = 0)
+        validator.validate_file(self.corpus.top_file, True)
+        # released once used
+        self.assertEqual(validator.prevalidated, {})
+        self.assertEqual(len(validator.documents), 0)
+        self.assertEqual(len(validator.all_manifests), len(self.corpus.files))
+
+    def test_cli(self):
+        argv = [ sys.executable, "-m", "spdx_validator", self.corpus.top_file, "-r", "-sd", self.corpus.directory, "--no-cache", "-pp" ]
+        result = subprocess.run(argv + [ "--max-documents", "0" ], capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(result.stdout, subprocess.run(argv, capture_output=True, text=True).stdout)
+
+if __name__ == '__main__':
+    unittest.main()
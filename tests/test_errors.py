@@ -0,0 +1,175 @@
+#!/bin/python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from spdx_validator.errors import json_pointer
+from spdx_validator.exception import SPDXValidationException
+from spdx_validator.validator import SPDXValidator
+
+EXAMPLE_FILES = [ "freetype-2.9.spdx.json", "libpng-1.6.35.spdx.json", "zlib-1.2.11.spdx.json" ]
+
+
+class CountingValidator:
+    """A schema validator counting the errors it is asked for"""
+
+    def __init__(self, validator):
+        self.validator = validator
+        self.found = 0
+
+    def iter_errors(self, instance):
+        for error in self.validator.iter_errors(instance):
+            self.found += 1
+            yield error
+
+    def __getattr__(self, name):
+        return getattr(self.validator, name)
+
+
+class TestErrors(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.data_dir = self.tmp_dir.name
+        for name in EXAMPLE_FILES:
+            shutil.copy(os.path.join("example-data", name), self.data_dir)
+        self.top_file = self.path(EXAMPLE_FILES[0])
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.data_dir, name)
+
+    def change(self, name, fun):
+        with open(self.path(name)) as f:
+            data = json.load(f)
+        fun(data)
+        with open(self.path(name), "w") as f:
+            json.dump(data, f, indent=2)
+
+    def break_documents(self):
+        def freetype(data):
+            data['packages'][0]['licenseConcluded'] = "Bogus-1"
+            # links to an element not in the document
+            data['relationships'].append({ 'spdxElementId': "DocumentRef-libpng-1.6.35:SPDXRef-Package-libpng-tools",
+                                           'relatedSpdxElement': "SPDXRef-Missing", 'relationshipType': "DYNAMIC_LINK" })
+        def libpng(data):
+            # checked against the checksum, which is wrong
+            data['externalDocumentRefs'][0]['externalDocumentId'] = "zlib-1.2.11"
+            data['externalDocumentRefs'][0]['checksum']['checksumValue'] = "0" * 40
+            data['relationships'][0]['spdxElementId'] = "zlib-1.2.11:SPDXRef-Package-zlib"
+            data['packages'][1]['licenseConcluded'] = "MIT AND Bogus-2"
+        def zlib(data):
+            del data['packages'][0]['name']
+            data['dataLicense'] = 3
+            data['packages'][0]['licenseConcluded'] = "Bogus-3 OR MIT"
+        self.change("freetype-2.9.spdx.json", freetype)
+        self.change("libpng-1.6.35.spdx.json", libpng)
+        self.change("zlib-1.2.11.spdx.json", zlib)
+
+    def test_json_pointer(self):
+        self.assertEqual(json_pointer([]), "")
+        self.assertEqual(json_pointer([ "packages", 3, "name" ]), "/packages/3/name")
+        self.assertEqual(json_pointer([ "a/b", "c~d" ]), "/a~1b/c~0d")
+
+    def test_collect(self):
+        self.break_documents()
+        # the first error only
+        with self.assertRaisesRegex(SPDXValidationException, "Bogus-1"):
+            SPDXValidator("2.2", None, [ self.data_dir ]).validate_file(self.top_file, True)
+
+        validator = SPDXValidator("2.2", None, [ self.data_dir ], collect_errors = True)
+        data = validator.validate_file(self.top_file, True)
+        self.assertEqual(data['name'], "freetype-2.9")
+        report = validator.errors.report()
+        self.assertFalse(report['valid'])
+        self.assertFalse(report['truncated'])
+        errors = [ (os.path.basename(e['file']), e['type'], e['pointer']) for e in report['errors'] ]
+        self.assertEqual(errors, [
+            ("freetype-2.9.spdx.json", "license", "/packages/0/licenseConcluded"),
+            ("libpng-1.6.35.spdx.json", "license", "/packages/1/licenseConcluded"),
+            ("libpng-1.6.35.spdx.json", "checksum", "/externalDocumentRefs/0/checksum/checksumValue"),
+            ("zlib-1.2.11.spdx.json", "schema", "/dataLicense"),
+            ("zlib-1.2.11.spdx.json", "schema", "/packages/0"),
+            ("zlib-1.2.11.spdx.json", "license", "/packages/0/licenseConcluded"),
+            ("freetype-2.9.spdx.json", "relationship", "/relationships/2/relatedSpdxElement"),
+        ])
+        self.assertEqual(report['error_count'], len(errors))
+
+        # the same errors with the codegen engine
+        validator = SPDXValidator("2.2", None, [ self.data_dir ], collect_errors = True, schema_engine = "codegen")
+        validator.validate_file(self.top_file, True)
+        self.assertEqual(validator.errors.report()['errors'], report['errors'])
+
+    def test_max_errors(self):
+        self.break_documents()
+        validator = SPDXValidator("2.2", None, [ self.data_dir ], collect_errors = True, max_errors = 2)
+        validator.validate_file(self.top_file, True)
+        report = validator.errors.report()
+        self.assertTrue(report['truncated'])
+        self.assertEqual(report['error_count'], 2)
+        # no more documents were read
+        self.assertEqual(validator.stats.to_dict()['counters']['documents'], 2)
+
+        # all the errors, none dropped
+        validator = SPDXValidator("2.2", None, [ self.data_dir ], collect_errors = True, max_errors = 7)
+        validator.validate_file(self.top_file, True)
+        report = validator.errors.report()
+        self.assertFalse(report['truncated'])
+        self.assertEqual(report['error_count'], 7)
+
+        # the schema validation stops at the first error too many
+        validator = SPDXValidator("2.2", None, [ self.data_dir ], collect_errors = True, max_errors = 3)
+        validator._schema_validator = CountingValidator(validator.schema_validator)
+        validator.validate_file(self.top_file, True)
+        report = validator.errors.report()
+        self.assertTrue(report['truncated'])
+        self.assertEqual(report['error_count'], 3)
+        self.assertEqual(validator.schema_validator.found, 1)
+
+    def test_valid(self):
+        validator = SPDXValidator("2.2", None, [ self.data_dir ], collect_errors = True)
+        validator.validate_file(self.top_file, True)
+        self.assertEqual(validator.errors.report()['errors'], [])
+        self.assertEqual(len(validator.packages_deps()), 1)
+
+        validator = SPDXValidator(collect_errors = True)
+        self.assertEqual(validator.validate_file(self.path("missing.spdx.json")), None)
+        self.assertEqual([ e.error_type for e in validator.errors.errors ], [ "read" ])
+
+    def test_stream(self):
+        self.change("zlib-1.2.11.spdx.json", lambda data: data['packages'][0].pop('name'))
+        validator = SPDXValidator(collect_errors = True, streaming = True)
+        validator.validate_file(self.path("zlib-1.2.11.spdx.json"))
+        self.assertEqual([ e.error_type for e in validator.errors.errors ], [ "document" ])
+
+    def test_cli(self):
+        self.break_documents()
+        report_file = self.path("report.json")
+        result = subprocess.run([ sys.executable, "-m", "spdx_validator", self.top_file, "-r", "-sd", self.data_dir,
+                                  "--error-report", report_file ], capture_output=True, text=True)
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("7 errors", result.stderr)
+        with open(report_file) as f:
+            self.assertEqual(json.load(f)['error_count'], 7)
+        os.remove(report_file)
+
+        result = subprocess.run([ sys.executable, "-m", "spdx_validator", self.data_dir, "--all-errors", "-j", "2",
+                                  "--error-report", "-" ], capture_output=True, text=True)
+        self.assertEqual(result.returncode, 1)
+        report = json.loads(result.stdout[result.stdout.index("{"):])
+        # not recursive, the checksum and relationship errors are not found
+        self.assertEqual(report['error_count'], 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+#!/bin/python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import yaml
+
+from benchmarks.corpus import CorpusSpec
+from benchmarks.corpus import generate
+from spdx_validator.format.factory import FormatFactory
+from spdx_validator.format.format_flict import FlictFormatter
+from spdx_validator.format.format_json import JsonFormatter
+from spdx_validator.format.format_yaml import YamlFormatter
+from spdx_validator.validator import SPDXValidator
+
+
+class TestFormat(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.corpus = generate(os.path.join(self.tmp_dir.name, "corpus"),
+                               CorpusSpec(packages = 4, documents = 6, depth = 2, density = 1.5))
+        self.validator = SPDXValidator("2.2", None, [ self.corpus.directory ])
+        self.validator.validate_file(self.corpus.top_file, True)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_factory(self):
+        self.assertTrue(isinstance(FormatFactory.formatter("json"), JsonFormatter))
+        self.assertTrue(isinstance(FormatFactory.formatter("YAML"), YamlFormatter))
+        self.assertTrue(FormatFactory.formatter("yml") is FormatFactory.formatter("yaml"))
+        self.assertTrue(isinstance(FormatFactory.formatter("flict"), FlictFormatter))
+        self.assertEqual(FormatFactory.formatter("bogus"), None)
+
+    def test_iter_packages_deps(self):
+        packages = self.validator.iter_packages_deps()
+        self.assertFalse(isinstance(packages, list))
+        self.assertEqual(list(packages), self.validator.packages_deps())
+
+    def test_json(self):
+        packages = self.validator.packages_deps()
+        records = list(JsonFormatter().stream_packages(self.validator.iter_packages_deps()))
+        self.assertEqual(len(records), 4)
+        for record in records:
+            self.assertTrue(record.endswith("\n"))
+            self.assertEqual(record.count("\n"), 1)
+        self.assertEqual([ json.loads(record) for record in records ], packages)
+        self.assertEqual([ json.loads(record) for record in records ], json.loads(JsonFormatter().format_packages(None, packages)))
+
+        # only the asked for package
+        name = packages[1]['package']['name']
+        records = list(JsonFormatter().stream_packages(self.validator.iter_packages_deps(), name))
+        self.assertEqual([ json.loads(record) for record in records ], [ packages[1] ])
+
+    def test_flict(self):
+        packages = self.validator.packages_deps()
+        out = io.StringIO()
+        self.assertEqual(FlictFormatter().write_packages(self.validator.iter_packages_deps(), out), 4)
+        lines = out.getvalue().splitlines()
+        self.assertEqual([ json.loads(line) for line in lines ], json.loads(FlictFormatter().format_packages(None, packages)))
+
+    def test_yaml(self):
+        packages = self.validator.packages_deps()
+        out = io.StringIO()
+        YamlFormatter().write_packages(self.validator.iter_packages_deps(), out)
+        self.assertEqual(list(yaml.safe_load_all(out.getvalue())), packages)
+
+    def test_dag(self):
+        dag = self.validator.packages_dag()
+        self.assertEqual(json.loads(FlictFormatter().format_dag(dag)), dag)
+        self.assertEqual(json.loads(JsonFormatter().format_dag(dag)), dag)
+        self.assertEqual(yaml.safe_load(YamlFormatter().format_dag(dag)), dag)
+
+    def test_cli(self):
+        output = os.path.join(self.tmp_dir.name, "packages.ndjson")
+        argv = [ sys.executable, "-m", "spdx_validator", self.corpus.top_file, "-r", "-sd", self.corpus.directory, "--no-cache", "-pp" ]
+        result = subprocess.run(argv + [ "--stream-packages" ], capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual([ json.loads(line) for line in result.stdout.splitlines() ], self.validator.packages_deps())
+
+        result = subprocess.run(argv + [ "--stream-packages", "-f", "flict", "-o", output ], capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(result.stdout, "")
+        with open(output) as f:
+            self.assertEqual(len(f.readlines()), 4)
+
+        # no traceback for an output file that can not be opened
+        missing = os.path.join(self.tmp_dir.name, "missing", "packages.json")
+        result = subprocess.run(argv + [ "-o", missing ], capture_output=True, text=True)
+        self.assertEqual(result.returncode, 1)
+        self.assertTrue("Could not open output file" in result.stderr)
+        self.assertFalse("Traceback" in result.stderr)
+
+        # a failed run leaves the output file alone
+        argv[3] = os.path.join(self.tmp_dir.name, "missing.spdx.json")
+        result = subprocess.run(argv + [ "-o", output ], capture_output=True, text=True)
+        self.assertEqual(result.returncode, 1)
+        with open(output) as f:
+            self.assertEqual(len(f.readlines()), 4)
+        argv[3] = self.corpus.top_file
+
+        result = subprocess.run(argv + [ "--dag" ], capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(json.loads(result.stdout), self.validator.packages_dag())
+        result = subprocess.run(argv + [ "--dag", "--stream-packages" ], capture_output=True, text=True)
+        self.assertEqual(result.returncode, 2)
+
+    def test_cli_package_fields(self):
+        # the packages as in their documents, not only the fields kept
+        # by the validator
+        with open(os.path.join("example-data", "freetype-2.9.spdx.json")) as f:
+            freetype = json.load(f)
+        with open(os.path.join("example-data", "zlib-1.2.11.spdx.json")) as f:
+            zlib = json.load(f)
+        argv = [ sys.executable, "-m", "spdx_validator", os.path.join("example-data", "freetype-2.9.spdx.json"),
+                 "-r", "-sd", "example-data", "--no-cache", "-pp" ]
+        result = subprocess.run(argv, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0)
+        packages = json.loads(result.stdout)
+        self.assertEqual([ package['package'] for package in packages ], freetype['packages'])
+        self.assertTrue(zlib['packages'][0] in packages[0]['dependencies'])
+        self.assertTrue('downloadLocation' in packages[0]['package'])
+        self.assertTrue('copyrightText' in packages[0]['dependencies'][0])
+
+        result = subprocess.run(argv + [ "--dag" ], capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0)
+        dag = json.loads(result.stdout)
+        self.assertTrue(all('downloadLocation' in package for package in dag['packages']))
+
+        # --stream keeps a summary of each package only
+        result = subprocess.run(argv + [ "--stream" ], capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(sorted(json.loads(result.stdout)[0]['package']), [ "SPDXID", "licenseConcluded", "name", "versionInfo" ])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+#!/bin/python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import random
+import unittest
+
+from spdx_validator.graph import DependencyGraph
+
+
+def recursive_dep_list(dependencies, spdx_id):
+    """The previous, recursive, implementation in SPDXValidator"""
+    deps = []
+    if spdx_id in dependencies:
+        for dep in dependencies[spdx_id]:
+            if dep not in deps:
+                deps.append(dep)
+            deps += recursive_dep_list(dependencies, dep.split(":")[1])
+    return deps
+
+
+def unique(deps):
+    result = []
+    for dep in deps:
+        if dep not in result:
+            result.append(dep)
+    return result
+
+
+def ref(n):
+    return "doc:" + str(n)
+
+
+class TestDependencyGraph(unittest.TestCase):
+
+    def test_same_as_recursive(self):
+        rand = random.Random(4711)
+        for _ in range(20):
+            size = 30
+            dependencies = {}
+            for n in range(size):
+                children = rand.sample(range(n + 1, size + 1), min(3, size - n))
+                dependencies[str(n)] = [ ref(c) for c in children ]
+            graph = DependencyGraph(dependencies)
+            self.assertEqual(graph.cycles, [])
+            for n in range(size):
+                self.assertEqual(graph.closure(str(n)), unique(recursive_dep_list(dependencies, str(n))))
+
+    def test_diamonds(self):
+        # 100 stacked diamonds, 2^100 paths
+        dependencies = {}
+        for n in range(100):
+            top = "top" + str(n)
+            bottom = "top" + str(n + 1)
+            dependencies[top] = [ ref("left" + str(n)), ref("right" + str(n)) ]
+            dependencies["left" + str(n)] = [ ref(bottom) ]
+            dependencies["right" + str(n)] = [ ref(bottom) ]
+        graph = DependencyGraph(dependencies)
+        self.assertEqual(len(graph.closure("top0")), 300)
+        self.assertEqual(len(set(graph.closure("top0"))), 300)
+
+    def test_deep_chain(self):
+        dependencies = {}
+        for n in range(10000):
+            dependencies[str(n)] = [ ref(n + 1) ]
+        graph = DependencyGraph(dependencies)
+        self.assertEqual(graph.closure("0"), [ ref(n) for n in range(1, 10001) ])
+
+    def test_cycles(self):
+        dependencies = {
+            "a": [ ref("b") ],
+            "b": [ ref("c"), ref("leaf") ],
+            "c": [ ref("a") ],
+            "self": [ ref("self") ],
+            "top": [ ref("a") ],
+        }
+        graph = DependencyGraph(dependencies)
+        self.assertEqual(sorted([ sorted(c) for c in graph.cycles ]), [ [ "a", "b", "c" ], [ "self" ] ])
+        self.assertEqual(graph.closure("a"), [ ref("b"), ref("c"), ref("a"), ref("leaf") ])
+        self.assertEqual(graph.closure("top"), [ ref("a"), ref("b"), ref("c"), ref("leaf") ])
+        self.assertEqual(graph.closure("self"), [ ref("self") ])
+        self.assertEqual(graph.closure("leaf"), [])
+
+if __name__ == '__main__':
+    unittest.main()
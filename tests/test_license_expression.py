@@ -0,0 +1,107 @@
+#!/bin/python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import json
+import os
+import tempfile
+import unittest
+
+from spdx_validator.exception import SPDXValidationException
+from spdx_validator.license_expression import AND
+from spdx_validator.license_expression import LICENSE
+from spdx_validator.license_expression import LICENSE_REF
+from spdx_validator.license_expression import OR
+from spdx_validator.license_expression import WITH
+from spdx_validator.license_expression import defined_license_refs
+from spdx_validator.license_expression import parse
+from spdx_validator.validator import SPDXValidator
+
+class TestLicenseExpression(unittest.TestCase):
+
+    def test_parse(self):
+        self.assertEqual(parse("MIT"), (LICENSE, "MIT", False))
+        self.assertEqual(parse("GPL-2.0-or-later+"), (LICENSE, "GPL-2.0-or-later", True))
+        self.assertEqual(parse("LicenseRef-my.own-1"), (LICENSE_REF, "LicenseRef-my.own-1"))
+        self.assertEqual(parse("DocumentRef-other:LicenseRef-x"), (LICENSE_REF, "DocumentRef-other:LicenseRef-x"))
+        self.assertEqual(parse("my_license+", frozenset([ "my_license" ])), (LICENSE, "my_license", True))
+
+        # WITH before AND before OR
+        self.assertEqual(parse("MIT OR Apache-2.0 AND GPL-2.0-only WITH Classpath-exception-2.0"),
+                         (OR, [ (LICENSE, "MIT", False),
+                                (AND, [ (LICENSE, "Apache-2.0", False),
+                                        (WITH, (LICENSE, "GPL-2.0-only", False), "Classpath-exception-2.0") ]) ]))
+        self.assertEqual(parse("(MIT or Zlib)and(FTL)"),
+                         (AND, [ (OR, [ (LICENSE, "MIT", False), (LICENSE, "Zlib", False) ]),
+                                 (LICENSE, "FTL", False) ]))
+
+        for bad in [ "", "MIT AND", "AND MIT", "(MIT", "MIT)", "MIT Zlib", "MIT WITH", "(MIT OR Zlib) WITH x", "M!T" ]:
+            with self.assertRaises(SPDXValidationException, msg=bad):
+                parse(bad)
+
+    def test_check_license(self):
+        validator = SPDXValidator(allowed_licenses = [ "my-license", { "key": "LicenseRef-allowed" } ])
+        for ok in [ "MIT", "NOASSERTION", "NONE", "GPL-2.0-or-later+", "my-license AND MIT",
+                    "GPL-2.0-only WITH Classpath-exception-2.0", "LicenseRef-allowed" ]:
+            validator.check_license_spdx(ok)
+        validator.check_license_spdx("MIT OR LicenseRef-in-doc", [ "LicenseRef-in-doc" ])
+
+        for bad in [ "not-a-license", "MIT OR not-a-license", "MIT WITH not-an-exception",
+                     "LicenseRef-in-doc", "MIT AND (" ]:
+            with self.assertRaises(SPDXValidationException, msg=bad):
+                validator.check_license_spdx(bad)
+        # memoized results are checked against the refs of each document
+        with self.assertRaises(SPDXValidationException):
+            validator.check_license_spdx("MIT OR LicenseRef-in-doc", [])
+
+    def test_allowed_keys(self):
+        # allowed licenses are accepted whatever their syntax
+        validator = SPDXValidator(allowed_licenses = [ "my_license", { "key": "other/license" } ])
+        for ok in [ "my_license", "MIT OR my_license", "other/license AND MIT", "GPL-2.0-only WITH my_license" ]:
+            validator.check_license_spdx(ok)
+        with self.assertRaises(SPDXValidationException):
+            validator.check_license_spdx("not_allowed")
+        with self.assertRaises(SPDXValidationException):
+            SPDXValidator().check_license_spdx("my_license")
+
+    def test_document_refs(self):
+        data = {
+            'hasExtractedLicensingInfos': [ { 'licenseId': "LicenseRef-in-doc", 'extractedText': "..." } ],
+            'externalDocumentRefs': [ { 'externalDocumentId': "DocumentRef-other", 'spdxDocument': "other.spdx.json",
+                                        'checksum': { 'algorithm': "SHA1", 'checksumValue': "0" * 40 } } ],
+        }
+        license_refs = defined_license_refs(data)
+        self.assertEqual(license_refs, set([ "LicenseRef-in-doc", "DocumentRef-other" ]))
+        self.assertEqual(defined_license_refs({ 'externalDocumentRefs': "not a list" }), set())
+
+        validator = SPDXValidator()
+        validator.check_license_spdx("MIT AND DocumentRef-other:LicenseRef-x", license_refs)
+        # only refs of declared documents
+        for bad in [ "DocumentRef-missing:LicenseRef-x", "DocumentRef-other" ]:
+            with self.assertRaises(SPDXValidationException, msg=bad):
+                validator.check_license_spdx(bad, license_refs)
+        with self.assertRaises(SPDXValidationException):
+            validator.check_license_spdx("DocumentRef-other:LicenseRef-x", [])
+
+    def test_document_refs_validate(self):
+        with open("example-data/freetype-2.9.spdx.json") as f:
+            data = json.load(f)
+        data['packages'][0]['licenseConcluded'] = "FTL OR DocumentRef-zlib-1.2.11:LicenseRef-x"
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            spdx_file = os.path.join(tmp_dir, "freetype.spdx.json")
+            with open(spdx_file, "w") as f:
+                json.dump(data, f)
+            for streaming in [ False, True ]:
+                SPDXValidator(streaming = streaming).validate_file(spdx_file)
+
+            data['packages'][0]['licenseConcluded'] = "FTL OR DocumentRef-missing:LicenseRef-x"
+            with open(spdx_file, "w") as f:
+                json.dump(data, f)
+            for streaming in [ False, True ]:
+                with self.assertRaises(SPDXValidationException):
+                    SPDXValidator(streaming = streaming).validate_file(spdx_file)
+
+if __name__ == '__main__':
+    unittest.main()
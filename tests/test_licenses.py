@@ -0,0 +1,70 @@
+#!/bin/python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import importlib.metadata
+import subprocess
+import sys
+import unittest
+
+from spdx_validator.licenses import LICENSE_LIST_VERSION
+from spdx_validator.licenses import SPDX_EXCEPTIONS
+from spdx_validator.licenses import SPDX_LICENSES
+from spdx_validator.schema import SchemaRegistry
+from spdx_validator.validator import SPDXValidator
+
+LAZY_MODULES = [ "jsonschema", "yaml", "spdx_license_list", "orjson" ]
+
+
+def imported(code):
+    check = "; import sys; print(' '.join([ m for m in " + repr(LAZY_MODULES) + " if m in sys.modules ]))"
+    result = subprocess.run([ sys.executable, "-c", code + check ], capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+
+class TestLicenses(unittest.TestCase):
+
+    def test_table(self):
+        try:
+            import spdx_license_list
+        except ImportError:
+            self.skipTest("spdx_license_list not installed")
+        if importlib.metadata.version("spdx_license_list") != LICENSE_LIST_VERSION:
+            self.skipTest("table generated from another spdx_license_list version")
+        self.assertEqual(SPDX_LICENSES, tuple(spdx_license_list.LICENSES))
+        self.assertEqual(SPDX_EXCEPTIONS, tuple(spdx_license_list.EXCEPTIONS))
+
+    def test_validator_licenses(self):
+        try:
+            import spdx_license_list
+        except ImportError:
+            self.skipTest("spdx_license_list not installed")
+        self.assertTrue(SPDXValidator().licenses() is spdx_license_list.LICENSES)
+
+    def test_list_licenses(self):
+        result = subprocess.run([ sys.executable, "-m", "spdx_validator", "--list-licenses" ], capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(result.stdout.split(), list(SPDX_LICENSES))
+
+    def test_lazy_imports(self):
+        self.assertEqual(imported("import spdx_validator.__main__"), [])
+        self.assertEqual(imported("from spdx_validator.validator import SPDXValidator; SPDXValidator()"), [])
+        self.assertEqual(imported("from spdx_validator.validator import SPDXValidator; SPDXValidator().validate_file('example-data/zlib-1.2.11.spdx.json')"),
+                         [ "jsonschema" ] + [ m for m in [ "orjson" ] if importlib.util.find_spec(m) ])
+
+    def test_lazy_schema(self):
+        SchemaRegistry.clear()
+        validator = SPDXValidator()
+        self.assertEqual(SchemaRegistry._validators, {})
+        validator.validate_file("example-data/zlib-1.2.11.spdx.json")
+        self.assertEqual(len(SchemaRegistry._validators), 1)
+
+        # a missing schema file is reported when validating
+        validator = SPDXValidator(schema_file = "missing-schema.json")
+        with self.assertRaises(Exception):
+            validator.validate_file("example-data/zlib-1.2.11.spdx.json")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+#!/bin/python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import json
+import os
+import tempfile
+import unittest
+
+from spdx_validator.errors import ERROR_RELATIONSHIP
+from spdx_validator.exception import SPDXValidationException
+from spdx_validator.manifest import IndexedManifest
+from spdx_validator.validator import SPDXValidator
+
+
+def package(spdx_id, name):
+    return { 'SPDXID': spdx_id, 'name': name, 'versionInfo': "1.0", 'downloadLocation': "NOASSERTION",
+             'copyrightText': "NOASSERTION", 'licenseConcluded': "MIT", 'licenseDeclared': "MIT", 'filesAnalyzed': False }
+
+
+def manifest_data():
+    return {
+        'SPDXID': "SPDXRef-DOCUMENT",
+        'spdxVersion': "SPDX-2.2",
+        'creationInfo': { 'created': "2021-09-18T15:38:51Z", 'creators': [ "Tool: spdx-validator-tests" ] },
+        'name': "top-1.0",
+        'dataLicense': "CC0-1.0",
+        'documentNamespace': "https://example.com/spdx/top-1.0",
+        'documentDescribes': [ "SPDXRef-top" ],
+        'packages': [ package("SPDXRef-top", "top"), package("SPDXRef-lib", "lib"), package("SPDXRef-lib", "lib-2") ],
+        'externalDocumentRefs': [
+            { 'externalDocumentId': "DocumentRef-zlib-1.2.11",
+              'checksum': { 'algorithm': "SHA1", 'checksumValue': "0" * 40 },
+              'spdxDocument': "zlib-1.2.11.spdx.json" },
+            { 'externalDocumentId': "libpng-1.6.35",
+              'checksum': { 'algorithm': "SHA1", 'checksumValue': "1" * 40 },
+              'spdxDocument': "libpng-1.6.35.spdx.json" },
+            { 'externalDocumentId': "libpng-1.6.35:SPDXRef-Package-libpng-libpng",
+              'checksum': { 'algorithm': "SHA256", 'checksumValue': "2" * 64 },
+              'spdxDocument': "libpng-1.6.35.spdx.json" },
+        ],
+        'relationships': [
+            { 'spdxElementId': "SPDXRef-DOCUMENT", 'relatedSpdxElement': "SPDXRef-top", 'relationshipType': "DESCRIBES" },
+            { 'spdxElementId': "DocumentRef-zlib-1.2.11:SPDXRef-Package-zlib", 'relatedSpdxElement': "SPDXRef-top",
+              'relationshipType': "DYNAMIC_LINK" },
+        ],
+    }
+
+
+class TestManifest(unittest.TestCase):
+
+    def test_packages_by_id(self):
+        manifest = IndexedManifest(manifest_data())
+        self.assertEqual(sorted(manifest.packages_by_id), [ "SPDXRef-lib", "SPDXRef-top" ])
+        self.assertEqual(manifest.package("SPDXRef-top")['name'], "top")
+        # the last of duplicates
+        self.assertEqual(manifest.package("SPDXRef-lib")['name'], "lib-2")
+        self.assertEqual(manifest.package("SPDXRef-missing"), None)
+        self.assertEqual(IndexedManifest({ 'name': "empty" }).packages_by_id, {})
+
+    def test_doc_refs_by_id(self):
+        manifest = IndexedManifest(manifest_data())
+        self.assertEqual(sorted(manifest.doc_refs_by_id), [ "DocumentRef-zlib-1.2.11", "libpng-1.6.35",
+                                                            "libpng-1.6.35:SPDXRef-Package-libpng-libpng" ])
+        self.assertEqual(manifest.spdx_document("DocumentRef-zlib-1.2.11"), "zlib-1.2.11.spdx.json")
+        self.assertEqual(manifest.spdx_document("DocumentRef-missing"), None)
+
+    def test_checksum_refs_by_id(self):
+        data = manifest_data()
+        manifest = IndexedManifest(data)
+        # only the references not in "DocumentRef-" form, by their id
+        # without the ":..." suffix
+        self.assertEqual(manifest.checksum_refs_by_id, { "libpng-1.6.35": data['externalDocumentRefs'][1:] })
+
+    def test_has_document_refs(self):
+        data = manifest_data()
+        self.assertTrue(IndexedManifest(data).has_document_refs)
+        data['externalDocumentRefs'] = data['externalDocumentRefs'][1:]
+        self.assertFalse(IndexedManifest(data).has_document_refs)
+
+        del data['externalDocumentRefs']
+        manifest = IndexedManifest(data)
+        self.assertFalse(manifest.has_document_refs)
+        self.assertEqual(manifest.doc_refs, None)
+        self.assertEqual(manifest.doc_refs_by_id, {})
+
+    def test_qualified_package(self):
+        manifest = IndexedManifest(manifest_data())
+        self.assertEqual(manifest.qualified_package("top-1.0:SPDXRef-top")['name'], "top")
+        self.assertEqual(manifest.qualified_package("top-1.0:SPDXRef-missing"), None)
+        self.assertEqual(manifest.qualified_package("other-1.0:SPDXRef-top"), None)
+        self.assertEqual(manifest.qualified_package("SPDXRef-top"), None)
+
+    def test_missing_doc_refs(self):
+        data = manifest_data()
+        del data['externalDocumentRefs']
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            spdx_file = os.path.join(tmp_dir, "top-1.0.spdx.json")
+            with open(spdx_file, "w") as f:
+                json.dump(data, f)
+
+            validator = SPDXValidator("2.2", None, [ "example-data" ])
+            with self.assertRaisesRegex(SPDXValidationException, "externalDocumentRefs not found in"):
+                validator.validate_file(spdx_file, True)
+
+            validator = SPDXValidator("2.2", None, [ "example-data" ], collect_errors = True)
+            validator.validate_file(spdx_file, True)
+            self.assertEqual([ (error.error_type, error.pointer) for error in validator.errors.errors ],
+                             [ (ERROR_RELATIONSHIP, "/relationships/1") ])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+#!/bin/python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from spdx_validator.exception import SPDXValidationException
+from spdx_validator.manifest_index import ManifestIndex
+from spdx_validator.parser import ManifestParser
+from spdx_validator.validator import SPDXValidator
+
+class TestManifestIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.top = self.tmp_dir.name
+        os.makedirs(os.path.join(self.top, "a", "deep"))
+        os.makedirs(os.path.join(self.top, "b"))
+        shutil.copy("example-data/zlib-1.2.11.spdx.json", os.path.join(self.top, "a", "deep"))
+        shutil.copy("example-data/libpng-1.6.35.spdx.json", os.path.join(self.top, "a"))
+        shutil.copy("example-data/libpng-1.6.35.spdx.json", os.path.join(self.top, "b"))
+        shutil.copy("example-data/freetype-2.9.spdx.json", self.top)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_lookups(self):
+        index = ManifestIndex([ self.top ], ManifestParser())
+        zlib = os.path.join(self.top, "a", "deep", "zlib-1.2.11.spdx.json")
+        self.assertEqual(index.find("zlib-1.2.11.spdx.json"), zlib)
+        self.assertEqual(index.find("a/deep/zlib-1.2.11.spdx.json"), zlib)
+        self.assertEqual(index.find("zlib-1.2.11-22f6a44b-02ad-43da-bfff-682de90d9639"), zlib)
+        self.assertEqual(index.find("zlib-1.2.11"), zlib)
+        self.assertEqual(index.find("b/libpng-1.6.35.spdx.json"), os.path.join(self.top, "b", "libpng-1.6.35.spdx.json"))
+
+        # two libpng files
+        with self.assertRaises(SPDXValidationException):
+            index.find("libpng-1.6.35.spdx.json")
+        with self.assertRaises(SPDXValidationException):
+            index.find("missing.spdx.json")
+
+        # same directory twice, same files
+        index = ManifestIndex([ self.top, os.path.join(self.top, "a", ".", "deep") ], ManifestParser())
+        self.assertEqual(index.find("zlib-1.2.11.spdx.json"), zlib)
+
+    def test_not_recursive(self):
+        index = ManifestIndex([ self.top ], ManifestParser(), recursive = False)
+        self.assertEqual(index.find("freetype-2.9.spdx.json"), os.path.join(self.top, "freetype-2.9.spdx.json"))
+        with self.assertRaises(SPDXValidationException):
+            index.find("zlib-1.2.11.spdx.json")
+
+    def test_recursive_validation(self):
+        os.remove(os.path.join(self.top, "b", "libpng-1.6.35.spdx.json"))
+        validator = SPDXValidator("2.2", None, [ self.top ])
+        validator.validate_file(os.path.join(self.top, "freetype-2.9.spdx.json"), True)
+        self.assertEqual(len(validator.packages_deps()[0]['dependencies']), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+#!/bin/python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import json
+import os
+import tempfile
+import unittest
+
+from benchmarks.bench_memory import measure
+from benchmarks.corpus import CorpusSpec
+from benchmarks.corpus import generate
+from spdx_validator.graph import DependencyGraph
+from spdx_validator.package_graph import PackageGraph
+from spdx_validator.package_graph import PackageRecord
+from spdx_validator.package_graph import dag_closure
+from spdx_validator.validator import SPDXValidator
+
+
+def package(spdx_id, name, license = "MIT"):
+    return { 'SPDXID': spdx_id, 'name': name, 'versionInfo': "1.0", 'licenseConcluded': license,
+             'downloadLocation': "NOASSERTION", 'copyrightText': "NOASSERTION" }
+
+
+class TestPackageGraph(unittest.TestCase):
+
+    def test_record(self):
+        record = PackageRecord.from_package(package("SPDXRef-a", "a"))
+        self.assertEqual(record.to_dict(), { 'SPDXID': "SPDXRef-a", 'name': "a", 'versionInfo': "1.0", 'licenseConcluded': "MIT" })
+        with self.assertRaises(AttributeError):
+            record.copyright = "NOASSERTION"
+        self.assertEqual(PackageRecord("SPDXRef-b", "b").to_dict(), { 'SPDXID': "SPDXRef-b", 'name': "b" })
+
+        # strings are shared between records
+        other = PackageRecord.from_package(package("".join([ "SPDXRef-", "a" ]), "a", "".join([ "M", "IT" ])))
+        self.assertTrue(other.spdx_id is record.spdx_id)
+        self.assertTrue(other.license is record.license)
+
+    def test_graph(self):
+        graph = PackageGraph()
+        graph.add_package("top:SPDXRef-top", package("SPDXRef-top", "top"))
+        graph.add_dependency("SPDXRef-top", "left:SPDXRef-left")
+        graph.add_dependency("SPDXRef-top", "right:SPDXRef-right")
+        graph.add_dependency("SPDXRef-left", "bottom:SPDXRef-bottom")
+        graph.add_dependency("SPDXRef-right", "bottom:SPDXRef-bottom")
+        self.assertFalse(graph.is_checked("left:SPDXRef-left"))
+        self.assertEqual(graph.package("left:SPDXRef-left"), None)
+        self.assertEqual(graph.package("missing:SPDXRef-missing"), None)
+        for name in [ "bottom", "right", "left" ]:
+            graph.add_package(name + ":SPDXRef-" + name, package("SPDXRef-" + name, name))
+        self.assertTrue(graph.is_checked("left:SPDXRef-left"))
+
+        self.assertEqual(graph.dependencies(), {
+            "SPDXRef-top": [ "left:SPDXRef-left", "right:SPDXRef-right" ],
+            "SPDXRef-left": [ "bottom:SPDXRef-bottom" ],
+            "SPDXRef-right": [ "bottom:SPDXRef-bottom" ],
+        })
+        self.assertEqual(list(graph.checked_packages()), [ "top:SPDXRef-top", "bottom:SPDXRef-bottom",
+                                                           "right:SPDXRef-right", "left:SPDXRef-left" ])
+
+        # the same closures as of the dict based graph
+        dependency_graph = graph.dependency_graph()
+        expected = DependencyGraph(graph.dependencies())
+        for spdx_id in [ "SPDXRef-top", "SPDXRef-left", "SPDXRef-bottom" ]:
+            self.assertEqual([ record.name + ":" + record.spdx_id for record in graph.closure(dependency_graph, spdx_id) ],
+                             expected.closure(spdx_id))
+        self.assertEqual(graph.closure(dependency_graph, "SPDXRef-missing"), [])
+
+    def test_dag(self):
+        graph = PackageGraph()
+        graph.add_package("top:SPDXRef-top", package("SPDXRef-top", "top"))
+        graph.add_dependency("SPDXRef-top", "left:SPDXRef-left")
+        graph.add_dependency("SPDXRef-top", "right:SPDXRef-right")
+        graph.add_dependency("SPDXRef-left", "bottom:SPDXRef-bottom")
+        graph.add_dependency("SPDXRef-left", "bottom:SPDXRef-bottom")
+        graph.add_dependency("SPDXRef-right", "bottom:SPDXRef-bottom")
+        graph.add_dependency("SPDXRef-right", "missing:SPDXRef-missing")
+        graph.add_dependency("SPDXRef-other", "bottom:SPDXRef-bottom")
+        for name in [ "left", "right", "bottom", "other" ]:
+            graph.add_package(name + ":SPDXRef-" + name, package("SPDXRef-" + name, name))
+
+        dag = graph.dag([ "top:SPDXRef-top" ], [ "top:SPDXRef-top", "right:SPDXRef-right" ])
+        # each package once, not other (checked, but not depended on)
+        self.assertEqual([ (p['id'], p['name']) for p in dag['packages'] ], [ (0, "top"), (1, "left"), (2, "right"), (3, "bottom") ])
+        self.assertEqual(dag['packages'][3], { 'id': 3, 'SPDXID': "SPDXRef-bottom", 'name': "bottom", 'versionInfo': "1.0", 'licenseConcluded': "MIT" })
+        self.assertEqual(dag['top'], [ 0 ])
+        # each edge once, none to the missing package
+        self.assertEqual(dag['edges'], [ [ 0, 1 ], [ 0, 2 ], [ 1, 3 ], [ 2, 3 ] ])
+        self.assertEqual(dag['closures'], [ { 'id': 0, 'dependencies': [ 1, 3, 2 ] }, { 'id': 2, 'dependencies': [ 3 ] } ])
+        self.assertFalse('closures' in graph.dag([ "top:SPDXRef-top" ]))
+        # only packages depended on, from the top
+        self.assertEqual([ p['name'] for p in graph.dag([ "right:SPDXRef-right" ])['packages'] ], [ "right", "bottom" ])
+
+        # the closures, from the DAG
+        for closure in dag['closures']:
+            self.assertEqual(dag_closure(dag, closure['id']), closure['dependencies'])
+        self.assertEqual(dag_closure(dag, 3), [])
+
+    def test_validator(self):
+        validator = SPDXValidator("2.2", None, [ "example-data" ])
+        validator.validate_file("example-data/freetype-2.9.spdx.json", True)
+        self.assertEqual(validator.dependencies, {
+            "SPDXRef-Package-freetype-libfreetype": [ "libpng-1.6.35:SPDXRef-Package-libpng-libpng", "zlib-1.2.11:SPDXRef-Package-zlib" ],
+            "SPDXRef-Package-libpng-libpng": [ "zlib-1.2.11:SPDXRef-Package-zlib" ],
+        })
+        self.assertEqual(set([ summary.name for summary in validator.all_manifests.values() ]), set([ "freetype-2.9", "libpng-1.6.35", "zlib-1.2.11" ]))
+        packages = validator.packages_deps()
+        self.assertEqual(packages[0]['package']['name'], "libfreetype")
+        self.assertEqual([ dep['name'] for dep in packages[0]['dependencies'] ], [ "libpng", "zlib" ])
+        # the full packages, from their documents
+        with open("example-data/zlib-1.2.11.spdx.json") as f:
+            zlib = json.load(f)
+        self.assertEqual(packages[0]['dependencies'][1], zlib['packages'][0])
+
+        # also when the documents are read again
+        validator = SPDXValidator("2.2", None, [ "example-data" ], max_documents = 0)
+        validator.validate_file("example-data/freetype-2.9.spdx.json", True)
+        self.assertEqual(validator.packages_deps(), packages)
+
+    def test_packages_dag(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            corpus = generate(os.path.join(tmp_dir, "corpus"), CorpusSpec(packages = 6, documents = 8, depth = 3, density = 2))
+            validator = SPDXValidator("2.2", None, [ corpus.directory ])
+            validator.validate_file(corpus.top_file, True)
+        packages = validator.packages_deps()
+        dag = validator.packages_dag(packages[2]['package']['name'])
+        by_id = { p['id']: dict((k, v) for k, v in p.items() if k != 'id') for p in dag['packages'] }
+        # the same packages and closures as packages_deps()
+        self.assertEqual([ by_id[i] for i in dag['top'] ], [ p['package'] for p in packages ])
+        for top_id, package in zip(dag['top'], packages):
+            self.assertEqual([ by_id[i] for i in dag_closure(dag, top_id) ], package['dependencies'])
+        self.assertEqual(dag['closures'], [ { 'id': dag['top'][2], 'dependencies': dag_closure(dag, dag['top'][2]) } ])
+        # each package once, not once per package depending on it
+        self.assertTrue(len(json.dumps(dag)) < len(json.dumps(packages)))
+
+    def test_memory(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            corpus = generate(os.path.join(tmp_dir, "corpus"), CorpusSpec(packages = 10, documents = 4, depth = 2))
+            result = measure(corpus)
+        self.assertTrue(result['bounded'] < result['compact'])
+        self.assertTrue(result['bounded'] < result['dict'])
+
+if __name__ == '__main__':
+    unittest.main()
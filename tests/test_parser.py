@@ -0,0 +1,93 @@
+#!/bin/python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import json
+import os
+import tempfile
+import unittest
+import yaml
+
+from spdx_validator.exception import SPDXValidationException
+from spdx_validator.parser import available_json_backends
+from spdx_validator.parser import available_yaml_backends
+from spdx_validator.parser import BACKEND_AUTO
+from spdx_validator.parser import ManifestParser
+from spdx_validator.validator import SPDXValidator
+
+JSON_FILE = "example-data/freetype-2.9.spdx.json"
+YAML_FILE = "example-data/freetype.spdx.yml"
+
+
+class TestParser(unittest.TestCase):
+
+    def test_json_backends(self):
+        with open(JSON_FILE) as f:
+            expected = json.load(f)
+        for backend in available_json_backends():
+            for use_mmap in [ False, True ]:
+                parser = ManifestParser(json_backend = backend, use_mmap = use_mmap)
+                self.assertEqual(parser.json_backend, backend)
+                self.assertEqual(parser.load(JSON_FILE), expected)
+
+    def test_yaml_backends(self):
+        with open(YAML_FILE) as f:
+            expected = yaml.safe_load(f)
+        for backend in available_yaml_backends():
+            parser = ManifestParser(yaml_backend = backend)
+            self.assertEqual(parser.yaml_backend, backend)
+            self.assertEqual(parser.load(YAML_FILE), expected)
+
+    def test_loads(self):
+        parser = ManifestParser()
+        for spdx_file in [ JSON_FILE, YAML_FILE ]:
+            with open(spdx_file, 'rb') as f:
+                self.assertEqual(parser.loads(spdx_file, f.read()), parser.load(spdx_file))
+        with self.assertRaises(SPDXValidationException):
+            parser.loads("README.md", b"# spdx-validator")
+
+    def test_auto(self):
+        parser = ManifestParser(BACKEND_AUTO, BACKEND_AUTO)
+        self.assertEqual(parser.json_backend, available_json_backends()[-1])
+        self.assertEqual(parser.yaml_backend, available_yaml_backends()[-1])
+
+    def test_bad_backend(self):
+        with self.assertRaises(SPDXValidationException):
+            ManifestParser(json_backend = "simplejson")
+        with self.assertRaises(SPDXValidationException):
+            ManifestParser(yaml_backend = "ruamel")
+        if "orjson" not in available_json_backends():
+            with self.assertRaises(SPDXValidationException):
+                ManifestParser(json_backend = "orjson")
+
+    def test_bad_files(self):
+        parser = ManifestParser()
+        with self.assertRaises(SPDXValidationException):
+            parser.load("README.md")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            empty_file = os.path.join(tmp_dir, "empty.spdx.json")
+            open(empty_file, "w").close()
+            for backend in available_json_backends():
+                with self.assertRaises(Exception):
+                    ManifestParser(json_backend = backend, use_mmap = True).load(empty_file)
+
+            bad_file = os.path.join(tmp_dir, "bad.spdx.json")
+            with open(bad_file, "w") as f:
+                f.write("{ not json")
+            for backend in available_json_backends():
+                validator = SPDXValidator(json_backend = backend)
+                with self.assertRaisesRegex(SPDXValidationException, "not in correct JSON format"):
+                    validator.validate_file(bad_file)
+
+    def test_validate_file(self):
+        for backend in available_json_backends():
+            validator = SPDXValidator(json_backend = backend, spdx_dirs = [ "example-data" ])
+            self.assertIsNotNone(validator.validate_file(JSON_FILE))
+        for backend in available_yaml_backends():
+            validator = SPDXValidator(yaml_backend = backend, spdx_dirs = [ "example-data" ])
+            self.assertIsNotNone(validator.validate_file(YAML_FILE))
+
+if __name__ == '__main__':
+    unittest.main()
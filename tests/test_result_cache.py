@@ -0,0 +1,144 @@
+#!/bin/python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from spdx_validator.cache import DiskCache
+from spdx_validator.exception import SPDXValidationException
+from spdx_validator.result_cache import ResultCache
+from spdx_validator.result_cache import SUMMARY_KEYS
+from spdx_validator.result_cache import summary
+from spdx_validator.validator import SPDXValidator
+
+EXAMPLE_FILES = [ "freetype-2.9.spdx.json", "libpng-1.6.35.spdx.json", "zlib-1.2.11.spdx.json" ]
+
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.data_dir = os.path.join(self.tmp_dir.name, "data")
+        os.mkdir(self.data_dir)
+        for name in EXAMPLE_FILES:
+            shutil.copy(os.path.join("example-data", name), self.data_dir)
+        self.top_file = os.path.join(self.data_dir, EXAMPLE_FILES[0])
+        self.cache_dir = os.path.join(self.tmp_dir.name, "cache")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def validator(self, allowed_licenses = []):
+        return SPDXValidator("2.2", None, [ self.data_dir ], allowed_licenses = allowed_licenses,
+                             result_cache = ResultCache(DiskCache(self.cache_dir)))
+
+    def packages(self, validator):
+        return [ (p['package']['name'], [ d['name'] for d in p['dependencies'] ]) for p in validator.packages_deps() ]
+
+    def test_unchanged(self):
+        first = self.validator()
+        first.validate_file(self.top_file, True)
+        counters = first.stats.to_dict()['counters']
+        self.assertEqual((counters['result_cache_hits'], counters['result_cache_misses']), (0, 3))
+
+        second = self.validator()
+        second.validate_file(self.top_file, True)
+        stats = second.stats.to_dict()
+        self.assertEqual((stats['counters']['result_cache_hits'], stats['counters']['result_cache_misses']), (3, 0))
+        # neither parsed nor validated
+        self.assertNotIn('parse', stats['phases'])
+        self.assertNotIn('schema', stats['phases'])
+        self.assertEqual(self.packages(second), self.packages(first))
+        self.assertEqual(second.dependencies, first.dependencies)
+
+    def test_returned_data(self):
+        # opt in, outside the command line tool
+        self.assertEqual(SPDXValidator().result_cache, None)
+        with open(self.top_file) as f:
+            data = json.load(f)
+        self.assertEqual(self.validator().validate_file(self.top_file), data)
+
+        # on a hit, the summary
+        returned = self.validator().validate_file(self.top_file)
+        self.assertEqual(returned, summary(data))
+        self.assertEqual(sorted(returned), sorted([ key for key in SUMMARY_KEYS if key in data ] + [ 'relationships' ]))
+        self.assertEqual(SPDXValidator().validate_file(self.top_file), data)
+
+    def test_changed(self):
+        self.validator().validate_file(self.top_file, True)
+
+        # other content
+        zlib_file = os.path.join(self.data_dir, "zlib-1.2.11.spdx.json")
+        with open(zlib_file) as f:
+            data = json.load(f)
+        data['packages'][0]['licenseConcluded'] = "Not-A-License"
+        with open(zlib_file, "w") as f:
+            json.dump(data, f)
+        validator = self.validator()
+        with self.assertRaisesRegex(SPDXValidationException, "Not-A-License"):
+            validator.validate_file(zlib_file)
+        self.assertEqual(validator.stats.to_dict()['counters']['result_cache_misses'], 1)
+
+        # the error is cached, and raised again
+        validator = self.validator()
+        with self.assertRaisesRegex(SPDXValidationException, "Not-A-License"):
+            validator.validate_file(zlib_file)
+        self.assertEqual(validator.stats.to_dict()['counters']['result_cache_hits'], 1)
+
+        # other allowed licenses
+        validator = self.validator([ "Not-A-License" ])
+        validator.validate_file(zlib_file)
+        self.assertEqual(validator.stats.to_dict()['counters']['result_cache_misses'], 1)
+
+    def test_allowed_license_dicts(self):
+        # allowed licenses as dicts, in any order, are the same context
+        self.validator([ { 'key': "b" }, { 'key': "a" } ]).validate_file(self.top_file, True)
+        validator = self.validator([ "a", { 'key': "b" } ])
+        validator.validate_file(self.top_file, True)
+        self.assertEqual(validator.stats.to_dict()['counters']['result_cache_hits'], 3)
+
+    def test_summary(self):
+        with open(os.path.join("example-data", EXAMPLE_FILES[0])) as f:
+            data = json.load(f)
+        data['files'] = [ { 'SPDXID': "SPDXRef-File" } ]
+        data['relationships'].append({ 'spdxElementId': "SPDXRef-DOCUMENT", 'relationshipType': "DESCRIBES",
+                                       'relatedSpdxElement': "SPDXRef-Package-freetype-libfreetype" })
+        data_summary = summary(data)
+        self.assertNotIn('files', data_summary)
+        self.assertEqual(data_summary['packages'], data['packages'])
+        self.assertEqual(set([ r['relationshipType'] for r in data_summary['relationships'] ]), set([ "DYNAMIC_LINK" ]))
+        self.assertEqual(len(data_summary['relationships']), len(data['relationships']) - 1)
+
+    def test_bounded(self):
+        result_cache = ResultCache(DiskCache(self.cache_dir, max_size = 8 * 1024))
+        for i in range(50):
+            result_cache.put("%064x" % i, [ "2.2" ], { 'name': "x" * 200, 'packages': [] })
+        size = sum([ os.path.getsize(os.path.join(self.cache_dir, f)) for f in os.listdir(self.cache_dir) ])
+        self.assertTrue(size <= 8 * 1024)
+        self.assertNotEqual(result_cache.get("%064x" % 49, [ "2.2" ]), None)
+        self.assertEqual(result_cache.get("%064x" % 0, [ "2.2" ]), None)
+
+    def test_cli(self):
+        argv = [ sys.executable, "-m", "spdx_validator", self.top_file, "-r", "-sd", self.data_dir,
+                 "--cache-dir", self.cache_dir, "--stats", "json" ]
+        result = subprocess.run(argv + [ "--no-cache" ], capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0)
+        self.assertFalse(os.path.exists(self.cache_dir))
+
+        for jobs, hits in [ ("1", 0), ("1", 3), ("2", 0) ]:
+            result = subprocess.run(argv + [ "-j", jobs ], capture_output=True, text=True)
+            self.assertEqual(result.returncode, 0)
+            if jobs == "1":
+                self.assertEqual(json.loads(result.stderr)['counters']['result_cache_hits'], hits)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+#!/bin/python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import concurrent.futures
+import http.client
+import json
+import os
+import socket
+import stat
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+
+from spdx_validator.client import default_address
+from spdx_validator.client import request
+from spdx_validator.client import validate
+from spdx_validator.server import ValidationServer
+from spdx_validator.server import default_socket_path
+from spdx_validator.server import make_private_dir
+
+
+def cli(argv):
+    result = subprocess.run([ sys.executable, "-m", "spdx_validator" ] + argv, capture_output=True, text=True)
+    return { 'exit_code': result.returncode, 'stdout': result.stdout, 'stderr': result.stderr }
+
+
+class TestServer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.server = ValidationServer(socket_path = os.path.join(cls.tmp_dir.name, "test.sock"), workers = 2)
+        cls.thread = threading.Thread(target = cls.server.serve_forever)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.thread.join()
+        cls.server.close()
+        cls.tmp_dir.cleanup()
+
+    def test_status(self):
+        reply = request(self.server.address, "GET", "/status")
+        self.assertEqual(reply['status'], "ok")
+        self.assertEqual(reply['workers'], 2)
+        with self.assertRaises(OSError):
+            request(self.server.address, "GET", "/nothing")
+
+    def test_same_as_cli(self):
+        for argv in [ [ "example-data/freetype-2.9.spdx.json" ],
+                      [ "example-data/freetype-2.9.spdx.json", "-r", "-sd", "example-data", "-pp" ],
+                      [ "example-data/freetype-2.9.spdx.json", "-r" ],
+                      [ "example-data/missing.spdx.json" ],
+                      [ "example-data", "-pp" ],
+                      [ "--bogus-option" ] ]:
+            self.assertEqual(validate(self.server.address, argv), cli(argv))
+
+    def test_formats(self):
+        # each request gets its own format, not the first one a worker saw
+        for format in [ "json", "yaml", "flict", "yaml", "json", "yml" ] * 2:
+            argv = [ "example-data/freetype-2.9.spdx.json", "-r", "-sd", "example-data", "-pp", "-f", format, "--no-cache" ]
+            self.assertEqual(validate(self.server.address, argv), cli(argv))
+
+    def test_cwd(self):
+        reply = validate(self.server.address, [ "freetype-2.9.spdx.json", "-r" ], os.path.abspath("example-data"))
+        self.assertEqual(reply['exit_code'], 0)
+        reply = validate(self.server.address, [ "freetype-2.9.spdx.json" ], self.tmp_dir.name)
+        self.assertEqual(reply['exit_code'], 1)
+
+    def test_concurrent(self):
+        argvs = [ [ "example-data/freetype-2.9.spdx.json", "-r", "-sd", "example-data" ],
+                  [ "example-data/missing.spdx.json" ] ] * 8
+        with concurrent.futures.ThreadPoolExecutor(max_workers = 8) as executor:
+            replies = list(executor.map(lambda argv: validate(self.server.address, argv), argvs))
+        self.assertEqual([ reply['exit_code'] for reply in replies ], [ 0, 1 ] * 8)
+
+    def test_tcp(self):
+        token_file = os.path.join(self.tmp_dir.name, "test.token")
+        server = ValidationServer(port = 0, workers = 1, token_file = token_file)
+        thread = threading.Thread(target = server.serve_forever)
+        thread.start()
+        try:
+            self.assertTrue(server.address.startswith("http://127.0.0.1:"))
+            self.assertEqual(stat.S_IMODE(os.stat(token_file).st_mode), 0o600)
+            reply = validate(server.address, [ "example-data/zlib-1.2.11.spdx.json" ], token_file = token_file)
+            self.assertEqual(reply['exit_code'], 0)
+
+            # no, or a wrong, token
+            for headers in [ {}, { "Authorization": "Bearer wrong" } ]:
+                conn = http.client.HTTPConnection(server.address[len("http://"):])
+                conn.request("POST", "/validate", json.dumps({ 'argv': [ "example-data/zlib-1.2.11.spdx.json" ], 'cwd': os.getcwd() }), headers)
+                self.assertEqual(conn.getresponse().status, 401)
+                conn.close()
+
+            # a token file others may read is not used
+            os.chmod(token_file, 0o644)
+            with self.assertRaises(OSError):
+                validate(server.address, [ "example-data/zlib-1.2.11.spdx.json" ], token_file = token_file)
+        finally:
+            server.shutdown()
+            thread.join()
+            server.close()
+        self.assertFalse(os.path.exists(token_file))
+
+    def test_socket_checks(self):
+        argv = [ "example-data/zlib-1.2.11.spdx.json" ]
+        # not a socket
+        not_socket = os.path.join(self.tmp_dir.name, "not-a-socket")
+        with open(not_socket, "w") as f:
+            f.write("{}")
+        with self.assertRaisesRegex(OSError, "must be the user's"):
+            validate(not_socket, argv)
+        with self.assertRaisesRegex(OSError, "must be the user's"):
+            ValidationServer(socket_path = not_socket, workers = 1)
+        self.assertTrue(os.path.exists(not_socket))
+
+        # a socket others may write to
+        shared = os.path.join(self.tmp_dir.name, "shared.sock")
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.bind(shared)
+            sock.listen(1)
+            os.chmod(shared, 0o777)
+            with self.assertRaisesRegex(OSError, "must be the user's"):
+                validate(shared, argv)
+        finally:
+            sock.close()
+
+    def test_default_paths(self):
+        runtime_dir = os.environ.pop("XDG_RUNTIME_DIR", None)
+        try:
+            private_dir = os.path.join("/tmp", "spdx-validator-" + str(os.getuid()))
+            self.assertEqual(default_address(), os.path.join(private_dir, "spdx-validator.sock"))
+            self.assertEqual(default_socket_path(), default_address())
+        finally:
+            if runtime_dir != None:
+                os.environ["XDG_RUNTIME_DIR"] = runtime_dir
+
+        private_dir = os.path.join(self.tmp_dir.name, "private")
+        make_private_dir(private_dir)
+        self.assertEqual(stat.S_IMODE(os.stat(private_dir).st_mode), 0o700)
+        make_private_dir(private_dir)
+        os.chmod(private_dir, 0o755)
+        with self.assertRaisesRegex(OSError, "0700"):
+            make_private_dir(private_dir)
+
+    def test_writing_options(self):
+        output = os.path.join(self.tmp_dir.name, "packages.json")
+        for argv in [ [ "-o", output ], [ "--out", output ], [ "--error-report", output ], [ "--trace", output ],
+                      [ "--cache-dir", self.tmp_dir.name ] ]:
+            with self.assertRaisesRegex(OSError, "403", msg=str(argv)):
+                validate(self.server.address, [ "example-data/zlib-1.2.11.spdx.json", "-pp" ] + argv)
+        self.assertFalse(os.path.exists(output))
+
+        # validated by the client instead
+        result = subprocess.run([ sys.executable, "-m", "spdx_validator.client", "--server", self.server.address,
+                                  "example-data/zlib-1.2.11.spdx.json", "-pp", "--no-cache", "-o", output ], capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0)
+        with open(output) as f:
+            self.assertEqual(json.load(f)[0]['package']['name'], "zlib")
+
+if __name__ == '__main__':
+    unittest.main()
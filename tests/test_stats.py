@@ -0,0 +1,126 @@
+#!/bin/python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import unittest
+
+from spdx_validator.resolver import worker_validator
+from spdx_validator.stats import COUNTERS
+from spdx_validator.stats import PHASE_PARSE
+from spdx_validator.stats import ValidationStats
+from spdx_validator.validator import SPDXValidator
+
+TOP_FILE = "example-data/freetype-2.9.spdx.json"
+
+
+class TestStats(unittest.TestCase):
+
+    def test_recursive(self):
+        validator = SPDXValidator("2.2", None, [ "example-data" ])
+        validator.validate_file(TOP_FILE, True)
+        stats = validator.stats.to_dict()
+        self.assertEqual(sorted(stats['phases']), [ "license", "parse", "resolve", "schema" ])
+        for phase in stats['phases'].values():
+            self.assertTrue(phase['wall'] > 0)
+        self.assertEqual(stats['phases']['parse']['calls'], 3)
+        self.assertEqual(stats['counters']['documents'], 3)
+        self.assertEqual(stats['counters']['packages'], 4)
+        self.assertEqual(stats['counters']['relationships'], 3)
+        self.assertTrue(stats['counters']['bytes_read'] > 0)
+        self.assertTrue(stats['peak_rss'] == None or stats['peak_rss'] > 0)
+
+        # kept over reset(), as in batch mode
+        validator.reset()
+        validator.validate_file(TOP_FILE)
+        self.assertEqual(validator.stats.to_dict()['counters']['documents'], 4)
+        validator.stats.reset()
+        self.assertEqual(validator.stats.to_dict()['phases'], {})
+
+    def test_parallel(self):
+        # the time spent in the workers, validating the documents, is
+        # merged
+        validator = SPDXValidator("2.2", None, [ "example-data" ], jobs = 2)
+        validator.validate_file(TOP_FILE, True)
+        stats = validator.stats.to_dict()
+        self.assertEqual(sorted(stats['phases']), [ "license", "parse", "prevalidate", "resolve", "schema" ])
+        for name in [ "license", "parse", "schema" ]:
+            self.assertEqual(stats['phases'][name]['calls'], 3)
+            self.assertTrue(stats['phases'][name]['wall'] > 0)
+        # documents are counted once, by the relationship walk
+        self.assertEqual(stats['counters']['documents'], 3)
+        self.assertTrue(stats['worker_peak_rss'] == None or stats['worker_peak_rss'] > 0)
+
+    def test_async(self):
+        # as test_parallel, with the thread pool of the event loop
+        validator = SPDXValidator("2.2", None, [ "example-data" ])
+        asyncio.run(validator.validate_file_async(TOP_FILE, True, concurrency = 2))
+        stats = validator.stats.to_dict()
+        for name in [ "license", "parse", "schema" ]:
+            self.assertEqual(stats['phases'][name]['calls'], 3)
+        self.assertEqual(stats['counters']['documents'], 3)
+
+        # a validator per thread
+        config = validator.config()
+        validators = []
+        thread = threading.Thread(target = lambda: validators.append(worker_validator(config)))
+        thread.start()
+        thread.join()
+        self.assertFalse(validators[0] is worker_validator(config))
+        self.assertTrue(worker_validator(config) is worker_validator(config))
+
+    def test_checksum(self):
+        validator = SPDXValidator()
+        validator._hash_from_file(TOP_FILE, "SHA1")
+        validator._hash_from_file(TOP_FILE, "SHA1")
+        stats = validator.stats.to_dict()
+        self.assertEqual(stats['phases']['checksum']['calls'], 2)
+        self.assertEqual(stats['counters']['checksum_cache_misses'], 1)
+        self.assertEqual(stats['counters']['checksum_cache_hits'], 1)
+        self.assertEqual(stats['counters']['bytes_hashed'], os.path.getsize(TOP_FILE))
+
+    def test_merge(self):
+        stats = ValidationStats()
+        with stats.phase(PHASE_PARSE):
+            pass
+        stats.count("documents", 2)
+        worker = ValidationStats()
+        with worker.phase(PHASE_PARSE):
+            pass
+        worker.count("documents")
+        stats.merge(worker.to_dict())
+        result = stats.to_dict()
+        self.assertEqual(result['phases']['parse']['calls'], 2)
+        self.assertEqual(result['counters']['documents'], 3)
+        self.assertEqual(sorted(result['counters']), sorted(COUNTERS))
+
+        text = stats.format()
+        self.assertIn("parse", text)
+        self.assertIn("documents", text)
+        self.assertEqual(json.loads(stats.format("json"))['counters']['documents'], 3)
+
+    def test_cli(self):
+        result = subprocess.run([ sys.executable, "-m", "spdx_validator", TOP_FILE, "-r", "-sd", "example-data", "--stats", "json" ],
+                                capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(json.loads(result.stderr)['counters']['documents'], 3)
+
+        # printed for failed validations too, and in batch mode
+        result = subprocess.run([ sys.executable, "-m", "spdx_validator", "example-data/missing.spdx.json", "--stats" ],
+                                capture_output=True, text=True)
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("documents", result.stderr)
+        result = subprocess.run([ sys.executable, "-m", "spdx_validator", "example-data", "-j", "2", "--stats", "json" ],
+                                capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(json.loads(result.stderr)['counters']['documents'], 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,180 @@
+#!/bin/python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import io
+import json
+import os
+import tempfile
+import tracemalloc
+import unittest
+
+from spdx_validator.exception import SPDXValidationException
+from spdx_validator.stream import available_stream_backends
+from spdx_validator.stream import document_events
+from spdx_validator.stream import EVENT_ARRAY
+from spdx_validator.stream import EVENT_MEMBER
+from spdx_validator.stream import _BuiltinReader
+from spdx_validator.stream import STREAMED_ARRAYS
+from spdx_validator.stream import StreamValidator
+from spdx_validator.validator import SPDXValidator
+
+EXAMPLE_FILES = [ "example-data/freetype-2.9.spdx.json", "example-data/libpng-1.6.35.spdx.json", "example-data/zlib-1.2.11.spdx.json" ]
+
+
+def rebuild(events):
+    data = {}
+    for event, key, value in events:
+        if event == EVENT_MEMBER:
+            data[key] = value
+        elif event == EVENT_ARRAY:
+            data[key] = []
+        else:
+            data[key].append(value)
+    return data
+
+
+def document(packages, files, license_refs = False):
+    doc = {
+        'spdxVersion': "SPDX-2.2",
+        'dataLicense': "CC0-1.0",
+        'SPDXID': "SPDXRef-DOCUMENT",
+        'name': "big",
+        'documentNamespace': "http://spdx.org/spdxdocs/big",
+        'creationInfo': { 'created': "2021-01-01T00:00:00Z", 'creators': [ "Tool: test" ] },
+        'packages': [],
+        'files': [],
+        'relationships': [],
+    }
+    for i in range(packages):
+        doc['packages'].append({ 'SPDXID': "SPDXRef-Package-" + str(i), 'name': "package-" + str(i),
+                                 'downloadLocation': "NOASSERTION", 'copyrightText': "NOASSERTION",
+                                 'licenseDeclared': "MIT", 'licenseConcluded': "MIT OR Apache-2.0" })
+    for i in range(files):
+        doc['files'].append({ 'SPDXID': "SPDXRef-File-" + str(i), 'fileName': "./src/file-" + str(i) + ".c",
+                              'copyrightText': "NOASSERTION", 'licenseConcluded': "MIT",
+                              'checksums': [ { 'algorithm': "SHA1", 'checksumValue': "%040x" % i } ] })
+        doc['relationships'].append({ 'spdxElementId': "SPDXRef-Package-0", 'relationshipType': "CONTAINS",
+                                      'relatedSpdxElement': "SPDXRef-File-" + str(i) })
+    if license_refs:
+        doc['packages'][0]['licenseConcluded'] = "LicenseRef-Custom"
+        # defined after the packages
+        del doc['relationships']
+        doc['hasExtractedLicensingInfos'] = [ { 'licenseId': "LicenseRef-Custom", 'extractedText': "custom" } ]
+    return doc
+
+
+class TestStream(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write(self, name, data):
+        path = os.path.join(self.tmp_dir.name, name)
+        with open(path, "w") as f:
+            if isinstance(data, str):
+                f.write(data)
+            else:
+                json.dump(data, f, indent=2)
+        return path
+
+    def test_events(self):
+        for spdx_file in EXAMPLE_FILES:
+            with open(spdx_file) as f:
+                expected = json.load(f)
+            for backend in available_stream_backends():
+                with open(spdx_file, 'rb') as f:
+                    self.assertEqual(rebuild(document_events(f, backend)), expected)
+            # values split over many reads
+            with open(spdx_file, 'rb') as f:
+                self.assertEqual(rebuild(_BuiltinReader(f, STREAMED_ARRAYS, chunk_size = 7).events()), expected)
+
+        for text in [ '{}', '{"packages": [], "n": 12345, "files": 1.5e3}', ' { "a" : [ 1 , { "b" : null } ] } \n' ]:
+            for backend in available_stream_backends():
+                self.assertEqual(rebuild(document_events(io.BytesIO(text.encode()), backend)), json.loads(text))
+
+    def test_invalid_json(self):
+        for text in [ '', '[]', '{"packages": [ {} }', '{"name": "x"} x', '{"name": "x",}' ]:
+            for backend in available_stream_backends():
+                with self.assertRaises(Exception):
+                    rebuild(document_events(io.BytesIO(text.encode()), backend))
+
+        validator = SPDXValidator(streaming = True)
+        with self.assertRaisesRegex(SPDXValidationException, "not in correct JSON format"):
+            validator.validate_file(self.write("bad.spdx.json", '{"name": "x", '))
+        with self.assertRaisesRegex(SPDXValidationException, "Could not open file"):
+            validator.validate_file(os.path.join(self.tmp_dir.name, "missing.spdx.json"))
+
+    def test_validate_file_recursive(self):
+        expected = SPDXValidator("2.2", None, [ "example-data" ])
+        expected.validate_file("example-data/freetype-2.9.spdx.json", True)
+
+        validator = SPDXValidator("2.2", None, [ "example-data" ], streaming = True)
+        data = validator.validate_file("example-data/freetype-2.9.spdx.json", True)
+        self.assertEqual(data['name'], expected.data()['name'])
+        self.assertEqual(validator.dependencies, expected.dependencies)
+        self.assertEqual([ (p['package']['name'], [ d['name'] for d in p['dependencies'] ]) for p in validator.packages_deps() ],
+                         [ (p['package']['name'], [ d['name'] for d in p['dependencies'] ]) for p in expected.packages_deps() ])
+
+    def test_schema_errors(self):
+        doc = document(3, 3)
+        del doc['packages'][1]['name']
+        spdx_file = self.write("schema.spdx.json", doc)
+        with self.assertRaises(SPDXValidationException):
+            SPDXValidator().validate_file(spdx_file)
+        with self.assertRaisesRegex(SPDXValidationException, r"\['packages'\]\[1\]"):
+            SPDXValidator(streaming = True).validate_file(spdx_file)
+
+        # errors outside the streamed arrays
+        for key, value in [ ('dataLicense', 17), ('packages', {}) ]:
+            doc = document(3, 3)
+            doc[key] = value
+            spdx_file = self.write("skeleton.spdx.json", doc)
+            with self.assertRaises(SPDXValidationException):
+                SPDXValidator(streaming = True).validate_file(spdx_file)
+
+    def test_licenses(self):
+        doc = document(3, 3)
+        doc['packages'][2]['licenseConcluded'] = "MIT AND Not-A-License"
+        spdx_file = self.write("license.spdx.json", doc)
+        with self.assertRaisesRegex(SPDXValidationException, "Not-A-License"):
+            SPDXValidator(streaming = True).validate_file(spdx_file)
+
+        doc = document(3, 3, license_refs = True)
+        spdx_file = self.write("refs.spdx.json", doc)
+        SPDXValidator().validate_file(spdx_file)
+        SPDXValidator(streaming = True).validate_file(spdx_file)
+
+        del doc['hasExtractedLicensingInfos']
+        spdx_file = self.write("refs.spdx.json", doc)
+        with self.assertRaisesRegex(SPDXValidationException, "LicenseRef-Custom"):
+            SPDXValidator(streaming = True).validate_file(spdx_file)
+
+    def test_bounded_memory(self):
+        small_file = self.write("small.spdx.json", document(10, 1000))
+        big_file = self.write("big.spdx.json", document(10, 4000))
+        validator = SPDXValidator(schema_engine = "codegen")
+        validator.validate_file(big_file)
+
+        for backend in available_stream_backends():
+            stream_validator = StreamValidator(validator.schema, validator.spdx_version, validator.schema_engine,
+                                               validator.license_checker, backend)
+            peaks = []
+            for spdx_file in [ small_file, big_file ]:
+                tracemalloc.start()
+                try:
+                    stream_validator.validate(spdx_file)
+                    peaks.append(tracemalloc.get_traced_memory()[1])
+                finally:
+                    tracemalloc.stop()
+            # independent of the size of the document
+            self.assertTrue(peaks[1] < peaks[0] * 1.5, backend + ": peak memory " + str(peaks))
+            self.assertTrue(peaks[1] < os.path.getsize(big_file) / 2, backend + ": peak memory " + str(peaks))
+
+if __name__ == '__main__':
+    unittest.main()
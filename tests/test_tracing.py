@@ -0,0 +1,116 @@
+#!/bin/python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from spdx_validator.exception import SPDXValidationException
+from spdx_validator.tracing import EVENT_RELATIONSHIP_RESOLVED
+from spdx_validator.tracing import FileExporter
+from spdx_validator.tracing import SPAN_DOCUMENT
+from spdx_validator.tracing import TraceSubscriber
+from spdx_validator.validator import SPDXValidator
+
+TOP_FILE = "example-data/freetype-2.9.spdx.json"
+
+
+class Recorder(TraceSubscriber):
+
+    def __init__(self):
+        self.started = []
+        self.ended = []
+        self.events = []
+
+    def on_span_start(self, span):
+        self.started.append(span)
+
+    def on_span_end(self, span):
+        self.ended.append(span)
+
+    def on_event(self, name, attributes, timestamp, parent_id):
+        self.events.append((name, attributes, parent_id))
+
+
+class TestTracing(unittest.TestCase):
+
+    def test_spans(self):
+        validator = SPDXValidator("2.2", None, [ "example-data" ])
+        recorder = Recorder()
+        validator.tracer.add_subscriber(recorder)
+        validator.validate_file(TOP_FILE, True)
+
+        self.assertEqual(len(recorder.started), len(recorder.ended))
+        documents = [ span for span in recorder.ended if span.name == SPAN_DOCUMENT ]
+        self.assertEqual([ span.attributes['name'] for span in documents ], [ "zlib-1.2.11", "libpng-1.6.35", "freetype-2.9" ])
+        # linked documents are children of the linking document
+        top = documents[-1]
+        self.assertEqual(top.parent_id, None)
+        self.assertEqual(documents[1].parent_id, top.span_id)
+        self.assertEqual(documents[0].parent_id, documents[1].span_id)
+        names = set([ span.name for span in recorder.ended ])
+        self.assertEqual(names, set([ "document", "parse", "license", "schema", "resolve" ]))
+        for span in recorder.ended:
+            self.assertTrue(span.duration >= 0)
+            self.assertTrue(span.end >= span.start)
+            self.assertEqual(span.error, None)
+
+        self.assertEqual([ (name, attributes['element']) for name, attributes, parent_id in recorder.events ],
+                         [ (EVENT_RELATIONSHIP_RESOLVED, "zlib-1.2.11:SPDXRef-Package-zlib"),
+                           (EVENT_RELATIONSHIP_RESOLVED, "libpng-1.6.35:SPDXRef-Package-libpng-libpng") ])
+        # the same stats as without tracing
+        self.assertEqual(validator.stats.to_dict()['phases']['parse']['calls'], 3)
+
+        validator.tracer.remove_subscriber(recorder)
+        validator.reset()
+        validator.validate_file(TOP_FILE, True)
+        self.assertEqual(len(recorder.ended), len(documents) * 5 - 1)
+
+    def test_error(self):
+        validator = SPDXValidator()
+        recorder = Recorder()
+        validator.tracer.add_subscriber(recorder)
+        with self.assertRaises(SPDXValidationException):
+            validator.validate_file("example-data/missing.spdx.json")
+        self.assertEqual([ span.name for span in recorder.ended ], [ "parse", "document" ])
+        for span in recorder.ended:
+            self.assertIn("missing.spdx.json", span.error)
+
+    def test_no_subscribers(self):
+        validator = SPDXValidator("2.2", None, [ "example-data" ])
+
+        def fail(*args):
+            raise AssertionError("span created without subscribers")
+        validator.tracer.span = fail
+        validator.tracer.event = fail
+        validator.validate_file(TOP_FILE, True)
+
+    def test_file_exporter(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            trace_file = os.path.join(tmp_dir, "trace.jsonl")
+            validator = SPDXValidator("2.2", None, [ "example-data" ])
+            exporter = FileExporter(trace_file)
+            validator.tracer.add_subscriber(exporter)
+            validator.validate_file(TOP_FILE, True)
+            exporter.close()
+            with open(trace_file) as f:
+                records = [ json.loads(line) for line in f ]
+            self.assertEqual(len([ r for r in records if r['type'] == "event" ]), 2)
+            self.assertEqual(records[-1]['name'], "document")
+            self.assertEqual(records[-1]['attributes']['file'], TOP_FILE)
+
+            cli_trace_file = os.path.join(tmp_dir, "cli.jsonl")
+            result = subprocess.run([ sys.executable, "-m", "spdx_validator", TOP_FILE, "-r", "-sd", "example-data",
+                                      "--trace", cli_trace_file, "--no-cache" ], capture_output=True, text=True)
+            self.assertEqual(result.returncode, 0)
+            with open(cli_trace_file) as f:
+                self.assertEqual(len(f.readlines()), len(records))
+
+if __name__ == '__main__':
+    unittest.main()
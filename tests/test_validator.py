@@ -36,6 +36,12 @@ class TestValidator(unittest.TestCase):
             validator = SPDXValidator("2.1")
 
 
+    def test_schema_registry(self):
+        # validators for the same schema share one compiled schema validator
+        first = SPDXValidator()
+        second = SPDXValidator("2.2")
+        self.assertTrue(first.schema_validator is second.schema_validator)
+
     def test_validate_file_yaml(self):
 
         validator = SPDXValidator()
@@ -57,6 +63,21 @@ class TestValidator(unittest.TestCase):
             validator.validate_file("example-data/freetype-2.9.spdx.json", recursive)
 
 
+    def test_validate_file_recursive_parallel(self):
+        recursive = True
+        serial = SPDXValidator("2.2", None, ["example-data"])
+        serial.validate_file("example-data/freetype-2.9.spdx.json", recursive)
+
+        parallel = SPDXValidator("2.2", None, ["example-data"], jobs=2)
+        parallel.validate_file("example-data/freetype-2.9.spdx.json", recursive)
+        self.assertEqual(list(parallel.checked_packages.items()), list(serial.checked_packages.items()))
+        self.assertEqual(parallel.dependencies, serial.dependencies)
+        self.assertEqual(parallel.packages_deps(), serial.packages_deps())
+
+        parallel = SPDXValidator("2.2", None, [], jobs=2)
+        with self.assertRaises(SPDXValidationException):
+            parallel.validate_file("example-data/freetype-2.9.spdx.json", recursive)
+
     def test_validate_data(self):
         import yaml
 
@@ -0,0 +1,119 @@
+#!/bin/python3
+
+# SPDX-FileCopyrightText: 2021 Henrik Sandklef
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import json
+import os
+import tempfile
+import unittest
+
+from spdx_validator.stats import COUNTER_DOCUMENTS
+from spdx_validator.validator import SPDXValidator
+
+
+def package_id(name, index = 0):
+    return "SPDXRef-Package-" + name + "-" + str(index)
+
+
+def document(name, packages = 1, links = []):
+    """A document with packages packages, links a list of (package
+    index, linked document name, linked package index)"""
+    doc = {
+        'SPDXID': "SPDXRef-DOCUMENT",
+        'spdxVersion': "SPDX-2.2",
+        'creationInfo': { 'created': "2021-09-18T15:38:51Z", 'creators': [ "Tool: spdx-validator-tests" ] },
+        'name': name,
+        'dataLicense': "CC0-1.0",
+        'documentNamespace': "https://example.com/spdx/" + name,
+        'documentDescribes': [ package_id(name) ],
+        'packages': [ { 'SPDXID': package_id(name, index), 'name': name + "-" + str(index), 'versionInfo': "1.0",
+                        'downloadLocation': "NOASSERTION", 'copyrightText': "NOASSERTION",
+                        'licenseConcluded': "MIT", 'licenseDeclared': "MIT", 'filesAnalyzed': False }
+                      for index in range(packages) ],
+        'relationships': [ { 'spdxElementId': "SPDXRef-DOCUMENT", 'relatedSpdxElement': package_id(name),
+                             'relationshipType': "DESCRIBES" } ],
+    }
+    linked = sorted(set([ link[1] for link in links ]))
+    if linked != []:
+        doc['externalDocumentRefs'] = [ { 'externalDocumentId': "DocumentRef-" + other,
+                                          'checksum': { 'algorithm': "SHA1", 'checksumValue': "0" * 40 },
+                                          'spdxDocument': other + ".spdx.json" } for other in linked ]
+    for pkg_index, other, other_index in links:
+        doc['relationships'].append({ 'spdxElementId': "DocumentRef-" + other + ":" + package_id(other, other_index),
+                                      'relatedSpdxElement': package_id(name, pkg_index),
+                                      'relationshipType': "DYNAMIC_LINK" })
+    return doc
+
+
+class TestWalk(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.directory = self.tmp_dir.name
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write(self, doc, file_name = None):
+        path = os.path.join(self.directory, file_name or doc['name'] + ".spdx.json")
+        with open(path, "w") as f:
+            json.dump(doc, f)
+        return path
+
+    def validate(self, spdx_file):
+        validator = SPDXValidator("2.2", None, [ self.directory ])
+        validator.validate_file(spdx_file, True)
+        return validator
+
+    def test_chain(self):
+        length = 10000
+        for index in range(length):
+            links = [ (0, "doc-" + str(index + 1), 0) ] if index + 1 < length else []
+            self.write(document("doc-" + str(index), 1, links))
+        validator = self.validate(os.path.join(self.directory, "doc-0.spdx.json"))
+        self.assertEqual(validator.stats.counters[COUNTER_DOCUMENTS], length)
+        self.assertEqual(len(validator.all_manifests), length)
+        packages = validator.packages_deps()
+        self.assertEqual(packages[0]['package']['name'], "doc-0-0")
+        self.assertEqual(len(packages[0]['dependencies']), length - 1)
+
+    def test_diamond(self):
+        width = 200
+        self.write(document("bottom", width))
+        for index in range(width):
+            self.write(document("middle-" + str(index), 1, [ (0, "bottom", index) ]))
+        top = self.write(document("top", 1, [ (0, "middle-" + str(index), 0) for index in range(width) ]))
+        validator = self.validate(top)
+        # the bottom document is validated once, not once per middle
+        self.assertEqual(validator.stats.counters[COUNTER_DOCUMENTS], width + 2)
+        self.assertEqual(len(validator.packages_deps()[0]['dependencies']), 2 * width)
+
+    def test_cycle(self):
+        self.write(document("a", 1, [ (0, "b", 0) ]))
+        self.write(document("b", 1, [ (0, "c", 0) ]))
+        self.write(document("c", 1, [ (0, "a", 0) ]))
+        validator = self.validate(os.path.join(self.directory, "a.spdx.json"))
+        self.assertEqual(validator.stats.counters[COUNTER_DOCUMENTS], 3)
+        self.assertEqual(sorted(validator.dependencies), [ package_id("a"), package_id("b"), package_id("c") ])
+
+    def test_namespace(self):
+        # two files of the same document, linked to under different
+        # file names
+        self.write(document("lib", 2), "lib.spdx.json")
+        self.write(document("lib", 2), "lib-copy.spdx.json")
+        self.write(document("left", 1, [ (0, "lib", 0) ]))
+        right = document("right", 1, [ (0, "lib", 1) ])
+        right['externalDocumentRefs'][0]['spdxDocument'] = "lib-copy.spdx.json"
+        self.write(right)
+        top = self.write(document("top", 1, [ (0, "left", 0), (0, "right", 0) ]))
+        validator = self.validate(top)
+        self.assertEqual(validator.stats.counters[COUNTER_DOCUMENTS], 5)
+        self.assertEqual(len(validator.all_manifests), 4)
+        self.assertEqual(validator.all_manifests["https://example.com/spdx/lib"].spdx_file, os.path.join(self.directory, "lib.spdx.json"))
+        self.assertEqual(validator.dependencies[package_id("right")], [ "lib:" + package_id("lib", 1) ])
+        self.assertTrue(validator.packages.is_checked("lib:" + package_id("lib", 1)))
+
+if __name__ == '__main__':
+    unittest.main()